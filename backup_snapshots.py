@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Online backups and read-only snapshots of movies.db.
+
+Copying the database file while the scraper is writing can capture a torn
+state, and `reset_database` used to be the only "backup" there was. This
+module uses `sqlite3.Connection.backup`, copying a batch of pages per
+step and sleeping between steps, so writers are only blocked briefly. If
+another connection writes mid-copy, SQLite restarts the copy, so a backup
+is always a consistent point-in-time image. Backups go to `backups/`
+beside the database unless another directory is given, and are named
+after the database they were taken from.
+
+    python backup_snapshots.py backup --retention 7
+    python backup_snapshots.py periodic --interval 3600
+    python backup_snapshots.py restore backups/movies-20260101T000000Z.db
+    python backup_snapshots.py snapshot analytics.db
+"""
+
+import argparse
+import contextlib
+import glob
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from db_config import connect, data_dir, get_db_path
+
+BACKUP_DIR = 'backups'
+DEFAULT_PAGES = 256
+DEFAULT_SLEEP = 0.005
+DEFAULT_RETENTION = 7
+
+
+def backup_database(destination, source=None, pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP):
+    """
+    Copy the live database to `destination` with the online backup API.
+
+    The copy is written next to the destination and moved into place only
+    once complete, so a crash never leaves a half-written backup behind.
+    """
+    directory = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.partial')
+    os.close(fd)
+
+    source_connection = source if isinstance(source, sqlite3.Connection) else connect(source)
+    target_connection = sqlite3.connect(tmp_path)
+    try:
+        source_connection.backup(target_connection, pages=pages, sleep=sleep)
+        target_connection.close()
+        os.replace(tmp_path, destination)
+    except BaseException:
+        target_connection.close()
+        os.remove(tmp_path)
+        raise
+    finally:
+        if source_connection is not source:
+            source_connection.close()
+    return destination
+
+
+# Backup file names are <database name>-<UTC timestamp>.db
+STAMP_FORMAT = '%Y%m%dT%H%M%S%fZ'
+STAMP_GLOB = '[0-9]' * 8 + 'T*Z'
+
+
+def default_backup_dir(source=None):
+    """Return the backup directory beside the source database."""
+    return data_dir(BACKUP_DIR, source if isinstance(source, str) else None)
+
+
+def backup_name(source=None):
+    """Return the name backups of the source database are filed under."""
+    return os.path.splitext(os.path.basename(get_db_path(source if isinstance(source, str) else None)))[0]
+
+
+def list_backups(backup_dir=None, name='movies'):
+    """Return the backups of the `name` database in a directory, oldest first."""
+    backup_dir = backup_dir or default_backup_dir()
+    return sorted(glob.glob(os.path.join(glob.escape(backup_dir), f'{glob.escape(name)}-{STAMP_GLOB}.db')))
+
+
+def rotate_backups(backup_dir=None, retention=DEFAULT_RETENTION, name='movies'):
+    """Delete all but the newest `retention` backups, returning the deleted paths."""
+    if retention < 1:
+        raise ValueError(f'retention must keep at least one backup, got {retention}')
+    backups = list_backups(backup_dir, name)
+    expired = backups[:-retention]
+    for path in expired:
+        os.remove(path)
+    return expired
+
+
+def create_backup(backup_dir=None, source=None, retention=DEFAULT_RETENTION,
+                  pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP):
+    """
+    Write a timestamped backup into `backup_dir` and apply the retention policy.
+
+    With `retention=None` no older backups are deleted.
+    """
+    if retention is not None and retention < 1:
+        raise ValueError(f'retention must keep at least one backup, got {retention}')
+    backup_dir = backup_dir or default_backup_dir(source)
+    name = backup_name(source)
+    stamp = datetime.now(timezone.utc).strftime(STAMP_FORMAT)
+    path = backup_database(os.path.join(backup_dir, f'{name}-{stamp}.db'), source, pages, sleep)
+    if retention is not None:
+        rotate_backups(backup_dir, retention, name)
+    return path
+
+
+def run_periodic(interval, backup_dir=None, source=None, retention=DEFAULT_RETENTION,
+                 stop_event=None):
+    """Take a backup every `interval` seconds until `stop_event` is set."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        path = create_backup(backup_dir, source, retention)
+        print(f"✅ Backup written to {path}")
+        stop_event.wait(interval)
+
+
+def restore_backup(backup_path, target=None, pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP):
+    """
+    Restore a backup into the live database.
+
+    The backup is integrity-checked first, then copied in with the backup
+    API, which replaces the live contents in a single consistent step
+    without deleting the file out from under other connections.
+    """
+    backup_connection = sqlite3.connect(f'file:{backup_path}?mode=ro', uri=True)
+    try:
+        result = backup_connection.execute('PRAGMA integrity_check').fetchone()[0]
+        if result != 'ok':
+            raise sqlite3.DatabaseError(f'Backup {backup_path} failed integrity check: {result}')
+
+        target_connection = target if isinstance(target, sqlite3.Connection) else connect(target)
+        try:
+            backup_connection.backup(target_connection, pages=pages, sleep=sleep)
+        finally:
+            if target_connection is not target:
+                target_connection.close()
+    finally:
+        backup_connection.close()
+
+
+@contextlib.contextmanager
+def open_snapshot(source=None, pages=DEFAULT_PAGES, sleep=DEFAULT_SLEEP):
+    """
+    Yield a read-only connection to a private, consistent copy of the database.
+
+    Analytics jobs can run long queries on the snapshot without holding
+    any locks on the live database. The copy is deleted afterwards.
+    """
+    directory = tempfile.mkdtemp(prefix='movies-snapshot-')
+    path = os.path.join(directory, 'snapshot.db')
+    try:
+        backup_database(path, source, pages, sleep)
+        connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            yield connection
+        finally:
+            connection.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _retention(value):
+    """argparse type for --retention: a count of at least one."""
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError('must keep at least one backup')
+    return count
+
+
+def main(argv=None):
+    """Back up, restore or snapshot the database from the command line."""
+    parser = argparse.ArgumentParser(description='Online backups and snapshots of movies.db')
+    parser.add_argument('command', choices=['backup', 'periodic', 'list', 'restore', 'snapshot'])
+    parser.add_argument('path', nargs='?', help='Backup to restore, or where to write a snapshot')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    parser.add_argument('--backup-dir', default=None,
+                        help=f'Directory holding rotated backups (default: {BACKUP_DIR}/ beside the database)')
+    parser.add_argument('--retention', type=_retention, default=DEFAULT_RETENTION, help='Number of backups to keep')
+    parser.add_argument('--interval', type=float, default=3600, help='Seconds between periodic backups')
+    args = parser.parse_args(argv)
+
+    if args.command == 'backup':
+        print(f"✅ Backup written to {create_backup(args.backup_dir, args.db, args.retention)}")
+    elif args.command == 'periodic':
+        try:
+            run_periodic(args.interval, args.backup_dir, args.db, args.retention)
+        except KeyboardInterrupt:
+            print("Stopped periodic backups")
+    elif args.command == 'list':
+        for path in list_backups(args.backup_dir or default_backup_dir(args.db), backup_name(args.db)):
+            print(f"{path}  ({os.path.getsize(path):,} bytes)")
+    elif not args.path:
+        parser.error(f'{args.command} needs a path')
+    elif args.command == 'restore':
+        restore_backup(args.path, args.db)
+        print(f"✅ Restored {args.path} into {get_db_path(args.db)}")
+    else:
+        backup_database(args.path, args.db)
+        os.chmod(args.path, 0o444)
+        print(f"✅ Read-only snapshot written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
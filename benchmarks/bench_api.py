@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Load test for the movies API.
+
+Starts the API in-process on a scratch copy of the seeded database (or
+targets a running instance with --url), then N client threads issue
+requests over keep-alive connections for a fixed duration. Reports
+requests/sec and p50/p99 latency. With --revalidate, clients send the
+ETag they got back, measuring the 304 path.
+
+    python benchmarks/bench_api.py --clients 8 --duration 10
+    python benchmarks/bench_api.py --url http://127.0.0.1:8080 --revalidate
+"""
+
+import argparse
+import http.client
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_config import connect
+from movies_api import MoviesAPI, make_server
+from schema_migrations import migrate
+
+PATHS = [
+    '/movies/top?n=10',
+    '/movies?page=1&per_page=50',
+    '/movies?page=3&per_page=50',
+    '/movies/year/2019',
+    '/movies/search?q=Movie%201',
+]
+
+
+def seed_database(path, rows):
+    connection = connect(path)
+    migrate(connection)
+    connection.executemany(
+        'INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)',
+        ((f'Movie {i}', 1_000_000_000 + i * 997, 1990 + i % 35) for i in range(rows))
+    )
+    connection.commit()
+    connection.close()
+
+
+def run_client(host, port, args, stop, latencies, statuses):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    etags = {}
+    rng = random.Random()
+    while not stop.is_set():
+        path = rng.choice(PATHS)
+        headers = {'Accept-Encoding': 'gzip'} if args.gzip else {}
+        if args.revalidate and path in etags:
+            headers['If-None-Match'] = etags[path]
+        start = time.perf_counter()
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+    connection.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the movies API')
+    parser.add_argument('--url', default=None, help='Running instance to test (default: start one in-process)')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=8, help='Server worker threads (in-process only)')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run')
+    parser.add_argument('--rows', type=int, default=10_000, help='Movies to seed (in-process only)')
+    parser.add_argument('--gzip', action='store_true', help='Send Accept-Encoding: gzip')
+    parser.add_argument('--revalidate', action='store_true', help='Send If-None-Match with the last ETag')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = api = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            db_path = os.path.join(tmp, 'movies.db')
+            seed_database(db_path, args.rows)
+            api = MoviesAPI(db_path)
+            # Each keep-alive client holds a worker, so give every client one
+            server = make_server(api, port=0, workers=max(args.workers, args.clients))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host, port = server.server_address[:2]
+
+        stop = threading.Event()
+        latencies, statuses = [], {}
+        threads = [threading.Thread(target=run_client, args=(host, port, args, stop, latencies, statuses))
+                   for _ in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            api.close()
+
+    print(f"{len(latencies):,} requests from {args.clients} clients in {elapsed:.2f}s "
+          f"= {len(latencies) / elapsed:,.0f} req/s")
+    print(f"  p50 {percentile(latencies, 0.50) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"  statuses: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()
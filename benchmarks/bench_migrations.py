@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Time an in-place upgrade of a large legacy movies database.
+
+Builds a create_movies_table.py-style database with N rows in a temp
+directory and times `schema_migrations.migrate()` on it.
+
+    python benchmarks/bench_migrations.py --rows 2000000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema_migrations import migrate
+
+
+def build_legacy_database(path, rows):
+    """Create a wide legacy movies table with `rows` rows."""
+    connection = sqlite3.connect(path)
+    connection.execute('''
+        CREATE TABLE movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            release_year INTEGER,
+            genre TEXT,
+            director TEXT,
+            box_office REAL
+        )
+    ''')
+    connection.execute('''
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO movies (title, release_year, genre, director, box_office)
+        SELECT 'Movie ' || i, 1950 + i % 75, 'Drama', 'Director ' || (i % 1000), 1000000000.0 + i FROM n
+    ''', (rows,))
+    connection.commit()
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark in-place schema migration')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Rows in the legacy table')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'movies.db')
+        start = time.perf_counter()
+        build_legacy_database(path, args.rows)
+        print(f"Built legacy database with {args.rows:,} rows in {time.perf_counter() - start:.2f}s")
+
+        connection = sqlite3.connect(path)
+        start = time.perf_counter()
+        migrate(connection)
+        elapsed = time.perf_counter() - start
+        connection.close()
+
+        print(f"Migrated {args.rows:,} rows in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
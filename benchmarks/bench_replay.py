@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Concurrent scrape load test against the replay server.
+
+Starts a ReplayServer in-process (or targets one with --url) and runs
+--scrapes fetch-and-parse cycles with --concurrency threads sharing one
+pooled session. Reports scrapes/sec, fetch latency percentiles, parser
+CPU time (thread_time spent in extract_movies) and the outcome of each
+scrape, so retries and fault handling can be compared.
+
+    python benchmarks/bench_replay.py --rows 2000 --scrapes 50 --concurrency 8
+    python benchmarks/bench_replay.py --latency 0.1 --rate-429 0.1 --rate-truncate 0.05
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from replay_server import ReplayServer
+from wikipedia_scraping import extract_movies, fetch_page
+
+
+def scrape_once(session, url, results, lock):
+    started = time.perf_counter()
+    try:
+        response = fetch_page(url, archive=False, session=session)
+    except requests.HTTPError as e:
+        outcome, fetch_seconds, parse_cpu, rows = f'http_{e.response.status_code}', None, 0.0, 0
+    except requests.RequestException as e:
+        outcome, fetch_seconds, parse_cpu, rows = type(e).__name__, None, 0.0, 0
+    else:
+        fetch_seconds = time.perf_counter() - started
+        if response.status_code == 304:
+            outcome, parse_cpu, rows = 'not_modified', 0.0, 0
+        else:
+            cpu_started = time.thread_time()
+            rows = len(extract_movies(response.content))
+            parse_cpu = time.thread_time() - cpu_started
+            outcome = 'ok'
+
+    with lock:
+        results.append((outcome, fetch_seconds, parse_cpu, rows))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run concurrent scrapes against the replay server')
+    parser.add_argument('--url', default=None, help='Page on a running replay server (default: start one)')
+    parser.add_argument('--rows', type=int, default=1000, help='Synthetic rows (in-process server only)')
+    parser.add_argument('--scrapes', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--bandwidth', type=float, default=None)
+    parser.add_argument('--rate-304', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-truncate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    replay = None
+    url = args.url
+    if url is None:
+        replay = ReplayServer(port=0, latency=args.latency, bandwidth=args.bandwidth, rate_304=args.rate_304,
+                              rate_429=args.rate_429, rate_truncate=args.rate_truncate, seed=1).start()
+        url = f'{replay.url}/synthetic/{args.rows}'
+        replay.page(f'/synthetic/{args.rows}')  # build the page before timing starts
+
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=args.concurrency))
+    results, lock = [], threading.Lock()
+
+    # extract_movies prints a line per row; keep that out of the measurement
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for _ in range(args.scrapes):
+                pool.submit(scrape_once, session, url, results, lock)
+        elapsed = time.perf_counter() - started
+
+    session.close()
+    if replay is not None:
+        replay.close()
+
+    outcomes = {}
+    for outcome, _, _, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = [r[1] for r in results if r[1] is not None]
+    parsed = [r for r in results if r[0] == 'ok']
+
+    print(f"{len(results)} scrapes at concurrency {args.concurrency} in {elapsed:.2f}s "
+          f"= {len(results) / elapsed:.1f} scrapes/s")
+    if latencies:
+        print(f"  fetch latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p90 {percentile(latencies, 0.9) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    if parsed:
+        cpu = sum(r[2] for r in parsed)
+        print(f"  parser CPU {cpu:.2f}s total, {cpu / len(parsed) * 1000:.1f} ms per page "
+              f"({parsed[0][3]:,} rows)")
+    print(f"  outcomes: {dict(sorted(outcomes.items()))}")
+
+
+if __name__ == "__main__":
+    main()
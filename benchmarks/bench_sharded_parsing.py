@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark sharded parsing against the sequential extractor.
+
+Generates a synthetic chart with --rows rows, parses it once with
+extract_movies and then with extract_movies_sharded at 1, 2, 4, ... up to
+--max-workers processes (default: the CPU count). Checks every run
+returns the same movies and reports time and speedup over sequential.
+
+    python benchmarks/bench_sharded_parsing.py --rows 200000
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharded_parsing import extract_movies_sharded, scan_rows
+from synthetic_pages import synthetic_page
+from wikipedia_scraping import extract_movies
+
+
+def timed(func, *args, **kwargs):
+    # The extractors print progress; keep that out of the timings
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sequential and sharded parsing')
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    content = synthetic_page(args.rows)
+    print(f"Page: {args.rows:,} rows, {len(content) / 1e6:.1f} MB")
+
+    _, scan_seconds = timed(scan_rows, content)
+    print(f"  pre-scan: {scan_seconds * 1000:.1f} ms")
+
+    expected, sequential = timed(extract_movies, content)
+    print(f"  sequential extract_movies: {sequential:.2f}s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        # Start the pool first so process start-up isn't counted
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(abs, range(workers)))
+            movies, seconds = timed(extract_movies_sharded, content, workers=workers, executor=executor)
+        status = 'ok' if movies == expected else 'MISMATCH'
+        print(f"  sharded, {workers:>2} workers: {seconds:.2f}s  speedup {sequential / seconds:.2f}x  [{status}]")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
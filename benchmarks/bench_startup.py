@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure CLI startup cost with `python -X importtime`.
+
+Runs each command several times in a fresh interpreter and reports the
+median wall time, the total import time and whether the HTTP/HTML stack
+(requests, bs4) was loaded. The legacy baseline imports wikipedia_scraping
+the way the old scripts did, for comparison.
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('requests', 'bs4', 'urllib3')
+
+COMMANDS = {
+    'query --top 5': ['movies_cli.py', 'query', '--top', '5'],
+    'inspect': ['movies_cli.py', 'inspect'],
+    'scrape (import only)': ['-c', 'import wikipedia_scraping, requests, bs4'],
+    'bare interpreter': ['-c', 'pass'],
+}
+
+
+def parse_importtime(stderr):
+    """Return (total import microseconds, set of top-level modules imported)."""
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _cumulative, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        modules.add(name.strip().split('.')[0])
+    return total, modules
+
+
+def measure(args, runs):
+    """Run a command `runs` times, returning (median wall ms, median import ms, heavy modules)."""
+    walls, imports = [], []
+    heavy = set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=REPO_DIR,
+                                capture_output=True, text=True)
+        walls.append((time.perf_counter() - start) * 1000)
+        total_us, modules = parse_importtime(result.stderr)
+        imports.append(total_us / 1000)
+        heavy |= modules.intersection(HEAVY_MODULES)
+    return statistics.median(walls), statistics.median(imports), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup time')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per command')
+    args = parser.parse_args()
+
+    print(f"{'Command':<24} {'Wall (ms)':>10} {'Imports (ms)':>13}  Heavy modules")
+    print("-" * 70)
+    for label, command in COMMANDS.items():
+        wall, imports, heavy = measure(command, args.runs)
+        print(f"{label:<24} {wall:>10.1f} {imports:>13.1f}  {', '.join(sorted(heavy)) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Stress test for the single-writer queue.
+
+N producer threads each submit row batches to one MovieWriter while a
+reader thread keeps querying. Reports sustained rows/sec, the number of
+group commits and how many reads completed during the run. With
+--direct, each producer instead opens its own default connection (the old
+behaviour) so `database is locked` errors can be compared.
+
+    python benchmarks/bench_write_queue.py --producers 8 --batches 500
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schema_migrations import migrate_database
+from write_queue import MOVIES_INSERT, MovieWriter, connect_reader
+
+
+def make_rows(producer, batch, size):
+    return [(f'Movie {producer}-{batch}-{i}', 1_000_000_000 + i, 2000 + i % 25) for i in range(size)]
+
+
+def run_reader(db_path, stop, counts):
+    reader = connect_reader(db_path)
+    while not stop.is_set():
+        reader.execute('SELECT COUNT(*), MAX(worldwide_gross) FROM movies').fetchone()
+        counts['reads'] += 1
+    reader.close()
+
+
+def run_queued(db_path, args):
+    errors = []
+    with MovieWriter(db_path, batch_size=args.group_rows, max_latency=args.max_latency,
+                     rank_changes=args.rank_changes) as writer:
+        def produce(producer):
+            futures = [writer.submit(make_rows(producer, b, args.rows_per_batch)) for b in range(args.batches)]
+            for future in futures:
+                try:
+                    future.result()
+                except sqlite3.Error as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=produce, args=(p,)) for p in range(args.producers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return writer.commits, errors
+
+
+def run_direct(db_path, args):
+    errors = []
+
+    def produce(producer):
+        for b in range(args.batches):
+            connection = sqlite3.connect(db_path, timeout=0)
+            try:
+                connection.executemany(MOVIES_INSERT, make_rows(producer, b, args.rows_per_batch))
+                connection.commit()
+            except sqlite3.Error as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+    threads = [threading.Thread(target=produce, args=(p,)) for p in range(args.producers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return args.producers * args.batches - len(errors), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress test concurrent writers')
+    parser.add_argument('--producers', type=int, default=8)
+    parser.add_argument('--batches', type=int, default=200, help='Batches per producer')
+    parser.add_argument('--rows-per-batch', type=int, default=50)
+    parser.add_argument('--group-rows', type=int, default=2000, help='Rows per group commit')
+    parser.add_argument('--max-latency', type=float, default=0.02, help='Group commit latency bound (s)')
+    parser.add_argument('--direct', action='store_true', help='Use one connection per write instead of the queue')
+    parser.add_argument('--rank-changes', action='store_true',
+                        help='Log rank_changed events on every group commit (re-ranks the whole table)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'movies.db')
+        migrate_database(db_path)
+
+        stop = threading.Event()
+        counts = {'reads': 0}
+        reader = threading.Thread(target=run_reader, args=(db_path, stop, counts))
+        reader.start()
+
+        start = time.perf_counter()
+        commits, errors = (run_direct if args.direct else run_queued)(db_path, args)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reader.join()
+
+        connection = sqlite3.connect(db_path)
+        rows = connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+        events = connection.execute('SELECT COUNT(*) FROM movie_changes').fetchone()[0]
+        connection.close()
+
+    mode = 'direct connections' if args.direct else 'single-writer queue'
+    print(f"{mode}: {args.producers} producers, {rows:,} rows in {elapsed:.2f}s "
+          f"= {rows / elapsed:,.0f} rows/s")
+    print(f"  commits: {commits}, errors: {len(errors)}, concurrent reads: {counts['reads']:,}, "
+          f"change events: {events:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Change feed of movie updates for downstream consumers.
+
+Rather than re-reading the whole `movies` table after each scrape, a
+consumer can tail `movie_changes`: an append-only log of typed events
+with a monotonically increasing `seq`. Triggers on `movies` record
+'inserted', 'gross_changed' and 'removed' events from every write path.
+Ranks are derived from the gross ordering, so writers call
+`record_rank_changes()` at the end of a batch to log 'rank_changed'.
+SQLite commits one writer at a time, so a reader never sees a higher
+`seq` committed before a lower one, and a cursor is just the last `seq`
+processed.
+
+    python change_feed.py tail --consumer search-index --follow
+    python change_feed.py cursors
+"""
+
+import argparse
+import json
+import threading
+from datetime import datetime, timezone
+
+from db_config import connect
+
+EVENT_KINDS = ('inserted', 'gross_changed', 'rank_changed', 'removed')
+CHANGE_COLUMNS = ('seq', 'changed_at', 'kind', 'movie_id', 'title', 'year', 'old_value', 'new_value')
+DEFAULT_BATCH_SIZE = 1000
+
+
+def record_rank_changes(connection, changed_at=None):
+    """
+    Log a 'rank_changed' event for every movie whose chart position moved.
+
+    Compares the current ranks (by gross, ties by id) with the ones stored
+    in `movie_ranks` and updates them. New movies get a rank without an
+    event, since they already have an 'inserted' one. Does nothing on a
+    database without the change feed tables. Returns the number of
+    events; the caller commits.
+    """
+    from schema_migrations import table_exists
+
+    if not table_exists(connection, 'movie_ranks'):
+        return 0
+    changed_at = changed_at or datetime.now(timezone.utc).isoformat()
+
+    logged = connection.execute('''
+        INSERT INTO movie_changes (changed_at, kind, movie_id, title, year, old_value, new_value)
+        SELECT ?, 'rank_changed', ranked.id, ranked.title, ranked.year, movie_ranks.rank, ranked.rank
+        FROM (SELECT id, title, year, ROW_NUMBER() OVER (ORDER BY worldwide_gross DESC, id) AS rank
+              FROM movies) AS ranked
+        JOIN movie_ranks ON movie_ranks.movie_id = ranked.id
+        WHERE movie_ranks.rank != ranked.rank
+        ORDER BY ranked.rank
+    ''', (changed_at,)).rowcount
+    connection.execute('''
+        INSERT INTO movie_ranks (movie_id, rank)
+        SELECT id, ROW_NUMBER() OVER (ORDER BY worldwide_gross DESC, id) FROM movies WHERE true
+        ON CONFLICT(movie_id) DO UPDATE SET rank = excluded.rank WHERE rank != excluded.rank
+    ''')
+    return logged
+
+
+def read_changes(connection, after=0, limit=DEFAULT_BATCH_SIZE):
+    """Return up to `limit` events with a seq greater than `after`, as dictionaries in seq order."""
+    rows = connection.execute(
+        f'SELECT {", ".join(CHANGE_COLUMNS)} FROM movie_changes WHERE seq > ? ORDER BY seq LIMIT ?',
+        (after, limit)
+    ).fetchall()
+    return [dict(zip(CHANGE_COLUMNS, row)) for row in rows]
+
+
+def latest_seq(connection):
+    """Return the seq of the newest event (0 if the log is empty)."""
+    return connection.execute('SELECT COALESCE(MAX(seq), 0) FROM movie_changes').fetchone()[0]
+
+
+def get_cursor(connection, consumer):
+    """Return the last seq a consumer has processed (0 if it hasn't started)."""
+    row = connection.execute('SELECT seq FROM change_cursors WHERE consumer = ?', (consumer,)).fetchone()
+    return row[0] if row else 0
+
+
+def save_cursor(connection, consumer, seq):
+    """Store a consumer's position and commit."""
+    with connection:
+        connection.execute('''
+            INSERT INTO change_cursors (consumer, seq, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(consumer) DO UPDATE SET seq = excluded.seq, updated_at = excluded.updated_at
+        ''', (consumer, seq, datetime.now(timezone.utc).isoformat()))
+
+
+def tail_changes(connection, consumer=None, after=None, batch_size=DEFAULT_BATCH_SIZE,
+                 follow=False, poll_interval=1.0, stop_event=None):
+    """
+    Yield batches (lists) of change events, oldest first.
+
+    Starts after `after`, or after the consumer's stored cursor. With a
+    `consumer` name the cursor is saved when the caller asks for the next
+    batch, i.e. once the previous one has been processed, so a crash
+    replays at most one batch. Stops when the log is drained, unless
+    `follow` is set, in which case it polls every `poll_interval` seconds
+    until `stop_event` is set.
+    """
+    stop_event = stop_event or threading.Event()
+    position = after if after is not None else (get_cursor(connection, consumer) if consumer else 0)
+
+    while not stop_event.is_set():
+        batch = read_changes(connection, position, batch_size)
+        if batch:
+            yield batch
+            position = batch[-1]['seq']
+            if consumer:
+                save_cursor(connection, consumer, position)
+            continue
+        if not follow:
+            return
+        stop_event.wait(poll_interval)
+
+
+def prune_changes(connection, before=None):
+    """
+    Delete events every registered consumer has already processed.
+
+    `before` caps what is deleted (events with seq <= before). With no
+    consumers registered, nothing is deleted unless `before` is given.
+    Returns the number of events deleted.
+    """
+    row = connection.execute('SELECT MIN(seq) FROM change_cursors').fetchone()
+    limits = [value for value in (row[0], before) if value is not None]
+    if not limits:
+        return 0
+    with connection:
+        return connection.execute('DELETE FROM movie_changes WHERE seq <= ?', (min(limits),)).rowcount
+
+
+def main(argv=None):
+    """Tail the change feed as JSON lines, list consumer cursors or prune read events."""
+    parser = argparse.ArgumentParser(description='Read the movie change feed')
+    parser.add_argument('command', choices=['tail', 'cursors', 'prune'])
+    parser.add_argument('--consumer', default=None, help='Consumer name; its cursor is stored in the database')
+    parser.add_argument('--after', type=int, default=None, help='Start after this seq instead of the stored cursor')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--follow', action='store_true', help='Keep polling for new events')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    args = parser.parse_args(argv)
+
+    from schema_migrations import migrate
+
+    connection = connect(args.db)
+    try:
+        migrate(connection)
+        if args.command == 'tail':
+            try:
+                for batch in tail_changes(connection, args.consumer, args.after, args.batch_size,
+                                          args.follow, args.poll_interval):
+                    for event in batch:
+                        print(json.dumps(event), flush=True)
+            except KeyboardInterrupt:
+                pass
+        elif args.command == 'cursors':
+            print(f"latest\t{latest_seq(connection)}")
+            for consumer, seq, updated_at in connection.execute(
+                    'SELECT consumer, seq, updated_at FROM change_cursors ORDER BY consumer'):
+                print(f"{consumer}\t{seq}\t{updated_at}")
+        else:
+            print(f"✅ Pruned {prune_changes(connection, args.after)} change events")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
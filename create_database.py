@@ -1,10 +1,10 @@
-import sqlite3
+from db_config import connect
 
 def create_movies_database():
     """Create a SQLite database file named movies.db with a movies table."""
     
     # Create/connect to the database file
-    conn = sqlite3.connect('movies.db')
+    conn = connect()
     cursor = conn.cursor()
     
     # Create a movies table
@@ -7,13 +7,15 @@ This script creates a comprehensive movies table with various column types.
 import sqlite3
 import os
 
+from db_config import get_db_path
+
 def create_movies_table():
     """
     Create a movies table in the movies.db database with comprehensive columns.
     """
     
     # Database file path
-    db_file = 'movies.db'
+    db_file = get_db_path()
     
     try:
         # Connect to the SQLite database
@@ -0,0 +1,101 @@
+"""
+Where the movies database lives.
+
+Every script used to hard-code the relative path 'movies.db', so tests and
+parallel jobs all shared (and mutated) one file. The location now comes
+from, in order: an explicit path argument, the MOVIES_DB environment
+variable, then 'movies.db'.
+
+Besides a file path, the target may be:
+- ':memory:' for a private in-memory database (only useful where a single
+  connection is passed around),
+- 'memory:<name>' for a named in-memory database shared by every
+  connection in the process while at least one of them stays open,
+- 'temp' for a fresh temp file per process/worker (see `temp_database_path`).
+
+`clone_database` copies a seeded template with the sqlite3 backup API,
+which is how parallel test workers start from a warm dataset instantly.
+
+Local data that belongs to a database (the page archive, the parse cache)
+lives in directories beside it (see `data_dir`), so a test or job using
+its own database never writes into the working directory.
+"""
+
+import os
+import sqlite3
+import tempfile
+
+DB_ENV_VAR = 'MOVIES_DB'
+DEFAULT_DB = 'movies.db'
+
+_temp_paths = {}
+
+
+def worker_id():
+    """Return an id for this test worker or process (pytest-xdist aware)."""
+    return os.environ.get('PYTEST_XDIST_WORKER') or f'pid{os.getpid()}'
+
+
+def temp_database_path(name='movies'):
+    """Return a temp database path unique to this worker, creating its directory."""
+    key = (name, worker_id())
+    if key not in _temp_paths:
+        directory = tempfile.mkdtemp(prefix=f'{name}-{worker_id()}-')
+        _temp_paths[key] = os.path.join(directory, f'{name}.db')
+    return _temp_paths[key]
+
+
+def get_db_path(path=None, default=DEFAULT_DB):
+    """Resolve the database target from the argument, MOVIES_DB, or the default."""
+    target = path or os.environ.get(DB_ENV_VAR) or default
+    if target == 'temp':
+        return temp_database_path()
+    return target
+
+
+def data_dir(name, path=None):
+    """
+    Return the path of the `name` directory beside the resolved database.
+
+    In-memory targets have no directory of their own, so theirs is
+    placed next to this worker's temp database instead.
+    """
+    target = get_db_path(path)
+    if target == ':memory:' or target.startswith(('memory:', 'file:')):
+        return os.path.join(os.path.dirname(temp_database_path()), name)
+    return os.path.join(os.path.dirname(target), name)
+
+
+def connect(path=None, **kwargs):
+    """Open a connection to the resolved database target."""
+    target = get_db_path(path)
+    if target.startswith('memory:'):
+        target = f'file:{target[len("memory:"):]}?mode=memory&cache=shared'
+    if target.startswith('file:'):
+        kwargs['uri'] = True
+    return sqlite3.connect(target, **kwargs)
+
+
+def connect_read_only(path=None, **kwargs):
+    """Open a read-only connection (shared in-memory targets are opened normally)."""
+    target = get_db_path(path)
+    if target == ':memory:' or target.startswith(('memory:', 'file:')):
+        return connect(target, **kwargs)
+    return sqlite3.connect(f'file:{target}?mode=ro', uri=True, **kwargs)
+
+
+def clone_database(source, target=':memory:', pages=-1):
+    """
+    Copy a database with the sqlite3 backup API and return a connection to the copy.
+
+    `source` and `target` may be paths/targets or open connections. Copying
+    a small seeded template this way is much faster than recreating it.
+    """
+    source_connection = source if isinstance(source, sqlite3.Connection) else connect(source)
+    target_connection = target if isinstance(target, sqlite3.Connection) else connect(target)
+    try:
+        source_connection.backup(target_connection, pages=pages)
+    finally:
+        if source_connection is not source:
+            source_connection.close()
+    return target_connection
@@ -1,8 +1,8 @@
-import requests
-from bs4 import BeautifulSoup
-
 def debug_wikipedia_page():
     """Debug the Wikipedia page structure to understand the layout."""
+    import requests
+    from bs4 import BeautifulSoup
+    
     try:
         url = 'https://en.wikipedia.org/wiki/List_of_highest-grossing_films'
         headers = {
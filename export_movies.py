@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Stream the movies table (and any history tables) out of movies.db in a
+columnar format for the warehouse loader.
+
+Rows are read in bounded `fetchmany` batches and written batch by batch, so
+memory use stays flat regardless of table size. Parquet and Arrow IPC need
+pyarrow; CSV works with the standard library alone.
+
+The incremental mode remembers a high-water mark per table and target
+format and only exports rows past it. For most tables that is the last
+exported rowid, kept in an `export_state` table, which only catches new
+rows. When the database has the change feed, `movies` is followed by
+change seq instead, under the change feed consumer 'export:<format>' so
+`change_feed.prune_changes` keeps the events it hasn't read. Rows
+inserted or whose gross changed since the last export are written (with
+their current values). If the events past the mark were pruned anyway,
+every movie is written again. Removed movies, and title or year edits
+that leave the gross alone, are not in the incremental files; run a full
+export to pick those up.
+"""
+
+import argparse
+import csv
+import os
+from datetime import datetime, timezone
+
+from db_config import connect
+from schema_migrations import table_exists
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow', 'csv': 'csv'}
+DEFAULT_BATCH_SIZE = 10_000
+
+# Columns that always fit in 16 bits, so we can give the warehouse a narrower type
+SMALL_INT_COLUMNS = {'year', 'peak'}
+# Ranks grow with the row count, which can pass 32767, so they get 32 bits
+RANK_COLUMNS = {'rank', 'adjusted_rank'}
+
+
+def find_export_tables(connection):
+    """Return the movies table followed by any history tables in the database."""
+    cursor = connection.execute('''
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND (name = 'movies' OR name LIKE '%history%')
+        ORDER BY name = 'movies' DESC, name
+    ''')
+    return [row[0] for row in cursor.fetchall()]
+
+
+def table_columns(connection, table):
+    """Return a list of (column name, declared type) for a table."""
+    cursor = connection.execute(f'PRAGMA table_info("{table}")')
+    return [(col[1], (col[2] or '').upper()) for col in cursor.fetchall()]
+
+
+def arrow_schema(columns):
+    """Build a pyarrow schema from the SQLite column declarations."""
+    import pyarrow as pa
+
+    fields = []
+    for name, declared in columns:
+        if 'INT' in declared:
+            if name in SMALL_INT_COLUMNS:
+                arrow_type = pa.int16()
+            elif name in RANK_COLUMNS:
+                arrow_type = pa.int32()
+            else:
+                arrow_type = pa.int64()
+        elif any(word in declared for word in ('REAL', 'FLOA', 'DOUB')):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def iter_batches(connection, table, columns, after_rowid=0, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield (last rowid, rows) batches from a table in rowid order.
+
+    Only `batch_size` rows are ever held in memory at once.
+    """
+    column_list = ', '.join(f'"{name}"' for name, _ in columns)
+    cursor = connection.execute(
+        f'SELECT rowid, {column_list} FROM "{table}" WHERE rowid > ? ORDER BY rowid',
+        (after_rowid,)
+    )
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows[-1][0], [row[1:] for row in rows]
+
+
+def iter_changed_batches(connection, columns, after_seq, upto_seq, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield (upto_seq, rows) batches of the movies inserted or re-grossed in
+    the change feed after `after_seq`, up to and including `upto_seq`.
+    """
+    column_list = ', '.join(f'"{name}"' for name, _ in columns)
+    cursor = connection.execute(f'''
+        SELECT {column_list} FROM movies
+        WHERE id IN (SELECT movie_id FROM movie_changes
+                     WHERE seq > ? AND seq <= ? AND kind IN ('inserted', 'gross_changed'))
+        ORDER BY rowid
+    ''', (after_seq, upto_seq))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield upto_seq, rows
+
+
+class _CsvWriter:
+    """Streaming CSV writer with the same interface as the Arrow writers."""
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ArrowWriter:
+    """Batch writer for Parquet files and Arrow IPC files."""
+
+    def __init__(self, path, columns, fmt):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.schema = arrow_schema(columns)
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def write_rows(self, rows):
+        arrays = [
+            self.pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), self.schema)
+        ]
+        batch = self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if hasattr(self.writer, 'write_batch'):
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write_table(self.pa.Table.from_batches([batch]))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, columns, fmt):
+    """Open a streaming writer for the requested format."""
+    if fmt == 'csv':
+        return _CsvWriter(path, columns)
+    return _ArrowWriter(path, columns, fmt)
+
+
+def _ensure_state_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS export_state (
+            table_name TEXT NOT NULL,
+            target TEXT NOT NULL,
+            last_rowid INTEGER NOT NULL,
+            exported_at TEXT NOT NULL,
+            PRIMARY KEY (table_name, target)
+        )
+    ''')
+
+
+def last_exported_rowid(connection, table, target):
+    """Return the last rowid exported for a table and target, or 0."""
+    _ensure_state_table(connection)
+    row = connection.execute(
+        'SELECT last_rowid FROM export_state WHERE table_name = ? AND target = ?',
+        (table, target)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def change_feed_bounds(connection):
+    """
+    Return (oldest seq still in the change feed, newest seq ever logged).
+
+    The newest seq comes from the AUTOINCREMENT counter, so it survives
+    pruning the whole log; an empty log reports newest + 1 as its oldest.
+    """
+    row = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'movie_changes'").fetchone()
+    newest = row[0] if row else 0
+    oldest = connection.execute('SELECT MIN(seq) FROM movie_changes').fetchone()[0]
+    return (newest + 1 if oldest is None else oldest), newest
+
+
+def export_table(connection, table, output_dir, fmt='csv', incremental=False,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Export one table to `output_dir` in the given format.
+
+    Returns (path, number of rows written). In incremental mode only rows
+    added (or, for movies with a change feed, changed) since the previous
+    incremental export are written, and the high-water mark (or change
+    feed cursor) is saved afterwards.
+    """
+    columns = table_columns(connection, table)
+    follow_changes = incremental and table == 'movies' and table_exists(connection, 'movie_changes')
+
+    if follow_changes:
+        from change_feed import get_cursor
+
+        # Rowids miss rows updated in place, so follow the change feed instead
+        consumer = f'export:{fmt}'
+        start = get_cursor(connection, consumer)
+        oldest, newest = change_feed_bounds(connection)
+        name = f'{table}.since-seq-{start}'
+        if oldest > start + 1:
+            # Events we haven't read were pruned, so the changed rows are unknown: write them all
+            batches = iter_batches(connection, table, columns, 0, batch_size)
+        else:
+            batches = iter_changed_batches(connection, columns, start, newest, batch_size)
+    else:
+        start = last_exported_rowid(connection, table, fmt) if incremental else 0
+        name = f'{table}.since-{start}' if incremental else table
+        last_mark = start
+        batches = iter_batches(connection, table, columns, start, batch_size)
+    path = os.path.join(output_dir, f'{name}.{FORMATS[fmt]}')
+
+    writer = open_writer(path, columns, fmt)
+    count = 0
+    try:
+        for last_mark, rows in batches:
+            writer.write_rows(rows)
+            count += len(rows)
+    finally:
+        writer.close()
+
+    if follow_changes:
+        from change_feed import save_cursor
+
+        save_cursor(connection, consumer, newest)
+    elif incremental:
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO export_state (table_name, target, last_rowid, exported_at) VALUES (?, ?, ?, ?)',
+                (table, fmt, last_mark, datetime.now(timezone.utc).isoformat())
+            )
+
+    return path, count
+
+
+def export_database(db_path=None, output_dir='export', fmt='csv', incremental=False,
+                    batch_size=DEFAULT_BATCH_SIZE, tables=None):
+    """Export the movies and history tables, returning a list of (table, path, rows)."""
+    os.makedirs(output_dir, exist_ok=True)
+    connection = connect(db_path)
+    try:
+        results = []
+        for table in tables or find_export_tables(connection):
+            path, count = export_table(connection, table, output_dir, fmt, incremental, batch_size)
+            results.append((table, path, count))
+        return results
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    """Run an export from the command line."""
+    parser = argparse.ArgumentParser(description='Export movies.db tables in a columnar format')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    parser.add_argument('--output-dir', default='export', help='Directory to write export files to')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='parquet', help='Output format')
+    parser.add_argument('--since-last', action='store_true', help='Only export rows added (or changed, for movies) since the last export')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows fetched per batch')
+    parser.add_argument('--table', action='append', dest='tables', help='Table to export (repeatable)')
+    args = parser.parse_args(argv)
+
+    try:
+        results = export_database(args.db, args.output_dir, args.format, args.since_last,
+                                  args.batch_size, args.tables)
+    except ImportError:
+        print(f"❌ The {args.format} format needs pyarrow; install it or use --format csv")
+        return
+
+    for table, path, count in results:
+        print(f"✅ {table}: {count} rows -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Locale profiles for scraping the highest-grossing films chart from
+different language editions of Wikipedia.
+
+The English scraper assumes US number formatting and fixed column
+positions. Other editions write "2.923.706.026 $", "2 923 706 026 $" or
+"2,92 Mrd. US-$" and order their columns differently. A profile says how
+one edition formats numbers and what its headers are called, so columns
+can be found by header text instead of by index.
+"""
+
+import re
+import unicodedata
+
+PROFILES = {
+    'en': {
+        'url': 'https://en.wikipedia.org/wiki/List_of_highest-grossing_films',
+        'decimal': '.',
+        'headers': {
+            'title': ['title', 'film'],
+            'gross': ['worldwide gross', 'gross'],
+            'year': ['year'],
+            'rank': ['rank'],
+        },
+    },
+    'de': {
+        'url': 'https://de.wikipedia.org/wiki/Liste_der_erfolgreichsten_Filme_nach_Einspielergebnis',
+        'decimal': ',',
+        'headers': {
+            'title': ['titel', 'film', 'filmtitel'],
+            'gross': ['einspielergebnis', 'weltweites einspielergebnis', 'einnahmen'],
+            'year': ['jahr', 'erscheinungsjahr'],
+            'rank': ['rang', 'platz'],
+        },
+    },
+    'fr': {
+        'url': 'https://fr.wikipedia.org/wiki/Liste_des_plus_gros_succès_du_box-office_mondial',
+        'decimal': ',',
+        'headers': {
+            'title': ['titre', 'film'],
+            'gross': ['recettes mondiales', 'recettes', 'box-office mondial', 'box-office'],
+            'year': ['année', 'annee', 'sortie'],
+            'rank': ['rang'],
+        },
+    },
+    'es': {
+        'url': 'https://es.wikipedia.org/wiki/Anexo:Películas_con_las_mayores_recaudaciones',
+        'decimal': ',',
+        'headers': {
+            'title': ['título', 'titulo', 'película', 'pelicula'],
+            'gross': ['recaudación mundial', 'recaudación', 'recaudacion', 'taquilla'],
+            'year': ['año', 'ano'],
+            'rank': ['puesto', 'posición', 'pos.'],
+        },
+    },
+    'it': {
+        'url': 'https://it.wikipedia.org/wiki/Film_con_maggiori_incassi_nella_storia_del_cinema',
+        'decimal': ',',
+        'headers': {
+            'title': ['titolo', 'film'],
+            'gross': ['incasso mondiale', 'incasso'],
+            'year': ['anno'],
+            'rank': ['posizione', 'pos.'],
+        },
+    },
+}
+
+# Words that scale a number, e.g. "2,92 Mrd." or "2.9 billion"
+SCALE_WORDS = {
+    'billion': 1_000_000_000,
+    'bn': 1_000_000_000,
+    'mrd': 1_000_000_000,
+    'milliarde': 1_000_000_000,
+    'milliarden': 1_000_000_000,
+    'milliard': 1_000_000_000,
+    'milliards': 1_000_000_000,
+    'miliardi': 1_000_000_000,
+    'miliardo': 1_000_000_000,
+    'mil millones': 1_000_000_000,
+    'million': 1_000_000,
+    'millions': 1_000_000,
+    'mio': 1_000_000,
+    'millionen': 1_000_000,
+    'milioni': 1_000_000,
+    'millones': 1_000_000,
+}
+
+_FOOTNOTE = re.compile(r'\[[^\]]*\]')
+_NUMBER = re.compile(r"\d[\d.,\s']*")
+_YEAR = re.compile(r'\b(18|19|20)\d{2}\b')
+_SCALE = re.compile(r'(' + '|'.join(sorted(map(re.escape, SCALE_WORDS), key=len, reverse=True)) + r')\b',
+                    re.IGNORECASE)
+
+
+def get_profile(lang):
+    """Return the profile for a language code, raising KeyError for unknown ones."""
+    return PROFILES[lang]
+
+
+def normalize_header(text):
+    """Lower-case a header, drop footnote markers and collapse whitespace."""
+    text = _FOOTNOTE.sub('', text)
+    text = unicodedata.normalize('NFC', text).casefold()
+    return ' '.join(text.split())
+
+
+def map_columns(header_texts, profile):
+    """
+    Map field names to column indexes by matching header text.
+
+    An exact alias match wins over a prefix match, so "Worldwide gross"
+    is preferred over some other column that merely starts with "gross".
+    """
+    headers = [normalize_header(text) for text in header_texts]
+    columns = {}
+    for field, aliases in profile['headers'].items():
+        for matcher in (lambda h, a: h == a, lambda h, a: h.startswith(a)):
+            index = next((i for i, h in enumerate(headers)
+                          if i not in columns.values() and any(matcher(h, a) for a in aliases)), None)
+            if index is not None:
+                columns[field] = index
+                break
+    return columns
+
+
+def parse_amount(text, profile):
+    """
+    Parse a gross amount written in the profile's number format.
+
+    Plain amounts ("$2,923,706,026", "2.923.706.026 $", "2 923 706 026 $")
+    are whole numbers, so every separator is a thousands separator. Amounts
+    with a scale word ("2,92 Mrd.", "2.92 billion") use the profile's
+    decimal separator. Returns an int, or None if no number is found.
+    """
+    text = _FOOTNOTE.sub('', text)
+    match = _NUMBER.search(text)
+    if not match:
+        return None
+    number = match.group().strip()
+
+    scale_match = _SCALE.match(text[match.end():].lstrip(' .\u00a0\u202f'))
+    if not scale_match:
+        digits = re.sub(r'\D', '', number)
+        return int(digits) if digits else None
+
+    whole, separator, fraction = number.rpartition(profile['decimal'])
+    if not separator:
+        whole, fraction = number, ''
+    whole = re.sub(r'\D', '', whole) or '0'
+    fraction = re.sub(r'\D', '', fraction) or '0'
+    return int(round(float(f'{whole}.{fraction}') * SCALE_WORDS[scale_match.group(1).lower()]))
+
+
+def parse_year(text):
+    """Return the first plausible four-digit year in the text as a string, or None."""
+    match = _YEAR.search(_FOOTNOTE.sub('', text))
+    return match.group() if match else None
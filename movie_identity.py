@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Stable identities for movies, keyed by their Wikipedia article.
+
+A scraped title changes whenever a footnote marker or a rename slips in,
+so matching rows by title makes upserts, history joins and enrichment
+unreliable. The title cell's link doesn't change: `article_key()` turns
+'/wiki/Avatar_(2009_film)' into 'Avatar_(2009_film)', and that key is
+stored once in `movie_identities` (unique, indexed) with an integer id.
+Every title a film has been seen under is kept in `movie_aliases`, and
+`movie_history.identity_id` lets history be joined on an integer.
+
+    python movie_identity.py resolve       # fill page ids from the API
+    python movie_identity.py backfill      # link old history rows by alias
+    python movie_identity.py show Avatar
+"""
+
+import argparse
+from datetime import datetime, timezone
+
+from db_config import connect
+
+MOVIES_INSERT = 'INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)'
+
+
+def save_identified(connection, movies, replace=False, seen_at=None):
+    """
+    Upsert movies by article key instead of inserting duplicates.
+
+    A movie whose key is already known updates its existing row (so its
+    id stays the same); new keys insert a row and an identity. Movies
+    without a key are inserted as before. With `replace=True`, rows not
+    in this batch are deleted. Returns the movie ids in input order; the
+    caller commits.
+    """
+    seen_at = seen_at or datetime.now(timezone.utc).isoformat()
+    movie_ids = []
+
+    for movie in movies:
+        params = (movie['title'], movie['worldwide_gross'], int(movie['year']))
+        key = movie.get('article_key')
+        if not key:
+            movie_ids.append(connection.execute(MOVIES_INSERT, params).lastrowid)
+            continue
+
+        identity_id, movie_id = connection.execute('''
+            INSERT INTO movie_identities (article_key, page_id, first_seen, last_seen)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(article_key) DO UPDATE SET
+                last_seen = excluded.last_seen,
+                page_id = COALESCE(movie_identities.page_id, excluded.page_id)
+            RETURNING id, movie_id
+        ''', (key, movie.get('page_id'), seen_at, seen_at)).fetchone()
+
+        updated = movie_id is not None and connection.execute(
+            'UPDATE movies SET title = ?, worldwide_gross = ?, year = ? WHERE id = ?', params + (movie_id,)
+        ).rowcount
+        if not updated:
+            movie_id = connection.execute(MOVIES_INSERT, params).lastrowid
+            connection.execute('UPDATE movie_identities SET movie_id = ? WHERE id = ?', (movie_id, identity_id))
+
+        connection.execute('''
+            INSERT INTO movie_aliases (identity_id, title, first_seen, last_seen) VALUES (?, ?, ?, ?)
+            ON CONFLICT(identity_id, title) DO UPDATE SET last_seen = excluded.last_seen
+        ''', (identity_id, movie['title'], seen_at, seen_at))
+        movie_ids.append(movie_id)
+
+    if replace:
+        connection.execute('CREATE TEMP TABLE IF NOT EXISTS batch_movie_ids (id INTEGER PRIMARY KEY)')
+        connection.execute('DELETE FROM batch_movie_ids')
+        connection.executemany('INSERT OR IGNORE INTO batch_movie_ids (id) VALUES (?)', ((i,) for i in movie_ids))
+        connection.execute('DELETE FROM movies WHERE id NOT IN (SELECT id FROM batch_movie_ids)')
+        connection.execute('''
+            UPDATE movie_identities SET movie_id = NULL
+            WHERE movie_id IS NOT NULL AND movie_id NOT IN (SELECT id FROM batch_movie_ids)
+        ''')
+
+    return movie_ids
+
+
+def identity_for(connection, article_key):
+    """Return (identity id, movie id) for an article key, or None."""
+    return connection.execute(
+        'SELECT id, movie_id FROM movie_identities WHERE article_key = ?', (article_key,)
+    ).fetchone()
+
+
+def identities_for_title(connection, title):
+    """Return the identity ids that have ever been seen under a title."""
+    return [row[0] for row in connection.execute(
+        'SELECT identity_id FROM movie_aliases WHERE title = ? ORDER BY identity_id', (title,)
+    )]
+
+
+def backfill_history(connection):
+    """
+    Set identity_id on history rows recorded before identities existed.
+
+    Rows are linked through movie_aliases; titles that belong to more than
+    one identity (e.g. two films both called "The Lion King") are left
+    alone. Returns the number of rows linked.
+    """
+    with connection:
+        return connection.execute('''
+            UPDATE movie_history SET identity_id = (
+                SELECT identity_id FROM movie_aliases WHERE movie_aliases.title = movie_history.title
+            )
+            WHERE identity_id IS NULL
+              AND title IN (SELECT title FROM movie_aliases GROUP BY title HAVING COUNT(*) = 1)
+        ''').rowcount
+
+
+def resolve_page_ids(connection, session=None, lang='en'):
+    """Fill in missing page ids from the Wikipedia API. Returns the number updated."""
+    import requests
+
+    from locale_profiles import get_profile
+    from multiwiki_scraping import lookup_pages
+
+    keys = [row[0] for row in connection.execute('SELECT article_key FROM movie_identities WHERE page_id IS NULL')]
+    if not keys:
+        return 0
+
+    own_session = session is None
+    session = session or requests.Session()
+    try:
+        pages = lookup_pages(session, get_profile(lang), keys)
+    finally:
+        if own_session:
+            session.close()
+
+    with connection:
+        # Two keys can redirect to the same page; the first one keeps the page id
+        return sum(connection.execute(
+            'UPDATE OR IGNORE movie_identities SET page_id = ? WHERE article_key = ?', (page_id, key)
+        ).rowcount for key, (page_id, _) in pages.items())
+
+
+def main(argv=None):
+    """Resolve page ids, backfill history links or show a film's identity."""
+    parser = argparse.ArgumentParser(description='Manage stable movie identities')
+    parser.add_argument('command', choices=['resolve', 'backfill', 'show'])
+    parser.add_argument('title', nargs='?', help='Title to look up (for show)')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    args = parser.parse_args(argv)
+
+    from schema_migrations import migrate
+
+    connection = connect(args.db)
+    try:
+        migrate(connection)
+        if args.command == 'resolve':
+            print(f"✅ Resolved {resolve_page_ids(connection)} page ids")
+        elif args.command == 'backfill':
+            print(f"✅ Linked {backfill_history(connection)} history rows to identities")
+        elif not args.title:
+            parser.error('show needs a title')
+        else:
+            for identity_id in identities_for_title(connection, args.title):
+                key, page_id, movie_id = connection.execute(
+                    'SELECT article_key, page_id, movie_id FROM movie_identities WHERE id = ?', (identity_id,)
+                ).fetchone()
+                aliases = [row[0] for row in connection.execute(
+                    'SELECT title FROM movie_aliases WHERE identity_id = ? ORDER BY first_seen', (identity_id,))]
+                print(f"{identity_id}\t{key}\tpage {page_id}\tmovie {movie_id}\taliases: {', '.join(aliases)}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Read-only HTTP JSON API over movies.db.
+
+Internal consumers used to open movies.db directly or shell out to
+movies_table_manager.py. This serves the same data over HTTP:
+
+    GET /movies?page=1&per_page=50      all movies, highest gross first
+    GET /movies/top?n=10                top N by worldwide gross
+    GET /movies/year/2019               movies released in a year
+    GET /movies/search?q=avengers       title search (paginated)
+    GET /movies/history?title=Avatar    gross over time from movie_history
+    GET /movies/history?key=Avatar_(2009_film)   the same, by article key
+    GET /health
+
+Requests are handled by a fixed pool of worker threads, each keeping its
+own read-only connection. Every response carries a strong ETag built
+from a fingerprint of the data and the request. The fingerprint is
+hashed inside the same read snapshot as the body, and each worker only
+rehashes when `PRAGMA data_version` says another connection has
+committed. A matching If-None-Match gets a 304 without running the
+query. Clients that accept gzip get compressed bodies.
+
+    python movies_api.py --port 8080
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from write_queue import connect_reader
+
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+GZIP_MIN_BYTES = 512
+
+MOVIE_COLUMNS = 'id, title, worldwide_gross, year'
+
+
+class BadRequest(ValueError):
+    """Raised for query parameters the API can't use."""
+
+
+def _int_param(query, name, default, minimum=1, maximum=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise BadRequest(f"'{name}' must be between {minimum} and {maximum or 'infinity'}")
+    return value
+
+
+def _text_param(query, name):
+    values = query.get(name)
+    if not values or not values[0].strip():
+        raise BadRequest(f"'{name}' is required")
+    return values[0].strip()
+
+
+def _movies(cursor):
+    return [{'id': row[0], 'title': row[1], 'worldwide_gross': row[2], 'year': row[3]} for row in cursor]
+
+
+def data_fingerprint(connection):
+    """
+    Hash everything the endpoints read.
+
+    movies and movie_identities are hashed in full; movie_history is
+    append-only, so its row count and highest id identify its contents.
+    """
+    digest = hashlib.sha256()
+    for row in connection.execute(f'SELECT {MOVIE_COLUMNS} FROM movies ORDER BY id'):
+        digest.update(repr(row).encode())
+    try:
+        digest.update(repr(connection.execute('SELECT COUNT(*), MAX(id) FROM movie_history').fetchone()).encode())
+    except sqlite3.OperationalError:
+        pass  # databases that predate the refresh daemon have no history table
+    try:
+        for row in connection.execute('SELECT id, article_key, page_id, movie_id FROM movie_identities ORDER BY id'):
+            digest.update(repr(row).encode())
+    except sqlite3.OperationalError:
+        pass  # nor an identity table before the identity migration
+    return digest.hexdigest()
+
+
+class MoviesAPI:
+    """Answers API paths from per-thread read-only connections."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def _reader(self):
+        """Return this thread's connection state, opening it on first use."""
+        state = getattr(self.local, 'state', None)
+        if state is None:
+            connection = connect_reader(self.db_path)
+            connection.isolation_level = None
+            state = self.local.state = {'connection': connection, 'data_version': None, 'fingerprint': None}
+            with self.lock:
+                self.connections.append(connection)
+        return state
+
+    def fingerprint(self, state):
+        """
+        Return a hash of the data, recomputed only after another connection commits.
+
+        Call it inside the request's read transaction. The hash is taken on
+        the worker's own connection, so it describes exactly the snapshot
+        the body is read from; a hash from any other connection could
+        include a commit the body doesn't.
+        """
+        connection = state['connection']
+        data_version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != state['data_version'] or state['fingerprint'] is None:
+            state['data_version'] = data_version
+            state['fingerprint'] = data_fingerprint(connection)
+        return state['fingerprint']
+
+    def etag(self, fingerprint, target, encoding=None):
+        """Build the strong ETag for one representation of one request."""
+        tag = hashlib.sha256(f'{fingerprint}\0{target}'.encode()).hexdigest()[:24]
+        return f'"{tag}-gz"' if encoding == 'gzip' else f'"{tag}"'
+
+    def handle(self, target, if_none_match=None, accept_gzip=False):
+        """
+        Answer a request target such as '/movies/top?n=5'.
+
+        Returns (status, headers, body bytes). All reads for one request run
+        in a single read transaction, so the ETag and body always match.
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        query = parse_qs(url.query)
+
+        if path == '/health':
+            return self._json(200, {'status': 'ok'})
+
+        state = self._reader()
+        connection = state['connection']
+        connection.execute('BEGIN')
+        try:
+            # BEGIN is deferred; read now so the data_version check, the hash and the body share one snapshot
+            connection.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+            fingerprint = self.fingerprint(state)
+            # Small bodies go out uncompressed under the plain tag, so a gzip client may hold either
+            etags = {self.etag(fingerprint, target)}
+            if accept_gzip:
+                etags.add(self.etag(fingerprint, target, 'gzip'))
+            if if_none_match:
+                for tag in if_none_match.split(','):
+                    if tag.strip() in etags:
+                        return 304, {'ETag': tag.strip()}, b''
+            payload = self.query(connection, path, query)
+        except BadRequest as e:
+            return self._json(400, {'error': str(e)})
+        except LookupError:
+            return self._json(404, {'error': f'No such endpoint: {path}'})
+        except sqlite3.Error as e:
+            return self._json(500, {'error': f'Database error: {e}'})
+        finally:
+            connection.execute('COMMIT')
+
+        status, headers, body = self._json(200, payload)
+        headers['Cache-Control'] = 'no-cache'
+        if accept_gzip and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+            headers['ETag'] = self.etag(fingerprint, target, 'gzip')
+        else:
+            headers['ETag'] = self.etag(fingerprint, target)
+        return status, headers, body
+
+    def query(self, connection, path, query):
+        """Run the query for an endpoint and return the JSON-ready payload."""
+        parts = path.strip('/').split('/')
+        if parts[0] != 'movies':
+            raise LookupError(path)
+
+        if len(parts) == 1:
+            return self._page(connection, query, '', ())
+        if parts[1] == 'top' and len(parts) == 2:
+            n = _int_param(query, 'n', 10, maximum=MAX_PER_PAGE)
+            cursor = connection.execute(
+                f'SELECT {MOVIE_COLUMNS} FROM movies ORDER BY worldwide_gross DESC, id LIMIT ?', (n,))
+            return {'movies': _movies(cursor)}
+        if parts[1] == 'year' and len(parts) == 3:
+            if not parts[2].isdigit():
+                raise BadRequest('year must be a number')
+            return self._page(connection, query, 'WHERE year = ?', (int(parts[2]),))
+        if parts[1] == 'search' and len(parts) == 2:
+            return self._page(connection, query, 'WHERE title LIKE ?', (f"%{_text_param(query, 'q')}%",))
+        if parts[1] == 'history' and len(parts) == 2:
+            if query.get('key'):
+                # Follows the film across renames via its identity
+                key = _text_param(query, 'key')
+                cursor = connection.execute('''
+                    SELECT h.observed_at, h.worldwide_gross, h.year FROM movie_history h
+                    JOIN movie_identities i ON i.id = h.identity_id
+                    WHERE i.article_key = ? ORDER BY h.observed_at
+                ''', (key,))
+                label = {'article_key': key}
+            else:
+                title = _text_param(query, 'title')
+                cursor = connection.execute(
+                    'SELECT observed_at, worldwide_gross, year FROM movie_history WHERE title = ? ORDER BY observed_at',
+                    (title,))
+                label = {'title': title}
+            return dict(label, history=[{'observed_at': r[0], 'worldwide_gross': r[1], 'year': r[2]} for r in cursor])
+        raise LookupError(path)
+
+    def _page(self, connection, query, where, params):
+        page = _int_param(query, 'page', 1)
+        per_page = _int_param(query, 'per_page', DEFAULT_PER_PAGE, maximum=MAX_PER_PAGE)
+        total = connection.execute(f'SELECT COUNT(*) FROM movies {where}', params).fetchone()[0]
+        cursor = connection.execute(
+            f'SELECT {MOVIE_COLUMNS} FROM movies {where} ORDER BY worldwide_gross DESC, id LIMIT ? OFFSET ?',
+            params + (per_page, (page - 1) * per_page))
+        return {'page': page, 'per_page': per_page, 'total': total, 'movies': _movies(cursor)}
+
+    def _json(self, status, payload):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        return status, {'Content-Type': 'application/json'}, body
+
+    def close(self):
+        """Close every worker's connection."""
+        with self.lock:
+            for connection in self.connections:
+                connection.close()
+            self.connections.clear()
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands connections to a fixed pool of worker threads."""
+
+    def __init__(self, address, handler_class, workers=DEFAULT_WORKERS):
+        super().__init__(address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='movies-api')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def make_server(api, host='127.0.0.1', port=DEFAULT_PORT, workers=DEFAULT_WORKERS):
+    """Create (but don't start) an HTTP server answering with `api`."""
+
+    class MoviesHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Idle keep-alive connections give their worker back after this many seconds
+        timeout = 5
+        # Headers and body are written separately; without this, Nagle's algorithm
+        # and delayed ACKs add ~40 ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            status, headers, body = api.handle(
+                self.path,
+                if_none_match=self.headers.get('If-None-Match'),
+                accept_gzip='gzip' in self.headers.get('Accept-Encoding', ''),
+            )
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PooledHTTPServer((host, port), MoviesHandler, workers)
+
+
+def main(argv=None):
+    """Serve the movies API until interrupted."""
+    parser = argparse.ArgumentParser(description='Read-only HTTP JSON API over movies.db')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Worker threads (and read connections)')
+    args = parser.parse_args(argv)
+
+    api = MoviesAPI(args.db)
+    server = make_server(api, args.host, args.port, args.workers)
+    host, port = server.server_address[:2]
+    print(f"✅ Serving movies API on http://{host}:{port}/movies")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping movies API")
+    finally:
+        server.server_close()
+        api.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Single command-line entry point for the movies scripts.
+
+    python movies_cli.py scrape
+    python movies_cli.py query --top 10
+    python movies_cli.py inspect
+
+Each subcommand imports what it needs inside its handler, so quick database
+queries start without loading requests, bs4 or the other scraping modules.
+Run benchmarks/bench_startup.py to measure the difference with
+`python -X importtime`.
+"""
+
+import argparse
+import sqlite3
+import sys
+
+
+def cmd_scrape(args):
+    """Scrape Wikipedia and save the movies to the database."""
+    from wikipedia_scraping import WIKIPEDIA_URL, main as scrape_main
+    scrape_main(args.profile, args.url or WIKIPEDIA_URL)
+
+
+def cmd_reset(args):
+    """Upgrade the database in place, or back it up and recreate it empty with --wipe."""
+    from reset_database import main as reset_main
+    reset_main((['--db', args.db] if args.db else []) + (['--wipe'] if args.wipe else []))
+
+
+def cmd_migrate(args):
+    """Upgrade the database schema in place."""
+    from schema_migrations import main as migrate_main
+    migrate_main((['--db', args.db] if args.db else []) + (['--status'] if args.status else []))
+
+
+def cmd_debug(args):
+    """Print the structure of the Wikipedia tables."""
+    from debug_wikipedia import debug_wikipedia_page
+    debug_wikipedia_page()
+
+
+def cmd_inspect(args):
+    """Print every table in the database with its columns and row count."""
+    from db_config import connect, get_db_path
+    
+    connection = connect(args.db)
+    try:
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        if not tables:
+            print(f"❌ No tables in {get_db_path(args.db)}")
+            return 1
+
+        for (table,) in tables:
+            count = connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            columns = connection.execute(f'PRAGMA table_info("{table}")').fetchall()
+            print(f"{table} ({count} rows)")
+            for col in columns:
+                not_null = " NOT NULL" if col[3] else ""
+                primary_key = " PRIMARY KEY" if col[5] else ""
+                print(f"    {col[1]:<20} {col[2]}{not_null}{primary_key}")
+    finally:
+        connection.close()
+    return 0
+
+
+def cmd_query(args):
+    """Run a canned or ad-hoc read-only query and print the rows."""
+    if args.sql:
+        sql, params = args.sql, ()
+    elif args.year is not None:
+        sql = 'SELECT title, worldwide_gross, year FROM movies WHERE year = ? ORDER BY worldwide_gross DESC'
+        params = (args.year,)
+    elif args.search:
+        sql = 'SELECT title, worldwide_gross, year FROM movies WHERE title LIKE ? ORDER BY worldwide_gross DESC'
+        params = (f'%{args.search}%',)
+    else:
+        sql = 'SELECT title, worldwide_gross, year FROM movies ORDER BY worldwide_gross DESC LIMIT ?'
+        params = (args.top,)
+
+    from db_config import connect_read_only
+    
+    connection = connect_read_only(args.db)
+    try:
+        cursor = connection.execute(sql, params)
+        if cursor.description:
+            print('\t'.join(col[0] for col in cursor.description))
+        for row in cursor:
+            print('\t'.join('' if value is None else str(value) for value in row))
+    except sqlite3.Error as e:
+        print(f"❌ SQLite error: {e}")
+        return 1
+    finally:
+        connection.close()
+    return 0
+
+
+# Subcommands whose arguments are handed straight to another module's main()
+PASSTHROUGH = {
+    'inflation': ('inflation', 'Compute inflation-adjusted grosses'),
+    'export': ('export_movies', 'Export tables to Parquet, Arrow or CSV'),
+    'archive': ('page_archive', 'List or re-parse the raw page archive'),
+    'daemon': ('refresh_daemon', 'Run the scheduled refresh daemon'),
+    'backup': ('backup_snapshots', 'Back up, restore or snapshot the database'),
+    'multiwiki': ('multiwiki_scraping', 'Scrape the chart from several language editions'),
+    'api': ('movies_api', 'Serve a read-only HTTP JSON API'),
+    'identity': ('movie_identity', 'Resolve page ids or inspect movie identities'),
+    'shard': ('sharded_parsing', 'Parse a very large saved page in parallel shards'),
+    'changes': ('change_feed', 'Tail the change feed of movie updates'),
+    'diagnostics': ('row_diagnostics', 'List or re-extract rejected and defaulted rows'),
+}
+
+
+def build_parser():
+    """Build the argument parser with all subcommands."""
+    parser = argparse.ArgumentParser(prog='movies_cli.py', description='Movies scraping and database tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape = subparsers.add_parser('scrape', help='Scrape Wikipedia and save to movies.db')
+    scrape.add_argument('--profile', metavar='DIR', default=None,
+                        help='Profile each phase and write the reports to DIR')
+    scrape.add_argument('--url', default=None, help='Page to scrape (default: the English chart)')
+    scrape.set_defaults(func=cmd_scrape)
+    reset_parser = subparsers.add_parser('reset', help='Upgrade movies.db in place, or recreate it empty with --wipe')
+    reset_parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    reset_parser.add_argument('--wipe', action='store_true',
+                              help='Back up, delete and recreate the database instead (loses all data)')
+    reset_parser.set_defaults(func=cmd_reset)
+    subparsers.add_parser('debug', help='Print the structure of the Wikipedia tables').set_defaults(func=cmd_debug)
+
+    migrate_parser = subparsers.add_parser('migrate', help='Upgrade movies.db to the current schema in place')
+    migrate_parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    migrate_parser.add_argument('--status', action='store_true', help='Only print the current version')
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    inspect_parser = subparsers.add_parser('inspect', help='Show tables, columns and row counts')
+    inspect_parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    inspect_parser.set_defaults(func=cmd_inspect)
+
+    query_parser = subparsers.add_parser('query', help='Query the movies table')
+    query_parser.add_argument('sql', nargs='?', help='Ad-hoc SQL to run read-only')
+    query_parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    query_parser.add_argument('--top', type=int, default=10, help='Show the N highest-grossing movies')
+    query_parser.add_argument('--year', type=int, help='Show movies released in a year')
+    query_parser.add_argument('--search', help='Show movies whose title contains this text')
+    query_parser.set_defaults(func=cmd_query)
+
+    for name, (_, help_text) in PASSTHROUGH.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+
+    return parser
+
+
+def main(argv=None):
+    """Parse the command line and dispatch to the subcommand."""
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Pass-through commands are dispatched before parsing so that options
+    # like --help reach the target module's own parser
+    if argv and argv[0] in PASSTHROUGH:
+        import importlib
+        return importlib.import_module(PASSTHROUGH[argv[0]][0]).main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,8 @@ Python script to work with the existing movies table structure using sqlite3 mod
 
 import sqlite3
 
+from db_config import connect
+
 def show_table_info():
     """
     Display information about the existing movies table.
@@ -13,7 +15,7 @@ def show_table_info():
     print("=" * 40)
     
     try:
-        connection = sqlite3.connect('movies.db')
+        connection = connect()
         cursor = connection.cursor()
         
         # Check if table exists
@@ -73,7 +75,7 @@ def insert_sample_movies():
     print("=" * 30)
     
     try:
-        connection = sqlite3.connect('movies.db')
+        connection = connect()
         cursor = connection.cursor()
         
         # Sample movies data matching the existing structure (id, title, year, genre, director, rating, description)
@@ -117,7 +119,7 @@ def demonstrate_queries():
     print("=" * 30)
     
     try:
-        connection = sqlite3.connect('movies.db')
+        connection = connect()
         cursor = connection.cursor()
         
         # Query 1: All movies
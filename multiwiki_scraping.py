@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Scrape the highest-grossing films chart from several language editions
+of Wikipedia and reconcile the films into one table.
+
+Each edition is parsed with its locale profile (see locale_profiles.py),
+so number formats and column order don't matter. All editions are
+fetched concurrently through one pooled `requests.Session`. Films are
+matched across languages by their Wikidata item, which is looked up in
+batches from each edition's API using the title links. Films without a
+Wikidata item fall back to matching on title and year.
+
+    python multiwiki_scraping.py --langs en,de,fr
+"""
+
+import argparse
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from db_config import connect
+from locale_profiles import PROFILES, get_profile, map_columns, parse_amount, parse_year
+from wikipedia_scraping import HEADERS, article_key, fetch_page
+
+WIKIDATA_BATCH_SIZE = 50
+DEFAULT_WORKERS = 4
+
+
+def _clean_title(text):
+    return re.sub(r'\[[^\]]*\]', '', text).strip()
+
+
+def find_chart_table(soup, profile):
+    """Return (rows, column map) for the first wikitable whose headers match the profile."""
+    for table in soup.find_all('table', class_='wikitable'):
+        rows = table.find_all('tr')
+        if not rows:
+            continue
+        headers = [cell.get_text(' ', strip=True) for cell in rows[0].find_all(['th', 'td'])]
+        columns = map_columns(headers, profile)
+        if 'title' in columns and 'gross' in columns:
+            return rows, columns
+    return [], {}
+
+
+def extract_localized(content, profile, lang):
+    """Extract film dictionaries from one language edition of the chart."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+    rows, columns = find_chart_table(soup, profile)
+    if not rows:
+        print(f"[{lang}] Could not find a chart table with title and gross columns")
+        return []
+
+    films = []
+    last_needed = max(columns.values())
+    for row in rows[1:]:
+        cells = row.find_all(['td', 'th'])
+        if len(cells) <= last_needed:
+            continue
+
+        title_cell = cells[columns['title']]
+        key = None
+        title_source = title_cell
+        for link in title_cell.find_all('a', href=True):
+            key = article_key(link['href'])
+            if key:
+                title_source = link
+                break
+        title = _clean_title(title_source.get_text(strip=True))
+
+        gross = parse_amount(cells[columns['gross']].get_text(' ', strip=True), profile)
+        year = parse_year(cells[columns['year']].get_text(' ', strip=True)) if 'year' in columns else None
+        if not title or not gross:
+            continue
+
+        films.append({
+            'lang': lang,
+            'title': title,
+            'article_key': key,
+            'worldwide_gross': gross,
+            'year': year,
+        })
+
+    print(f"[{lang}] Extracted {len(films)} films")
+    return films
+
+
+def lookup_pages(session, profile, keys):
+    """
+    Look up the page id and Wikidata item for each article key, following redirects.
+
+    Queries the edition's API in batches of 50 titles and returns a
+    dictionary of article key to (page id, Wikidata id). Keys whose page
+    doesn't exist are left out; the Wikidata id may be None.
+    """
+    api_url = f"https://{urlsplit(profile['url']).netloc}/w/api.php"
+    keys = [key for key in dict.fromkeys(keys) if key]
+    resolved = {}
+
+    for start in range(0, len(keys), WIKIDATA_BATCH_SIZE):
+        batch = keys[start:start + WIKIDATA_BATCH_SIZE]
+        params = {
+            'action': 'query',
+            'prop': 'pageprops',
+            'ppprop': 'wikibase_item',
+            'redirects': 1,
+            'format': 'json',
+            'formatversion': 2,
+            'titles': '|'.join(key.replace('_', ' ') for key in batch),
+        }
+        response = session.get(api_url, params=params, headers=HEADERS, timeout=30)
+        response.raise_for_status()
+        query = response.json().get('query', {})
+
+        pages = {page['title']: (page['pageid'], page.get('pageprops', {}).get('wikibase_item'))
+                 for page in query.get('pages', []) if 'pageid' in page}
+        aliases = {step['from']: step['to'] for step in query.get('normalized', []) + query.get('redirects', [])}
+
+        for key in batch:
+            title = key.replace('_', ' ')
+            seen = set()
+            while title in aliases and title not in seen:
+                seen.add(title)
+                title = aliases[title]
+            if title in pages:
+                resolved[key] = pages[title]
+
+    return resolved
+
+
+def resolve_wikidata_ids(session, profile, keys):
+    """Return a dictionary of article key to Wikidata id (keys without an item are left out)."""
+    return {key: item for key, (_, item) in lookup_pages(session, profile, keys).items() if item}
+
+
+def scrape_language(lang, session, resolve_ids=True):
+    """Fetch, parse and (optionally) resolve Wikidata ids for one edition."""
+    profile = get_profile(lang)
+    response = fetch_page(profile['url'], session=session)
+    films = extract_localized(response.content, profile, lang)
+
+    if resolve_ids and films:
+        ids = resolve_wikidata_ids(session, profile, [film['article_key'] for film in films])
+        for film in films:
+            film['wikidata_id'] = ids.get(film['article_key'])
+    return films
+
+
+def film_key(film):
+    """Return the cross-language key for a film: its Wikidata id, or title and year."""
+    if film.get('wikidata_id'):
+        return film['wikidata_id']
+    return f"title:{' '.join(film['title'].casefold().split())}|{film['year']}"
+
+
+def reconcile(films):
+    """
+    Group films from all editions by cross-language key.
+
+    Returns rows of (film_key, lang, title, article_key, worldwide_gross, year)
+    ready for the multiwiki_movies table. When an edition lists the same
+    film twice, the higher gross is kept.
+    """
+    rows = {}
+    for film in films:
+        key = (film_key(film), film['lang'])
+        if key in rows and rows[key][4] >= film['worldwide_gross']:
+            continue
+        year = int(film['year']) if film['year'] else None
+        rows[key] = (key[0], film['lang'], film['title'], film['article_key'], film['worldwide_gross'], year)
+    return list(rows.values())
+
+
+def scrape_languages(langs, max_workers=DEFAULT_WORKERS, session=None, resolve_ids=True):
+    """
+    Scrape several editions concurrently through one pooled session.
+
+    Returns the combined list of film dictionaries. Editions that fail to
+    download are reported and skipped.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(langs), pool_maxsize=max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+    films = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(scrape_language, lang, session, resolve_ids): lang for lang in langs}
+            for future in as_completed(futures):
+                try:
+                    films.extend(future.result())
+                except requests.RequestException as e:
+                    print(f"[{futures[future]}] Error fetching data: {e}")
+    finally:
+        if own_session:
+            session.close()
+    return films
+
+
+def save_editions(connection, rows, scraped_at=None):
+    """Store reconciled rows in the multiwiki_movies table."""
+    from schema_migrations import migrate
+
+    migrate(connection)
+    scraped_at = scraped_at or datetime.now(timezone.utc).isoformat()
+    with connection:
+        connection.executemany('''
+            INSERT OR REPLACE INTO multiwiki_movies
+                (film_key, lang, title, article_key, worldwide_gross, year, scraped_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [row + (scraped_at,) for row in rows])
+
+
+def main(argv=None):
+    """Scrape several language editions and store the reconciled films."""
+    parser = argparse.ArgumentParser(description='Scrape the chart from several Wikipedia language editions')
+    parser.add_argument('--langs', default='en,de,fr', help=f"Comma-separated editions ({', '.join(PROFILES)})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent downloads')
+    parser.add_argument('--no-wikidata', action='store_true', help='Match films on title and year only')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    args = parser.parse_args(argv)
+
+    langs = [lang.strip() for lang in args.langs.split(',') if lang.strip()]
+    unknown = [lang for lang in langs if lang not in PROFILES]
+    if unknown:
+        parser.error(f"No locale profile for: {', '.join(unknown)}")
+
+    rows = reconcile(scrape_languages(langs, args.workers, resolve_ids=not args.no_wikidata))
+    connection = connect(args.db)
+    try:
+        save_editions(connection, rows)
+    finally:
+        connection.close()
+
+    films = len({row[0] for row in rows})
+    print(f"Saved {len(rows)} editions of {films} films from {len(langs)} languages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Content-addressed archive of fetched page bodies.
+
+Every body is stored once under its SHA-256 as a compressed blob (zstd when
+the `zstandard` package is installed, gzip otherwise). A SQLite index in
+the archive directory records each fetch's URL and time, so identical
+bodies fetched repeatedly share one blob. The archive lives in
+`page_archive/` beside the configured database unless a directory is given.
+
+The re-parse command reads archived bodies through mmap and runs the
+extractor over all of them offline, which turns extractor changes into a
+local batch job instead of a round of re-downloads.
+"""
+
+import argparse
+import gzip
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+
+from db_config import data_dir
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = 'page_archive'
+INDEX_NAME = 'index.db'
+
+
+def default_archive_dir():
+    """Return the archive directory beside the configured database."""
+    return data_dir(ARCHIVE_DIR)
+
+
+def _connect_index(archive_dir):
+    """Open (and create if needed) the archive index database."""
+    os.makedirs(os.path.join(archive_dir, 'objects'), exist_ok=True)
+    connection = sqlite3.connect(os.path.join(archive_dir, INDEX_NAME))
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            raw_size INTEGER NOT NULL,
+            stored_size INTEGER NOT NULL
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS fetches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            sha256 TEXT NOT NULL REFERENCES blobs(sha256)
+        )
+    ''')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches(url, fetched_at)')
+    return connection
+
+
+def blob_path(archive_dir, sha256, codec):
+    """Return the path of a blob, fanned out by the first two hex digits."""
+    return os.path.join(archive_dir, 'objects', sha256[:2], f'{sha256}.{codec}')
+
+
+def _compress(body):
+    if zstandard is not None:
+        return 'zst', zstandard.ZstdCompressor(level=10).compress(body)
+    return 'gz', gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _decompress(codec, data):
+    if codec == 'zst':
+        if zstandard is None:
+            raise RuntimeError('This blob is zstd-compressed but the zstandard package is not installed')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def store_page(url, body, fetched_at=None, archive_dir=None):
+    """
+    Archive a response body and record the fetch, returning its SHA-256.
+
+    The blob is only written the first time a given body is seen.
+    """
+    sha256 = hashlib.sha256(body).hexdigest()
+    fetched_at = fetched_at or datetime.now(timezone.utc).isoformat()
+    archive_dir = archive_dir or default_archive_dir()
+
+    connection = _connect_index(archive_dir)
+    try:
+        with connection:
+            row = connection.execute('SELECT codec FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+            if row is None or not os.path.exists(blob_path(archive_dir, sha256, row[0])):
+                codec, data = _compress(body)
+                path = blob_path(archive_dir, sha256, codec)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+                # Write to a temp file first so a crash never leaves a truncated blob
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+
+                connection.execute(
+                    'INSERT OR REPLACE INTO blobs (sha256, codec, raw_size, stored_size) VALUES (?, ?, ?, ?)',
+                    (sha256, codec, len(body), len(data))
+                )
+            connection.execute(
+                'INSERT INTO fetches (url, fetched_at, sha256) VALUES (?, ?, ?)',
+                (url, fetched_at, sha256)
+            )
+    finally:
+        connection.close()
+
+    return sha256
+
+
+def read_body(sha256, archive_dir=None):
+    """Read and decompress an archived body, mapping the blob file with mmap."""
+    archive_dir = archive_dir or default_archive_dir()
+    connection = _connect_index(archive_dir)
+    try:
+        row = connection.execute('SELECT codec FROM blobs WHERE sha256 = ?', (sha256,)).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        raise KeyError(sha256)
+
+    with open(blob_path(archive_dir, sha256, row[0]), 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _decompress(row[0], mapped)
+
+
+def list_blobs(archive_dir=None, url=None):
+    """
+    Return (sha256, url, last fetched_at) for each distinct archived body,
+    oldest first, optionally limited to one URL.
+    """
+    archive_dir = archive_dir or default_archive_dir()
+    connection = _connect_index(archive_dir)
+    try:
+        query = '''
+            SELECT sha256, url, MAX(fetched_at) AS last_fetched
+            FROM fetches
+            {where}
+            GROUP BY sha256, url
+            ORDER BY last_fetched
+        '''
+        if url:
+            cursor = connection.execute(query.format(where='WHERE url = ?'), (url,))
+        else:
+            cursor = connection.execute(query.format(where=''))
+        return cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def reparse_archive(extractor=None, archive_dir=None, url=None):
+    """
+    Run the extractor over every archived body.
+
+    Yields (sha256, url, fetched_at, extracted result). The default
+    extractor is `wikipedia_scraping.extract_movies`.
+    """
+    if extractor is None:
+        from wikipedia_scraping import extract_movies as extractor
+
+    archive_dir = archive_dir or default_archive_dir()
+    for sha256, page_url, fetched_at in list_blobs(archive_dir, url):
+        yield sha256, page_url, fetched_at, extractor(read_body(sha256, archive_dir))
+
+
+def main(argv=None):
+    """Show the archive contents or re-parse every archived page offline."""
+    parser = argparse.ArgumentParser(description='Inspect or re-parse the raw page archive')
+    parser.add_argument('command', choices=['list', 'reparse'])
+    parser.add_argument('--archive-dir', default=None,
+                        help=f'Archive directory (default: {ARCHIVE_DIR}/ beside the movies database)')
+    parser.add_argument('--url', default=None, help='Only include pages fetched from this URL')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Parse large tables in parallel shards with this many processes')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for sha256, url, fetched_at in list_blobs(args.archive_dir, args.url):
+            print(f"{sha256[:12]}  {fetched_at}  {url}")
+        return
+
+    extractor = None
+    if args.workers:
+        from functools import partial
+        from sharded_parsing import extract_movies_sharded
+        extractor = partial(extract_movies_sharded, workers=args.workers)
+
+    total = 0
+    for sha256, url, fetched_at, movies in reparse_archive(extractor, archive_dir=args.archive_dir, url=args.url):
+        total += len(movies)
+        print(f"✅ {sha256[:12]} ({fetched_at}): {len(movies)} movies")
+    print(f"Re-parsed archive: {total} movies extracted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Cache of cleaned movie records, keyed by page content hash.
+
+Even when the page body hasn't changed, `scrape_wikipedia` used to
+re-parse the HTML and re-clean every row. `ParseCache` maps the SHA-256
+of a body plus the extractor version to its cleaned records, so an
+unchanged page is parsed once.
+
+Records are packed into a compact columnar blob: fixed-width arrays for
+gross and year, plus one UTF-8 buffer each for titles and article keys.
+Blobs live in an in-memory LRU and in a disk directory (LRU by file
+mtime, `parse_cache/` beside the configured database by default). Both
+are bounded in bytes.
+
+The extractor version is a hash of the source of the extraction
+functions, every helper in wikipedia_scraping they call (such as the
+`_diagnose` that builds the cached row diagnostics) and the module
+constants they use (such as NON_ARTICLE_NAMESPACES), so editing any of
+them invalidates the cache. Blobs of older versions are deleted on the
+next write.
+
+    python parse_cache.py stats
+    python parse_cache.py clear
+"""
+
+import argparse
+import hashlib
+import inspect
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+
+CACHE_DIR = 'parse_cache'
+DEFAULT_MAX_MEMORY_BYTES = 16 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+
+# Bump when the blob layout changes; the extractor source is hashed in too
+FORMAT_VERSION = 2
+MAGIC = b'MVPC'
+HEADER = struct.Struct('<4sBI')  # magic, flags, record count
+DIAGNOSTIC = struct.Struct('<Iiii')  # row number, then reason, row HTML and message lengths
+FLAG_KEYS = 1
+FLAG_DIAGNOSTICS = 2
+
+# Module-level values of these types are data the extractor depends on (e.g. NON_ARTICLE_NAMESPACES)
+_CONSTANT_TYPES = (str, bytes, int, float, tuple, list, dict, frozenset, set, re.Pattern)
+
+_version = None
+
+
+def _global_names(code):
+    """Return the global names a code object (and any nested code) refers to."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def extractor_version():
+    """
+    Return a short hash identifying the current extraction code.
+
+    Covers the source of `extract_movies`, `clean_row` and `article_key`
+    and of every wikipedia_scraping function they call, directly or not
+    (or their bytecode when the source isn't available), the module-level
+    constants and compiled patterns those refer to, and the blob format
+    version.
+    """
+    global _version
+    if _version is None:
+        import wikipedia_scraping
+
+        module_globals = vars(wikipedia_scraping)
+        digest = hashlib.sha256(f'format {FORMAT_VERSION}'.encode())
+        pending = [wikipedia_scraping.extract_movies, wikipedia_scraping.clean_row,
+                   wikipedia_scraping.article_key]
+        seen = set()
+        while pending:
+            func = pending.pop(0)
+            if func in seen:
+                continue
+            seen.add(func)
+            try:
+                digest.update(inspect.getsource(func).encode('utf-8'))
+            except (OSError, TypeError):
+                digest.update(func.__code__.co_code)
+            for name in sorted(_global_names(func.__code__)):
+                value = module_globals.get(name)
+                if inspect.isfunction(value) and value.__module__ == wikipedia_scraping.__name__:
+                    pending.append(value)
+                elif isinstance(value, _CONSTANT_TYPES):
+                    digest.update(f'{name}={value!r}'.encode('utf-8'))
+        _version = digest.hexdigest()[:16]
+    return _version
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode, data, offset, count):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values, end
+
+
+def _pack_text(text):
+    return b'' if text is None else text.encode('utf-8')
+
+
+def pack_movies(movies, keys=False, diagnostics=None):
+    """
+    Pack cleaned movie dictionaries into a compact binary blob.
+
+    The row diagnostics collected while extracting them (see
+    `extract_movies`) can be packed alongside, so a cache hit returns
+    them too.
+    """
+    titles = [movie['title'].encode('utf-8') for movie in movies]
+    flags = (FLAG_KEYS if keys else 0) | (FLAG_DIAGNOSTICS if diagnostics is not None else 0)
+    parts = [
+        HEADER.pack(MAGIC, flags, len(movies)),
+        _little_endian(array('q', (movie['worldwide_gross'] for movie in movies))),
+        _little_endian(array('H', (int(movie['year']) for movie in movies))),
+        _little_endian(array('I', (len(title) for title in titles))),
+        b''.join(titles),
+    ]
+    if keys:
+        # -1 marks a movie whose title cell had no article link
+        article_keys = [movie.get('article_key') for movie in movies]
+        encoded = [key.encode('utf-8') if key is not None else b'' for key in article_keys]
+        parts.append(_little_endian(array('i', (-1 if key is None else len(data)
+                                                for key, data in zip(article_keys, encoded)))))
+        parts.append(b''.join(encoded))
+    if diagnostics is not None:
+        parts.append(struct.pack('<I', len(diagnostics)))
+        for diagnostic in diagnostics:
+            texts = [_pack_text(diagnostic[name]) for name in ('reason', 'row_html', 'message')]
+            message_length = -1 if diagnostic['message'] is None else len(texts[2])
+            parts.append(DIAGNOSTIC.pack(diagnostic['row_number'], len(texts[0]), len(texts[1]), message_length))
+            parts.extend(texts)
+    return b''.join(parts)
+
+
+def unpack_movies(blob, diagnostics=None, body_sha256=None):
+    """
+    Unpack a blob from `pack_movies` back into movie dictionaries.
+
+    Pass a list as `diagnostics` to get the packed row diagnostics back,
+    tagged with `body_sha256`.
+    """
+    magic, flags, count = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError('Not a parse cache blob')
+
+    offset = HEADER.size
+    grosses, offset = _read_array('q', blob, offset, count)
+    years, offset = _read_array('H', blob, offset, count)
+    title_lengths, offset = _read_array('I', blob, offset, count)
+    titles = []
+    for length in title_lengths:
+        titles.append(bytes(blob[offset:offset + length]).decode('utf-8'))
+        offset += length
+
+    movies = [{'title': title, 'worldwide_gross': gross, 'year': str(year)}
+              for title, gross, year in zip(titles, grosses, years)]
+
+    if flags & FLAG_KEYS:
+        key_lengths, offset = _read_array('i', blob, offset, count)
+        for movie, length in zip(movies, key_lengths):
+            if length < 0:
+                movie['article_key'] = None
+                continue
+            movie['article_key'] = bytes(blob[offset:offset + length]).decode('utf-8')
+            offset += length
+
+    if diagnostics is not None and flags & FLAG_DIAGNOSTICS:
+        (diagnostic_count,) = struct.unpack_from('<I', blob, offset)
+        offset += 4
+        for _ in range(diagnostic_count):
+            row_number, *lengths = DIAGNOSTIC.unpack_from(blob, offset)
+            offset += DIAGNOSTIC.size
+            texts = []
+            for length in lengths:
+                texts.append(None if length < 0 else bytes(blob[offset:offset + length]).decode('utf-8'))
+                offset += max(length, 0)
+            diagnostics.append({'body_sha256': body_sha256, 'row_number': row_number, 'reason': texts[0],
+                                'row_html': texts[1], 'message': texts[2]})
+    return movies
+
+
+class ParseCache:
+    """Two-level LRU cache (memory, then disk) of packed extraction results."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES, version=None):
+        # cache_dir=None keeps the cache in memory only
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.version = version or extractor_version()
+
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._pruned_old_versions = False
+
+    def key(self, body, keys=False):
+        """Return the cache key for a body: its SHA-256, the key flag and the extractor version."""
+        return f"{hashlib.sha256(body).hexdigest()}-{'k' if keys else 'p'}-{self.version}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, self.version, key[:2], f'{key}.bin')
+
+    def get(self, body, keys=False, diagnostics=None):
+        """
+        Return the cached movies for a body, or None on a miss.
+
+        Pass a list as `diagnostics` to also get the row diagnostics that
+        were cached with them.
+        """
+        key = self.key(body, keys)
+        with self.lock:
+            blob = self.memory.get(key)
+            if blob is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+        if blob is None:
+            blob = self._read_disk(key)
+            with self.lock:
+                if blob is None:
+                    self.misses += 1
+                    return None
+                self.disk_hits += 1
+                self._remember(key, blob)
+        return unpack_movies(blob, diagnostics, key.split('-', 1)[0])
+
+    def put(self, body, movies, keys=False, diagnostics=None):
+        """Cache the movies (and optionally the row diagnostics) extracted from a body."""
+        key = self.key(body, keys)
+        blob = pack_movies(movies, keys, diagnostics)
+        with self.lock:
+            self._remember(key, blob)
+        self._write_disk(key, blob)
+
+    def _remember(self, key, blob):
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous)
+        self.memory[key] = blob
+        self.memory_bytes += len(blob)
+        while self.memory_bytes > self.max_memory_bytes and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+            # Reading counts as a use for the mtime-based LRU
+            os.utime(path)
+        except OSError:
+            return None
+        return blob
+
+    def _write_disk(self, key, blob):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+            if not self._pruned_old_versions:
+                self._pruned_old_versions = True
+                self.remove_stale_versions()
+            self.evict_disk()
+        except OSError as e:
+            print(f"Could not write parse cache entry {key}: {e}")
+
+    def _disk_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.bin'):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict_disk(self):
+        """Delete the least recently used disk entries until the cache fits. Returns the number deleted."""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        deleted = 0
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+            deleted += 1
+        return deleted
+
+    def remove_stale_versions(self):
+        """Delete disk entries written by other extractor versions."""
+        import shutil
+
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name != self.version and os.path.isdir(os.path.join(self.cache_dir, name)):
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def clear(self):
+        """Empty both levels of the cache."""
+        import shutil
+
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+        if self.cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self):
+        """Return hit/miss counters and the size of both levels."""
+        entries = self._disk_entries() if self.cache_dir and os.path.isdir(self.cache_dir) else []
+        return {
+            'version': self.version,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory_bytes,
+            'disk_entries': len(entries),
+            'disk_bytes': sum(size for _, size, _ in entries),
+        }
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    Return the process-wide cache used by `scrape_wikipedia`.
+
+    Its disk level is `parse_cache/` beside the configured database, and
+    a new cache is opened when the database location changes.
+    """
+    from db_config import data_dir
+
+    global _default_cache
+    cache_dir = data_dir(CACHE_DIR)
+    if _default_cache is None or _default_cache.cache_dir != cache_dir:
+        _default_cache = ParseCache(cache_dir)
+    return _default_cache
+
+
+def cached_extract(content, keys=False, cache=None, diagnostics=None):
+    """
+    Extract movies from a body through the cache, parsing only on a miss.
+
+    Row diagnostics are always collected on a miss and cached with the
+    movies, so a `diagnostics` list is filled in on hits as well.
+    """
+    from wikipedia_scraping import extract_movies
+
+    cache = cache or default_cache()
+    movies = cache.get(content, keys, diagnostics)
+    if movies is not None:
+        print(f"Using cached parse of this page ({len(movies)} movies)")
+        return movies
+
+    collected = []
+    movies = extract_movies(content, keys=keys, diagnostics=collected)
+    # An empty result usually means a broken page; parse it again next time
+    if movies:
+        cache.put(content, movies, keys, collected)
+    if diagnostics is not None:
+        diagnostics.extend(collected)
+    return movies
+
+
+def main(argv=None):
+    """Show cache statistics or clear the cache."""
+    parser = argparse.ArgumentParser(description='Inspect or clear the parsed-result cache')
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--cache-dir', default=None,
+                        help=f'Cache directory (default: {CACHE_DIR}/ beside the movies database)')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    args = parser.parse_args(argv)
+
+    from db_config import data_dir
+
+    cache = ParseCache(args.cache_dir or data_dir(CACHE_DIR, args.db))
+    if args.command == 'clear':
+        cache.clear()
+        print(f"✅ Cleared {cache.cache_dir}")
+        return
+    for name, value in cache.stats().items():
+        print(f"{name}\t{value}")
+
+
+if __name__ == "__main__":
+    main()
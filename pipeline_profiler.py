@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Per-phase cProfile and tracemalloc reports for the scraping pipeline.
+
+A refresh has four phases: fetch (`requests.get`), parse (building the
+BeautifulSoup tree), extract (the row loop) and store (the inserts). The
+scraper and `MovieWriter` accept a `profiler`; each phase runs inside
+`profiler.phase(name)`, which records CPU time with cProfile and memory
+with tracemalloc. `write_reports()` then writes, per phase:
+
+    <phase>.collapsed   collapsed stacks for flamegraph.pl / speedscope
+    <phase>.pstats      raw cProfile data for pstats or snakeviz
+    pipeline.collapsed  all phases under one root frame each
+    summary.txt         wall time, peak memory and top allocation sites
+
+When profiling is off the pipeline uses NULL_PROFILER, whose phase() is a
+shared no-op context manager, so nothing is traced or allocated.
+
+    python pipeline_profiler.py --output profiles
+    python movies_cli.py scrape --profile profiles
+"""
+
+import argparse
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = 'profiles'
+DEFAULT_TOP_ALLOCATIONS = 10
+MAX_STACK_DEPTH = 64
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class NullProfiler:
+    """Profiler used when profiling is off: every phase is a no-op."""
+
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class PipelineProfiler:
+    """
+    Collects cProfile stats, wall time and memory for named phases.
+
+    A phase may run several times (e.g. one 'write' per group commit);
+    its stats accumulate. Use each phase name from one thread only, since
+    cProfile profiles the thread that enabled it.
+    """
+
+    enabled = True
+
+    def __init__(self, top_allocations=DEFAULT_TOP_ALLOCATIONS):
+        self.top_allocations = top_allocations
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        import cProfile
+
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = {
+                    'profile': cProfile.Profile(),
+                    'runs': 0,
+                    'wall_seconds': 0.0,
+                    'peak_bytes': 0,
+                    'allocations': [],
+                }
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        before = tracemalloc.take_snapshot()
+
+        started = time.perf_counter()
+        stats['profile'].enable()
+        try:
+            yield stats
+        finally:
+            stats['profile'].disable()
+            elapsed = time.perf_counter() - started
+
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+
+            with self._lock:
+                stats['runs'] += 1
+                stats['wall_seconds'] += elapsed
+                if peak >= stats['peak_bytes']:
+                    stats['peak_bytes'] = peak
+                    stats['allocations'] = top_allocations(before, after, self.top_allocations)
+
+    def summary(self):
+        """Return a plain-text summary of every phase."""
+        lines = []
+        for name, stats in self.phases.items():
+            lines.append(f"{name}: {stats['wall_seconds']:.3f}s over {stats['runs']} run(s), "
+                         f"peak {stats['peak_bytes'] / 1024:,.1f} KiB")
+            for site, size_diff, count_diff in stats['allocations']:
+                lines.append(f"    {size_diff / 1024:+10,.1f} KiB {count_diff:+8,d} blocks  {site}")
+        return '\n'.join(lines)
+
+    def write_reports(self, output_dir=PROFILE_DIR):
+        """Write collapsed stacks, pstats files and a summary to `output_dir`."""
+        os.makedirs(output_dir, exist_ok=True)
+        combined = []
+        for name, stats in self.phases.items():
+            stacks = collapsed_stacks(stats['profile'])
+            with open(os.path.join(output_dir, f'{name}.collapsed'), 'w') as f:
+                f.writelines(f'{stack} {weight}\n' for stack, weight in stacks)
+            stats['profile'].dump_stats(os.path.join(output_dir, f'{name}.pstats'))
+            combined.extend((f'{name};{stack}', weight) for stack, weight in stacks)
+
+        with open(os.path.join(output_dir, 'pipeline.collapsed'), 'w') as f:
+            f.writelines(f'{stack} {weight}\n' for stack, weight in combined)
+        with open(os.path.join(output_dir, 'summary.txt'), 'w') as f:
+            f.write(self.summary() + '\n')
+        return output_dir
+
+
+def top_allocations(before, after, limit=DEFAULT_TOP_ALLOCATIONS):
+    """Return the `limit` source lines that allocated the most between two snapshots."""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+    sites = []
+    for diff in differences[:limit]:
+        if diff.size_diff <= 0:
+            continue
+        frame = diff.traceback[0]
+        sites.append((f'{frame.filename}:{frame.lineno}', diff.size_diff, diff.count_diff))
+    return sites
+
+
+def _frame_name(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name  # built-ins, e.g. "<method 'find_all' ...>"
+    return f'{os.path.basename(filename)}:{lineno}:{name}'
+
+
+def collapsed_stacks(profile):
+    """
+    Turn cProfile data into (stack, microseconds) pairs.
+
+    cProfile records caller/callee edges rather than full stacks, so each
+    function's self time is split across call paths in proportion to the
+    time its callers spent calling it (the same approximation flameprof
+    and similar tools use). Recursive edges are cut off.
+    """
+    import pstats
+
+    raw = pstats.Stats(profile).stats
+    children = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+
+    roots = [func for func, entry in raw.items() if not any(caller in raw for caller in entry[4])]
+    weights = {}
+
+    def walk(func, path, share):
+        stack = path + (_frame_name(func),)
+        weight = int(raw[func][2] * share * 1_000_000)
+        if weight > 0:
+            weights[stack] = weights.get(stack, 0) + weight
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for child, edge_time in children.get(func, ()):
+            child_time = raw[child][3]
+            if child_time <= 0 or _frame_name(child) in stack:
+                continue
+            # Paths worth less than a microsecond are dropped to keep the walk small
+            child_share = min(share * edge_time / child_time, 1.0)
+            if child_share * child_time >= 1e-6:
+                walk(child, stack, child_share)
+
+    for root in roots:
+        walk(root, (), 1.0)
+
+    return [(';'.join(stack), weight) for stack, weight in weights.items()]
+
+
+def profile_pipeline(output_dir=PROFILE_DIR, db_path=None, content=None, url=None):
+    """
+    Run fetch, parse, extract and store under a profiler and write the reports.
+
+    Pass `content` to profile an already downloaded page (the fetch phase
+    is then skipped). Returns the profiler.
+    """
+    from db_config import connect
+    from wikipedia_scraping import WIKIPEDIA_URL, create_movies_table, extract_movies, fetch_page, save_to_database
+
+    profiler = PipelineProfiler()
+    if content is None:
+        with profiler.phase('fetch'):
+            content = fetch_page(url or WIKIPEDIA_URL).content
+    movies = extract_movies(content, profiler=profiler)
+
+    connection = connect(db_path)
+    try:
+        create_movies_table(connection)
+        save_to_database(movies, connection=connection, replace=True, profiler=profiler)
+    finally:
+        connection.close()
+
+    profiler.write_reports(output_dir)
+    return profiler
+
+
+def main(argv=None):
+    """Profile one scrape-and-store run and print the per-phase summary."""
+    parser = argparse.ArgumentParser(description='Profile the scraping pipeline phase by phase')
+    parser.add_argument('--output', default=PROFILE_DIR, help='Directory for the reports')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    parser.add_argument('--file', default=None, help='Profile a saved HTML page instead of fetching')
+    parser.add_argument('--url', default=None, help='Page to fetch (default: the English chart)')
+    args = parser.parse_args(argv)
+
+    content = None
+    if args.file:
+        with open(args.file, 'rb') as f:
+            content = f.read()
+
+    profiler = profile_pipeline(args.output, args.db, content, args.url)
+    print(profiler.summary())
+    print(f"✅ Reports written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
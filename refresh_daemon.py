@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Long-running refresh daemon for the movies table.
+
+Instead of paying interpreter startup, cold imports, fresh TCP/TLS
+connections and table creation on every cron run, the daemon stays
+resident with one warm `requests.Session` and one database connection and
+refreshes on a jittered schedule. Runs are skipped when the page has not
+changed (304 from a conditional GET, or an identical body hash).
+
+A small HTTP endpoint on localhost reports the last run's duration and
+row counts; SIGTERM and SIGINT stop the daemon after the current run.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import signal
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from change_feed import record_rank_changes
+from db_config import connect, data_dir, get_db_path
+from movie_identity import save_identified
+from page_archive import ARCHIVE_DIR
+from row_diagnostics import record_diagnostics
+from wikipedia_scraping import WIKIPEDIA_URL, create_movies_table, extract_movies, fetch_page
+
+DEFAULT_INTERVAL = 6 * 60 * 60
+DEFAULT_JITTER = 0.1
+DEFAULT_HEALTH_PORT = 8765
+
+
+class RefreshDaemon:
+    """Resident scraper that refreshes movies.db on a schedule."""
+
+    def __init__(self, db_path=None, url=WIKIPEDIA_URL, interval=DEFAULT_INTERVAL,
+                 jitter=DEFAULT_JITTER, health_host='127.0.0.1', health_port=DEFAULT_HEALTH_PORT):
+        self.db_path = get_db_path(db_path)
+        self.url = url
+        self.interval = interval
+        self.jitter = jitter
+        self.health_address = (health_host, health_port)
+
+        self.stop_event = threading.Event()
+        self.session = requests.Session()
+        self.connection = connect(db_path, check_same_thread=False)
+        self.archive_dir = data_dir(ARCHIVE_DIR, self.db_path)
+        self.health_server = None
+
+        self.status_lock = threading.Lock()
+        self.started_at = time.time()
+        self.runs = 0
+        self.last_run = None
+        self.next_run_at = None
+
+        create_movies_table(self.connection)
+        self.etag, self.last_modified, self.body_sha256 = self._load_validators()
+
+    def _load_validators(self):
+        """Pick up the validators of the last successful run so restarts can skip too."""
+        row = self.connection.execute('''
+            SELECT etag, last_modified, body_sha256 FROM refresh_runs
+            WHERE status IN ('updated', 'unchanged', 'not_modified') AND body_sha256 IS NOT NULL
+            ORDER BY id DESC LIMIT 1
+        ''').fetchone()
+        return row if row else (None, None, None)
+
+    def _conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def run_once(self):
+        """Run a single refresh and return its status dictionary."""
+        started = time.perf_counter()
+        run = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'status': 'error',
+            'http_status': None,
+            'rows_scraped': 0,
+            'rows_in_table': None,
+            'error': None,
+        }
+
+        try:
+            response = fetch_page(self.url, archive=self.archive_dir, session=self.session,
+                                  headers=self._conditional_headers())
+            run['http_status'] = response.status_code
+
+            if response.status_code == 304:
+                run['status'] = 'not_modified'
+            else:
+                # Only remember the validators once the body is stored, so a failed
+                # update is retried instead of being answered with a 304 next time
+                validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                body_sha256 = hashlib.sha256(response.content).hexdigest()
+
+                if body_sha256 == self.body_sha256:
+                    self.etag, self.last_modified = validators
+                    run['status'] = 'unchanged'
+                else:
+                    diagnostics = []
+                    movies = extract_movies(response.content, keys=True, diagnostics=diagnostics)
+                    run['rows_scraped'] = len(movies)
+                    if movies:
+                        self._store(movies, run['started_at'], diagnostics)
+                        self.etag, self.last_modified = validators
+                        self.body_sha256 = body_sha256
+                        run['status'] = 'updated'
+                    else:
+                        run['error'] = 'No movies extracted'
+        except requests.RequestException as e:
+            run['error'] = str(e)
+        except (sqlite3.Error, ValueError) as e:
+            self.connection.rollback()
+            run['error'] = str(e)
+        except Exception as e:
+            # An odd page can trip the parser in ways nobody anticipated; record
+            # the failure and keep the schedule rather than killing the daemon
+            self.connection.rollback()
+            run['error'] = f"{type(e).__name__}: {e}"
+            print(f"❌ Refresh failed: {run['error']}")
+
+        run['rows_in_table'] = self.connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+        run['duration_seconds'] = round(time.perf_counter() - started, 4)
+        self._record(run)
+        return run
+
+    def _store(self, movies, observed_at, diagnostics=()):
+        """
+        Replace the movies table contents and append a history snapshot in one transaction.
+
+        Movies are upserted by article key, so ids stay stable across
+        refreshes, and each history row is linked to the film's identity.
+        Rank moves are logged to the change feed with the rest of the batch,
+        and rejected or defaulted rows are kept as row diagnostics.
+        """
+        with self.connection:
+            save_identified(self.connection, movies, replace=True, seen_at=observed_at)
+            self.connection.executemany('''
+                INSERT INTO movie_history (observed_at, title, worldwide_gross, year, identity_id)
+                VALUES (?, ?, ?, ?, (SELECT id FROM movie_identities WHERE article_key = ?))
+            ''', [(observed_at, m['title'], m['worldwide_gross'], int(m['year']), m.get('article_key'))
+                  for m in movies])
+            record_rank_changes(self.connection, observed_at)
+            record_diagnostics(self.connection, diagnostics, observed_at)
+
+    def _record(self, run):
+        with self.connection:
+            self.connection.execute('''
+                INSERT INTO refresh_runs (started_at, duration_seconds, status, http_status, etag,
+                                          last_modified, body_sha256, rows_scraped, rows_in_table, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (run['started_at'], run['duration_seconds'], run['status'], run['http_status'],
+                  self.etag, self.last_modified, self.body_sha256, run['rows_scraped'],
+                  run['rows_in_table'], run['error']))
+
+        with self.status_lock:
+            self.runs += 1
+            self.last_run = run
+        print(f"Refresh {run['status']} in {run['duration_seconds']}s "
+              f"({run['rows_scraped']} scraped, {run['rows_in_table']} in table)")
+
+    def next_delay(self):
+        """Return the interval with +/- jitter applied."""
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def status(self):
+        """Return the current health/status report."""
+        with self.status_lock:
+            return {
+                'status': 'stopping' if self.stop_event.is_set() else 'running',
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'runs': self.runs,
+                'last_run': self.last_run,
+                'next_run_at': self.next_run_at,
+            }
+
+    def start_health_server(self):
+        """Serve the status report on the health address in a background thread."""
+        daemon = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/', '/health', '/status'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(daemon.status()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.health_server = ThreadingHTTPServer(self.health_address, HealthHandler)
+        threading.Thread(target=self.health_server.serve_forever, daemon=True).start()
+        host, port = self.health_server.server_address[:2]
+        print(f"Health endpoint on http://{host}:{port}/health")
+
+    def stop(self, *args):
+        """Ask the daemon to stop after the current run."""
+        self.stop_event.set()
+
+    def run_forever(self):
+        """Refresh until stopped, sleeping a jittered interval between runs."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if self.health_address[1] is not None:
+            self.start_health_server()
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"❌ Refresh run could not be recorded: {type(e).__name__}: {e}")
+                delay = self.next_delay()
+                with self.status_lock:
+                    self.next_run_at = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+                self.stop_event.wait(delay)
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the health server, HTTP session and database connection."""
+        if self.health_server is not None:
+            self.health_server.shutdown()
+            self.health_server.server_close()
+            self.health_server = None
+        self.session.close()
+        self.connection.close()
+        print("Refresh daemon stopped")
+
+
+def main(argv=None):
+    """Run the refresh daemon from the command line."""
+    parser = argparse.ArgumentParser(description='Keep movies.db refreshed from Wikipedia')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    parser.add_argument('--url', default=WIKIPEDIA_URL, help='Page to scrape')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between refreshes')
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER, help='Fractional jitter applied to the interval')
+    parser.add_argument('--health-port', type=int, default=DEFAULT_HEALTH_PORT, help='Port for the health endpoint')
+    parser.add_argument('--once', action='store_true', help='Run a single refresh and exit')
+    args = parser.parse_args(argv)
+
+    daemon = RefreshDaemon(args.db, args.url, args.interval, args.jitter, health_port=args.health_port)
+    if args.once:
+        daemon.run_once()
+        daemon.close()
+    else:
+        daemon.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Wikipedia, for load-testing the scraper.
+
+Serves pages recorded in the page archive (by URL path), or synthetic
+charts of any size from `/synthetic/<rows>`. Faults can be injected to
+see how the scraper behaves when the network doesn't cooperate:
+
+    --latency 0.2        seconds to wait before answering
+    --bandwidth 500000   cap on bytes/second for each response body
+    --rate-304 0.1       fraction of requests answered 304 Not Modified
+    --rate-429 0.05      fraction answered 429 Too Many Requests
+    --rate-truncate 0.05 fraction whose body is cut off half-way
+
+Real conditional requests are honoured as well: every page has an ETag
+and a matching If-None-Match always gets a 304.
+
+    python replay_server.py --port 8081 --latency 0.05
+    python movies_cli.py scrape --url http://127.0.0.1:8081/synthetic/5000
+
+`benchmarks/bench_replay.py` drives concurrent scrapes against it.
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from page_archive import ARCHIVE_DIR, list_blobs, read_body
+from synthetic_pages import synthetic_page
+
+DEFAULT_PORT = 8081
+CHART_PATH = '/wiki/List_of_highest-grossing_films'
+DEFAULT_SYNTHETIC_ROWS = 200
+CHUNK_SIZE = 16 * 1024
+
+
+class ReplayServer:
+    """Serves recorded or synthetic pages with optional injected faults."""
+
+    def __init__(self, archive_dir=None, host='127.0.0.1', port=DEFAULT_PORT, latency=0.0,
+                 bandwidth=None, rate_304=0.0, rate_429=0.0, rate_truncate=0.0, seed=None,
+                 synthetic_rows=DEFAULT_SYNTHETIC_ROWS):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.rates = {'not_modified': rate_304, 'throttled': rate_429, 'truncated': rate_truncate}
+        self.synthetic_rows = synthetic_rows
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+
+        # Latest recorded body for each URL path
+        self.recorded = {}
+        if archive_dir:
+            for sha256, url, _ in list_blobs(archive_dir):
+                self.recorded[urlsplit(url).path] = (archive_dir, sha256)
+        self.pages = {}
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def page(self, path):
+        """Return (body, etag) for a path, or None if there is nothing to serve."""
+        with self.lock:
+            cached = self.pages.get(path)
+        if cached:
+            return cached
+
+        if path in self.recorded:
+            archive_dir, sha256 = self.recorded[path]
+            body = read_body(sha256, archive_dir)
+        elif path.startswith('/synthetic/') and path[len('/synthetic/'):].isdigit():
+            body = synthetic_page(int(path[len('/synthetic/'):]))
+        elif path == CHART_PATH:
+            body = synthetic_page(self.synthetic_rows)
+        else:
+            return None
+
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        with self.lock:
+            self.pages[path] = entry
+        return entry
+
+    def fault(self):
+        """Pick the injected fault for one request, or None."""
+        with self.lock:
+            roll = self.rng.random()
+        for name, rate in self.rates.items():
+            if roll < rate:
+                return name
+            roll -= rate
+        return None
+
+    def count(self, outcome):
+        with self.lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def _handler_class(self):
+        replay = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if replay.latency:
+                    time.sleep(replay.latency)
+
+                page = replay.page(urlsplit(self.path).path)
+                if page is None:
+                    replay.count('not_found')
+                    self.send_error(404)
+                    return
+                body, etag = page
+
+                fault = replay.fault()
+                if fault == 'throttled':
+                    replay.count('throttled')
+                    self.send_response(429)
+                    self.send_header('Retry-After', '1')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if fault == 'not_modified' or self.headers.get('If-None-Match') == etag:
+                    replay.count('not_modified')
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=UTF-8')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                if fault == 'truncated':
+                    # Promise the full length, send half, then drop the connection
+                    replay.count('truncated')
+                    self._write(body[:len(body) // 2])
+                    self.close_connection = True
+                    return
+                replay.count('ok')
+                self._write(body)
+
+            def _write(self, data):
+                if not replay.bandwidth:
+                    self.wfile.write(data)
+                    return
+                for start in range(0, len(data), CHUNK_SIZE):
+                    chunk = data[start:start + CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    time.sleep(len(chunk) / replay.bandwidth)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReplayHandler
+
+    def start(self):
+        """Serve in a background thread and return self."""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        """Stop serving and release the port."""
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread = None
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """Run the replay server until interrupted."""
+    parser = argparse.ArgumentParser(description='Serve recorded or synthetic pages with injectable faults')
+    parser.add_argument('--archive-dir', default=None,
+                        help=f'Replay pages recorded in this archive (e.g. {ARCHIVE_DIR})')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--rows', type=int, default=DEFAULT_SYNTHETIC_ROWS,
+                        help='Rows in the synthetic chart when nothing is recorded for it')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before each response')
+    parser.add_argument('--bandwidth', type=float, default=None, help='Bytes per second for each body')
+    parser.add_argument('--rate-304', type=float, default=0.0, help='Fraction of 304 responses')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of 429 responses')
+    parser.add_argument('--rate-truncate', type=float, default=0.0, help='Fraction of truncated bodies')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for fault injection')
+    args = parser.parse_args(argv)
+
+    replay = ReplayServer(args.archive_dir, args.host, args.port, args.latency, args.bandwidth,
+                          args.rate_304, args.rate_429, args.rate_truncate, args.seed, args.rows)
+    print(f"✅ Replaying on {replay.url}{CHART_PATH} ({len(replay.recorded)} recorded pages)")
+    try:
+        replay.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stopping replay server: {replay.counts}")
+    finally:
+        replay.close()
+
+
+if __name__ == "__main__":
+    main()
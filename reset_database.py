@@ -1,16 +1,30 @@
-import sqlite3
 import os
 
-def reset_database():
+from db_config import connect, get_db_path
+
+# Backups taken before a wipe are kept here, apart from the rotated ones and never pruned
+PRE_RESET_DIR = 'pre-reset'
+
+# Files SQLite keeps next to a database; a stale WAL would be replayed into the new file
+SIDECAR_SUFFIXES = ('-wal', '-shm', '-journal')
+
+def reset_database(db_path=None):
     """Reset the database with the correct table structure for tests."""
+    db_path = get_db_path(db_path)
     
-    # Delete existing database if it exists
-    if os.path.exists('movies.db'):
-        os.remove('movies.db')
-        print("Deleted existing movies.db")
+    # Delete existing database if it exists, keeping a backup of it first
+    if os.path.exists(db_path):
+        from backup_snapshots import create_backup, default_backup_dir
+        backup_dir = os.path.join(default_backup_dir(db_path), PRE_RESET_DIR)
+        print(f"Backed up {db_path} to {create_backup(backup_dir, db_path, retention=None)}")
+        os.remove(db_path)
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        print(f"Deleted existing {db_path}")
     
     # Create new database with correct structure
-    connection = sqlite3.connect('movies.db')
+    connection = connect(db_path)
     cursor = connection.cursor()
     
     # Create table to match test expectations exactly
@@ -25,10 +39,10 @@ def reset_database():
     
     connection.commit()
     connection.close()
-    print("Created new movies.db with correct structure")
+    print(f"Created new {db_path} with correct structure")
     
     # Verify the structure
-    connection = sqlite3.connect('movies.db')
+    connection = connect(db_path)
     cursor = connection.cursor()
     cursor.execute("PRAGMA table_info(movies)")
     columns = cursor.fetchall()
@@ -39,5 +53,30 @@ def reset_database():
     
     connection.close()
 
+def upgrade_database(db_path=None):
+    """Bring the database up to the correct table structure in place, keeping its data."""
+    from schema_migrations import current_version, migrate
+    
+    connection = connect(db_path)
+    applied = migrate(connection)
+    print(f"Applied {len(applied)} migration(s); schema version is now {current_version(connection)}")
+    connection.close()
+
+def main(argv=None):
+    """Upgrade the database in place, or delete and recreate it with --wipe."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Upgrade the movies database, or recreate it empty')
+    parser.add_argument('--wipe', action='store_true',
+                        help='Back up, delete and recreate the database instead (loses all data)')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    args = parser.parse_args(argv)
+    
+    # Deleting the database is only done on request; by default upgrade in place
+    if args.wipe:
+        reset_database(args.db)
+    else:
+        upgrade_database(args.db)
+
 if __name__ == "__main__":
-    reset_database()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Row-level parse diagnostics and targeted re-extraction.
+
+The extractor skips rows whose gross is missing or too small, defaults
+the year to "2023" when none matches, and only prints rows it can't
+process. When a cleaning rule changes, the only way to find the affected
+rows used to be reprocessing whole pages. Now every rejected or defaulted
+row is kept in `parse_diagnostics`, with its raw `<tr>` HTML, a reason
+code and the SHA-256 of the body it came from. `reextract()` re-runs the
+current `clean_row` over just those rows and merges the rows it now
+accepts into `movies`.
+
+    python row_diagnostics.py summary
+    python row_diagnostics.py list --reason year_defaulted
+    python row_diagnostics.py reextract --dry-run
+"""
+
+import argparse
+from datetime import datetime, timezone
+
+from db_config import connect
+
+REASONS = ('insufficient_columns', 'gross_missing', 'gross_too_small', 'missing_title',
+           'year_defaulted', 'row_error')
+
+
+def record_diagnostics(connection, diagnostics, recorded_at=None):
+    """
+    Store the diagnostics collected by `extract_movies(..., diagnostics=[])`.
+
+    Rows already recorded for the same body are skipped. Returns the
+    number of new rows; the caller commits.
+    """
+    from parse_cache import extractor_version
+
+    if not diagnostics:
+        return 0
+    recorded_at = recorded_at or datetime.now(timezone.utc).isoformat()
+    version = extractor_version()
+    before = connection.total_changes
+    connection.executemany('''
+        INSERT INTO parse_diagnostics (body_sha256, row_number, reason, row_html, message,
+                                       extractor_version, recorded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(body_sha256, row_number, reason) DO NOTHING
+    ''', [(d['body_sha256'], d['row_number'], d['reason'], d['row_html'], d['message'], version, recorded_at)
+          for d in diagnostics])
+    return connection.total_changes - before
+
+
+def open_rows(connection, reason=None, body_sha256=None):
+    """
+    Return the open diagnostics grouped by source row.
+
+    Yields one (body_sha256, row_number, row_html, reasons) tuple per row,
+    since a row can be both defaulted and rejected.
+    """
+    query = '''
+        SELECT body_sha256, row_number, row_html, GROUP_CONCAT(reason)
+        FROM parse_diagnostics
+        WHERE status = 'open'
+          AND (? IS NULL OR reason = ?)
+          AND (? IS NULL OR body_sha256 = ?)
+        GROUP BY body_sha256, row_number
+        ORDER BY body_sha256, row_number
+    '''
+    for sha256, row_number, row_html, reasons in connection.execute(
+            query, (reason, reason, body_sha256, body_sha256)):
+        yield sha256, row_number, row_html, reasons.split(',')
+
+
+def parse_row(row_html):
+    """Parse a stored `<tr>` back into its td/th cells."""
+    from bs4 import BeautifulSoup
+
+    row = BeautifulSoup(f'<table>{row_html}</table>', 'html.parser').find('tr')
+    return row.find_all(['td', 'th']) if row else []
+
+
+def merge_movie(connection, movie):
+    """
+    Merge a re-extracted movie into `movies` and return its id.
+
+    Movies with an article key are upserted by that key. Otherwise an
+    existing row with the same title is updated, or a new row is inserted.
+    """
+    from movie_identity import MOVIES_INSERT, save_identified
+
+    if movie.get('article_key'):
+        return save_identified(connection, [movie])[0]
+
+    title, gross, year = movie['title'], movie['worldwide_gross'], int(movie['year'])
+    row = connection.execute('SELECT id FROM movies WHERE title = ? ORDER BY id LIMIT 1', (title,)).fetchone()
+    if row:
+        connection.execute('UPDATE movies SET worldwide_gross = ?, year = ? WHERE id = ?', (gross, year, row[0]))
+        return row[0]
+    return connection.execute(MOVIES_INSERT, (title, gross, year)).lastrowid
+
+
+def reextract(connection, reason=None, body_sha256=None, dry_run=False):
+    """
+    Re-run the current cleaning rules over the open diagnostic rows.
+
+    A row that now cleans without any issue is merged into `movies` and
+    its diagnostics are marked 'fixed'. Rows that are still rejected or
+    defaulted stay open. With `dry_run` nothing is written. Returns a
+    summary dictionary, including the fixed movies.
+    """
+    from change_feed import record_rank_changes
+    from parse_cache import extractor_version
+    from wikipedia_scraping import clean_row
+
+    checked_at = datetime.now(timezone.utc).isoformat()
+    version = extractor_version()
+    summary = {'checked': 0, 'fixed': 0, 'still_open': 0, 'movies': []}
+
+    with connection:
+        for sha256, row_number, row_html, reasons in list(open_rows(connection, reason, body_sha256)):
+            summary['checked'] += 1
+            cells = parse_row(row_html)
+            issues = []
+            movie = None
+            if len(cells) >= 5:
+                try:
+                    movie = clean_row(cells, keys=True, issues=issues)
+                except (ValueError, AttributeError, IndexError):
+                    movie = None
+
+            fixed = movie is not None and not issues
+            if fixed:
+                summary['fixed'] += 1
+                summary['movies'].append(movie)
+            else:
+                summary['still_open'] += 1
+            if dry_run:
+                continue
+
+            movie_id = merge_movie(connection, movie) if fixed else None
+            connection.execute('''
+                UPDATE parse_diagnostics
+                SET status = ?, checked_at = ?, extractor_version = ?, movie_id = ?
+                WHERE body_sha256 = ? AND row_number = ? AND status = 'open'
+            ''', ('fixed' if fixed else 'open', checked_at, version, movie_id, sha256, row_number))
+
+        if summary['fixed'] and not dry_run:
+            record_rank_changes(connection, checked_at)
+
+    return summary
+
+
+def main(argv=None):
+    """Summarize, list or re-extract the recorded row diagnostics."""
+    parser = argparse.ArgumentParser(description='Inspect and re-extract rejected or defaulted rows')
+    parser.add_argument('command', choices=['summary', 'list', 'reextract'])
+    parser.add_argument('--reason', choices=REASONS, default=None, help='Only rows with this reason')
+    parser.add_argument('--body', default=None, help='Only rows from the body with this SHA-256')
+    parser.add_argument('--dry-run', action='store_true', help='Show what re-extraction would fix without writing')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    args = parser.parse_args(argv)
+
+    from schema_migrations import migrate
+
+    connection = connect(args.db)
+    try:
+        migrate(connection)
+        if args.command == 'summary':
+            for status, reason, count in connection.execute('''
+                    SELECT status, reason, COUNT(*) FROM parse_diagnostics
+                    GROUP BY status, reason ORDER BY status, reason'''):
+                print(f"{status}\t{reason}\t{count}")
+        elif args.command == 'list':
+            for sha256, row_number, row_html, reasons in open_rows(connection, args.reason, args.body):
+                print(f"{sha256[:12]}\trow {row_number}\t{','.join(reasons)}\t{row_html[:120]}")
+        else:
+            summary = reextract(connection, args.reason, args.body, args.dry_run)
+            for movie in summary['movies']:
+                print(f"  {movie['title']} ({movie['year']}) - ${movie['worldwide_gross']:,}")
+            verb = 'Would fix' if args.dry_run else 'Fixed'
+            print(f"✅ {verb} {summary['fixed']} of {summary['checked']} rows ({summary['still_open']} still open)")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
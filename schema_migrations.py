@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Versioned, in-place schema migrations for movies.db.
+
+The repo has grown several different `movies` schemas (the scraper's, plus
+the richer ones from create_database.py, create_movies_table.py and
+simple_movies_table.py). Rather than deleting the database and re-scraping,
+`migrate()` brings any of them up to the scraper schema in place.
+
+Applied migrations are recorded in a `schema_version` table. Each migration
+runs in its own transaction, so a failure leaves the database at the last
+good version. Large tables are copied in rowid-range batches with
+INSERT ... SELECT, so even multi-million-row databases upgrade in seconds.
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from db_config import connect
+
+DEFAULT_BATCH_SIZE = 50_000
+
+MOVIES_COLUMNS = ('id', 'title', 'worldwide_gross', 'year')
+
+MOVIES_TABLE_SQL = '''
+    CREATE TABLE {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        worldwide_gross INTEGER,
+        year INTEGER
+    )
+'''
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """Register a migration function under a version number."""
+    def register(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+# Helpers used by the migrations
+
+def table_exists(connection, table):
+    """Return True if the table exists."""
+    row = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def column_names(connection, table):
+    """Return the column names of a table, in order."""
+    return [col[1] for col in connection.execute(f'PRAGMA table_info("{table}")').fetchall()]
+
+
+def add_column(connection, table, name, definition):
+    """Add a column if the table doesn't have it yet. Returns True if added."""
+    if name in column_names(connection, table):
+        return False
+    connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {definition}')
+    return True
+
+
+def rename_column(connection, table, old, new):
+    """Rename a column if it exists and the new name is free. Returns True if renamed."""
+    columns = column_names(connection, table)
+    if old not in columns or new in columns:
+        return False
+    connection.execute(f'ALTER TABLE "{table}" RENAME COLUMN "{old}" TO "{new}"')
+    return True
+
+
+def create_index(connection, name, table, columns, unique=False):
+    """Create an index if it doesn't exist yet."""
+    unique_sql = 'UNIQUE ' if unique else ''
+    connection.execute(f'CREATE {unique_sql}INDEX IF NOT EXISTS "{name}" ON "{table}" ({columns})')
+
+
+def copy_table_in_batches(connection, source, target, columns, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Copy columns from one table to another in rowid-range batches.
+
+    Each batch is a single INSERT ... SELECT, so rows never pass through
+    Python. Returns the number of rows copied.
+    """
+    column_list = ', '.join(f'"{c}"' for c in columns)
+    low, high = connection.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{source}"').fetchone()
+    if low is None:
+        return 0
+
+    copied = 0
+    start = low - 1
+    while start < high:
+        end = start + batch_size
+        copied += connection.execute(
+            f'INSERT INTO "{target}" ({column_list}) SELECT {column_list} FROM "{source}" '
+            f'WHERE rowid > ? AND rowid <= ?',
+            (start, end)
+        ).rowcount
+        start = end
+    return copied
+
+
+# The migrations themselves, in order
+
+@migration(1, 'create movies table')
+def _create_movies(connection):
+    if not table_exists(connection, 'movies'):
+        connection.execute(MOVIES_TABLE_SQL.format(name='movies'))
+
+
+@migration(2, 'reconcile legacy movies schemas')
+def _reconcile_legacy_movies(connection):
+    # create_movies_table.py used release_year/box_office instead of year/worldwide_gross
+    rename_column(connection, 'movies', 'release_year', 'year')
+    if add_column(connection, 'movies', 'worldwide_gross', 'INTEGER'):
+        if 'box_office' in column_names(connection, 'movies'):
+            connection.execute('UPDATE movies SET worldwide_gross = CAST(box_office AS INTEGER)')
+
+    if tuple(column_names(connection, 'movies')) == MOVIES_COLUMNS:
+        return
+
+    # Anything else is a wide legacy table: keep it as movies_legacy (with all
+    # its extra columns) and rebuild movies with the scraper schema, keeping ids
+    legacy_name = 'movies_legacy'
+    suffix = 1
+    while table_exists(connection, legacy_name):
+        suffix += 1
+        legacy_name = f'movies_legacy_{suffix}'
+
+    for (index_name,) in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'movies' AND sql IS NOT NULL"
+    ).fetchall():
+        connection.execute(f'DROP INDEX "{index_name}"')
+
+    # Legacy mode keeps foreign keys (e.g. movie_actors) pointing at "movies"
+    connection.execute('PRAGMA legacy_alter_table = ON')
+    try:
+        connection.execute(f'ALTER TABLE movies RENAME TO "{legacy_name}"')
+    finally:
+        connection.execute('PRAGMA legacy_alter_table = OFF')
+
+    connection.execute(MOVIES_TABLE_SQL.format(name='movies'))
+    copied = copy_table_in_batches(connection, legacy_name, 'movies', MOVIES_COLUMNS)
+    print(f"Rebuilt movies from {legacy_name} ({copied} rows)")
+
+
+@migration(3, 'index movies by gross and year')
+def _index_movies(connection):
+    create_index(connection, 'idx_movies_worldwide_gross', 'movies', 'worldwide_gross DESC')
+    create_index(connection, 'idx_movies_year', 'movies', 'year')
+    create_index(connection, 'idx_movies_title', 'movies', 'title')
+
+
+@migration(4, 'create refresh history tables')
+def _create_history_tables(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS refresh_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            duration_seconds REAL NOT NULL,
+            status TEXT NOT NULL,
+            http_status INTEGER,
+            etag TEXT,
+            last_modified TEXT,
+            body_sha256 TEXT,
+            rows_scraped INTEGER,
+            rows_in_table INTEGER,
+            error TEXT
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS movie_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            observed_at TEXT NOT NULL,
+            title TEXT NOT NULL,
+            worldwide_gross INTEGER,
+            year INTEGER
+        )
+    ''')
+    create_index(connection, 'idx_movie_history_title', 'movie_history', 'title, observed_at')
+
+
+@migration(5, 'create multi-language chart table')
+def _create_multiwiki_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS multiwiki_movies (
+            film_key TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            title TEXT NOT NULL,
+            article_key TEXT,
+            worldwide_gross INTEGER,
+            year INTEGER,
+            scraped_at TEXT NOT NULL,
+            PRIMARY KEY (film_key, lang)
+        )
+    ''')
+    create_index(connection, 'idx_multiwiki_movies_lang', 'multiwiki_movies', 'lang, worldwide_gross DESC')
+
+
+@migration(6, 'create movie identity tables')
+def _create_identity_tables(connection):
+    # movies keeps its four columns; identities live alongside it, keyed by article
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS movie_identities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_key TEXT NOT NULL UNIQUE,
+            page_id INTEGER UNIQUE,
+            movie_id INTEGER UNIQUE,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS movie_aliases (
+            identity_id INTEGER NOT NULL REFERENCES movie_identities(id),
+            title TEXT NOT NULL,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL,
+            PRIMARY KEY (identity_id, title)
+        ) WITHOUT ROWID
+    ''')
+    create_index(connection, 'idx_movie_aliases_title', 'movie_aliases', 'title')
+
+    add_column(connection, 'movie_history', 'identity_id', 'INTEGER REFERENCES movie_identities(id)')
+    create_index(connection, 'idx_movie_history_identity', 'movie_history', 'identity_id, observed_at')
+
+
+@migration(7, 'create movie change feed')
+def _create_change_feed(connection):
+    # AUTOINCREMENT so a sequence number is never reused, even after old events are pruned
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS movie_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            changed_at TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            movie_id INTEGER NOT NULL,
+            title TEXT,
+            year INTEGER,
+            old_value INTEGER,
+            new_value INTEGER
+        )
+    ''')
+    create_index(connection, 'idx_movie_changes_movie', 'movie_changes', 'movie_id, seq')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS movie_ranks (
+            movie_id INTEGER PRIMARY KEY,
+            rank INTEGER NOT NULL
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS change_cursors (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+    # Triggers so every writer (save_to_database, MovieWriter, plain SQL) feeds the log
+    now = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS movies_change_insert AFTER INSERT ON movies
+        BEGIN
+            INSERT INTO movie_changes (changed_at, kind, movie_id, title, year, new_value)
+            VALUES ({now}, 'inserted', NEW.id, NEW.title, NEW.year, NEW.worldwide_gross);
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS movies_change_gross AFTER UPDATE OF worldwide_gross ON movies
+        WHEN OLD.worldwide_gross IS NOT NEW.worldwide_gross
+        BEGIN
+            INSERT INTO movie_changes (changed_at, kind, movie_id, title, year, old_value, new_value)
+            VALUES ({now}, 'gross_changed', NEW.id, NEW.title, NEW.year, OLD.worldwide_gross, NEW.worldwide_gross);
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS movies_change_delete AFTER DELETE ON movies
+        BEGIN
+            INSERT INTO movie_changes (changed_at, kind, movie_id, title, year, old_value)
+            VALUES ({now}, 'removed', OLD.id, OLD.title, OLD.year, OLD.worldwide_gross);
+            DELETE FROM movie_ranks WHERE movie_id = OLD.id;
+        END
+    ''')
+
+    # Start the log with the rows already there, so a consumer reading from 0 sees the full table
+    connection.execute(f'''
+        INSERT INTO movie_changes (changed_at, kind, movie_id, title, year, new_value)
+        SELECT {now}, 'inserted', id, title, year, worldwide_gross FROM movies ORDER BY id
+    ''')
+    connection.execute('''
+        INSERT INTO movie_ranks (movie_id, rank)
+        SELECT id, ROW_NUMBER() OVER (ORDER BY worldwide_gross DESC, id) FROM movies
+    ''')
+
+
+@migration(8, 'create row diagnostics table')
+def _create_row_diagnostics(connection):
+    # One row per (body, row, reason), so re-scraping an unchanged page adds nothing
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS parse_diagnostics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            body_sha256 TEXT NOT NULL,
+            row_number INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            row_html TEXT NOT NULL,
+            message TEXT,
+            extractor_version TEXT,
+            status TEXT NOT NULL DEFAULT 'open',
+            recorded_at TEXT NOT NULL,
+            checked_at TEXT,
+            movie_id INTEGER,
+            UNIQUE (body_sha256, row_number, reason)
+        )
+    ''')
+    create_index(connection, 'idx_parse_diagnostics_status', 'parse_diagnostics', 'status, reason')
+
+
+# Running migrations
+
+def _ensure_version_table(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL,
+            duration_seconds REAL NOT NULL
+        )
+    ''')
+
+
+def current_version(connection):
+    """Return the highest applied migration version (0 for a fresh database)."""
+    _ensure_version_table(connection)
+    row = connection.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def migrate(connection, target=None):
+    """
+    Apply every pending migration up to `target` (default: latest).
+
+    Each migration and its schema_version row are committed together.
+    Returns the list of (version, name) pairs that were applied.
+    """
+    # Take manual control of transactions so DDL is covered too
+    previous_isolation = connection.isolation_level
+    if connection.in_transaction:
+        connection.commit()
+    connection.isolation_level = None
+
+    applied = []
+    try:
+        version = current_version(connection)
+        for number, name, func in MIGRATIONS:
+            if number <= version or (target is not None and number > target):
+                continue
+
+            started = time.perf_counter()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                func(connection)
+                connection.execute(
+                    'INSERT INTO schema_version (version, name, applied_at, duration_seconds) VALUES (?, ?, ?, ?)',
+                    (number, name, datetime.now(timezone.utc).isoformat(), time.perf_counter() - started)
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            applied.append((number, name))
+            print(f"Applied migration {number}: {name}")
+    finally:
+        connection.isolation_level = previous_isolation
+
+    return applied
+
+
+def migrate_database(db_path=None, target=None):
+    """Open a database file, migrate it and close it again."""
+    connection = connect(db_path)
+    try:
+        return migrate(connection, target)
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    """Upgrade a database in place and report its schema version."""
+    parser = argparse.ArgumentParser(description='Upgrade movies.db to the current schema in place')
+    parser.add_argument('--db', default=None, help='Path to the movies database (default: $MOVIES_DB or movies.db)')
+    parser.add_argument('--target', type=int, default=None, help='Stop at this schema version')
+    parser.add_argument('--status', action='store_true', help='Only print the current version')
+    args = parser.parse_args(argv)
+
+    connection = connect(args.db)
+    try:
+        if not args.status:
+            applied = migrate(connection, args.target)
+            if not applied:
+                print("Database is already up to date")
+        latest = MIGRATIONS[-1][0]
+        print(f"Schema version {current_version(connection)} (latest {latest})")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
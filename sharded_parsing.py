@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Parallel, sharded parsing of very large chart tables.
+
+Building one BeautifulSoup tree for a table with hundreds of thousands of
+rows, then walking it row by row, is CPU-bound and single-threaded. This
+module skips the big tree: a regex pre-scan over the raw bytes finds
+where the chart table's `<tr>` rows start, the rows are cut into
+contiguous byte shards, and each shard is parsed and cleaned in a
+process pool with the same `clean_row` the sequential extractor uses.
+Shards come back in order, so the result (and the row diagnostics,
+when a list is passed) is identical to `extract_movies` and just faster
+on multi-core machines.
+
+    python sharded_parsing.py page.html --workers 8
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Tables smaller than this are parsed sequentially; process start-up would cost more
+MIN_SHARDED_ROWS = 2000
+
+_TABLE_START = re.compile(rb'<table\b[^>]*\bclass\s*=\s*["\'][^"\']*\bwikitable\b', re.IGNORECASE)
+_TABLE_TAGS = re.compile(rb'<(/?)table\b|<tr[\s>]', re.IGNORECASE)
+_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def document_encoding(content):
+    """Return the charset declared in the page's meta tag (default UTF-8)."""
+    match = _CHARSET.search(content[:4096])
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+
+def scan_rows(content):
+    """
+    Find the byte ranges of the chart table's rows.
+
+    Returns a list of (start, end) offsets, one per `<tr>` directly in the
+    first wikitable (rows of tables nested inside cells are skipped), with
+    the header row first. Returns an empty list if there is no wikitable.
+    """
+    table = _TABLE_START.search(content)
+    if not table:
+        return []
+
+    starts = []
+    depth = 0
+    end = len(content)
+    for match in _TABLE_TAGS.finditer(content, table.start()):
+        if match.group(0)[1:3].lower() == b'tr':
+            if depth == 1:
+                starts.append(match.start())
+        elif match.group(1):
+            depth -= 1
+            if depth == 0:
+                end = match.start()
+                break
+        else:
+            depth += 1
+
+    return [(start, next_start) for start, next_start in zip(starts, starts[1:] + [end])]
+
+
+def plan_shards(rows, shard_count):
+    """Split data rows (header excluded) into contiguous shards of (start, end, first row number)."""
+    data_rows = rows[1:]
+    if not data_rows:
+        return []
+    shard_count = max(1, min(shard_count, len(data_rows)))
+    size, extra = divmod(len(data_rows), shard_count)
+
+    shards = []
+    index = 0
+    for shard in range(shard_count):
+        count = size + (1 if shard < extra else 0)
+        first, last = data_rows[index], data_rows[index + count - 1]
+        shards.append((first[0], last[1], index + 1))
+        index += count
+    return shards
+
+
+def parse_shard(fragment, encoding='utf-8', keys=False, first_row=1, body_sha256=None):
+    """
+    Parse a run of raw `<tr>` rows and clean them.
+
+    Runs in a worker process. Returns (movies, errors, diagnostics) where
+    errors are messages for rows that could not be processed, numbered
+    like the sequential extractor's rows. Row diagnostics are only
+    collected when the `body_sha256` of the whole page is given.
+    """
+    from bs4 import BeautifulSoup
+
+    from wikipedia_scraping import _diagnose, clean_row
+
+    if isinstance(fragment, bytes):
+        fragment = fragment.decode(encoding, errors='replace')
+    soup = BeautifulSoup(f'<table>{fragment}</table>', 'html.parser')
+
+    # A shard can start or end inside a <thead>/<tbody>/<tfoot>, so take every row
+    # whose nearest table is the wrapper (not one nested in a cell) at any depth
+    rows = [row for row in soup.table.find_all('tr') if row.find_parent('table') is soup.table]
+
+    movies, errors, diagnostics = [], [], []
+    collect = body_sha256 is not None
+    for i, row in enumerate(rows, first_row):
+        cells = row.find_all(['td', 'th'])
+        if len(cells) < 5:
+            errors.append(f"Row {i}: Insufficient columns ({len(cells)} found, need at least 5)")
+            if collect:
+                _diagnose(diagnostics, body_sha256, i, row, 'insufficient_columns',
+                          f"{len(cells)} cells found, need at least 5")
+            continue
+        issues = []
+        try:
+            movie = clean_row(cells, keys, issues)
+        except (ValueError, AttributeError, IndexError) as e:
+            errors.append(f"Error processing row {i}: {e}")
+            if collect:
+                _diagnose(diagnostics, body_sha256, i, row, 'row_error', str(e))
+            continue
+        if movie:
+            movies.append(movie)
+        if collect:
+            for reason in issues:
+                _diagnose(diagnostics, body_sha256, i, row, reason)
+    return movies, errors, diagnostics
+
+
+def extract_movies_sharded(content, workers=None, keys=False, shards_per_worker=4,
+                           executor=None, min_rows=MIN_SHARDED_ROWS, diagnostics=None):
+    """
+    Extract movies like `extract_movies`, parsing shards of rows in parallel.
+
+    `workers` defaults to the CPU count. Pass an existing
+    ProcessPoolExecutor as `executor` to reuse warm workers across pages.
+    Small tables are parsed sequentially. Pass a list as `diagnostics` to
+    collect the rejected and defaulted rows, in row order.
+    """
+    from wikipedia_scraping import extract_movies
+
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    rows = scan_rows(content)
+    if len(rows) - 1 < min_rows:
+        return extract_movies(content, keys=keys, diagnostics=diagnostics)
+    body_sha256 = None
+    if diagnostics is not None:
+        import hashlib
+        body_sha256 = hashlib.sha256(content).hexdigest()
+
+    workers = workers or os.cpu_count() or 1
+    encoding = document_encoding(content)
+    # A few shards per worker keeps every core busy when some shards parse slower
+    shards = plan_shards(rows, workers * shards_per_worker)
+    fragments = [content[start:end] for start, end, _ in shards]
+    first_rows = [first for _, _, first in shards]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = list(executor.map(parse_shard, fragments, [encoding] * len(shards),
+                                    [keys] * len(shards), first_rows, [body_sha256] * len(shards)))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    movies = []
+    for shard_movies, errors, shard_diagnostics in results:
+        movies.extend(shard_movies)
+        for error in errors:
+            print(error)
+        if diagnostics is not None:
+            diagnostics.extend(shard_diagnostics)
+    print(f"Successfully scraped {len(movies)} movies from {len(rows) - 1} rows in {len(shards)} shards")
+    return movies
+
+
+def main(argv=None):
+    """Parse a saved page with the sharded parser and report the timing."""
+    parser = argparse.ArgumentParser(description='Parse a large chart page in parallel shards')
+    parser.add_argument('file', help='Saved HTML page')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    with open(args.file, 'rb') as f:
+        content = f.read()
+    started = time.perf_counter()
+    movies = extract_movies_sharded(content, workers=args.workers)
+    print(f"✅ Parsed {len(movies):,} movies in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
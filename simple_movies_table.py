@@ -5,6 +5,8 @@ Simple Python script to create a movies table using sqlite3 module.
 
 import sqlite3
 
+from db_config import connect
+
 def create_movies_table():
     """
     Create a movies table with comprehensive columns and data types.
@@ -13,7 +15,7 @@ def create_movies_table():
     try:
         # Connect to the SQLite database
         print("Connecting to movies.db...")
-        connection = sqlite3.connect('movies.db')
+        connection = connect()
         cursor = connection.cursor()
         
         # First, let's check if the table already exists and its structure
@@ -133,7 +135,7 @@ def demonstrate_table_operations():
     print("DEMONSTRATION OF TABLE OPERATIONS")
     print("="*50)
     
-    connection = sqlite3.connect('movies.db')
+    connection = connect()
     cursor = connection.cursor()
     
     # Example queries
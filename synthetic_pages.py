@@ -0,0 +1,103 @@
+"""
+Synthetic "highest-grossing films" pages of any size.
+
+The pages use the same layout as the English Wikipedia chart (Rank,
+Peak, Title, Worldwide gross, Year, Ref), so `extract_movies` parses
+them like the real thing. A given (rows, seed) always produces the same
+bytes, which makes them usable as load-test and benchmark inputs.
+
+With `quirks=True` the rows also carry what the live page throws at the
+extractor: `<sup>` footnotes with nested links in the title and gross
+cells, linked years, titles without a link, Ref and Year cells that span
+two rows, and rows with missing cells. Scaling tests use these pages so
+they exercise the same code paths as the real page.
+"""
+
+import random
+
+PAGE_HEAD = (
+    '<!DOCTYPE html>\n<html><head><title>List of highest-grossing films</title></head><body>\n'
+    '<table class="wikitable sortable">\n'
+    '<tr><th>Rank</th><th>Peak</th><th>Title</th><th>Worldwide gross</th><th>Year</th><th>Ref</th></tr>\n'
+)
+PAGE_TAIL = '</table>\n</body></html>\n'
+
+WORDS = ('Avatar', 'Avengers', 'Titanic', 'Jurassic', 'Frozen', 'Lion', 'King', 'Star', 'Wars', 'Return',
+         'Empire', 'Night', 'Fast', 'Furious', 'Toy', 'Story', 'Dark', 'Knight', 'Incredibles', 'Minions')
+
+
+def synthetic_title(rank, rng):
+    """Return a made-up but stable film title for a rank."""
+    return f"{' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))} {rank}"
+
+
+def synthetic_row(rank, rows, rng):
+    """Return the HTML of one chart row; grosses fall as the rank rises."""
+    title = synthetic_title(rank, rng)
+    gross = 1_000_000_000 + (rows - rank) * 1_000 + rng.randrange(1_000)
+    year = rng.randint(1975, 2024)
+    return (f'<tr><td>{rank}</td><td>{rng.randint(1, rank)}</td>'
+            f'<th><i><a href="/wiki/{title.replace(" ", "_")}">{title}</a></i></th>'
+            f'<td>${gross:,}</td><td>{year}</td><td><sup>[{rank}]</sup></td></tr>\n')
+
+
+def quirky_row(rank, rows, rng, spans):
+    """
+    Return one chart row with the irregularities of the live page.
+
+    `spans` carries rowspans between rows: a cell that spans two rows is
+    left out of the next row. About 2% of rows are cut short after the
+    title, which the extractor rejects; a row under a spanning Year cell
+    has its year defaulted, like on the real page.
+    """
+    title = synthetic_title(rank, rng)
+    gross = 1_000_000_000 + (rows - rank) * 1_000 + rng.randrange(1_000)
+    year = rng.randint(1975, 2024)
+    skip_ref, skip_year = spans.pop('ref', False), spans.pop('year', False)
+
+    if rng.random() < 0.05:
+        title_cell = f'<th>{title}<sup>[nb {rank % 9 + 1}]</sup></th>'
+    else:
+        footnote = ''
+        if rng.random() < 0.3:
+            footnote = f'<sup class="reference"><a href="#cite_note-{rank}">[{rank % 50 + 1}]</a></sup>'
+        title_cell = f'<th><i><a href="/wiki/{title.replace(" ", "_")}">{title}</a></i>{footnote}</th>'
+    cells = [f'<td>{rank}</td>', f'<td>{rng.randint(1, rank)}</td>', title_cell]
+
+    if rng.random() < 0.02:
+        return f'<tr>{"".join(cells)}</tr>\n'
+
+    marker = '<sup><a href="#cite_note-F">F</a></sup>' if rng.random() < 0.1 else ''
+    cells.append(f'<td><span data-sort-value="{gross}">${gross:,}</span>{marker}</td>')
+
+    # Only start a span when none is running and there is a row left to span into
+    spanning = rank < rows and not skip_ref and not skip_year
+    if not skip_year:
+        year_text = f'<a href="/wiki/{year}_in_film">{year}</a>' if rng.random() < 0.5 else str(year)
+        if spanning and rng.random() < 0.03:
+            cells.append(f'<td rowspan="2">{year_text}</td>')
+            spans['year'] = True
+            spanning = False
+        else:
+            cells.append(f'<td>{year_text}</td>')
+    if not skip_ref:
+        ref = f'<sup class="reference"><a href="#cite_note-gross-{rank}">[# {rank}]</a></sup>'
+        if spanning and rng.random() < 0.05:
+            cells.append(f'<td rowspan="2">{ref}</td>')
+            spans['ref'] = True
+        else:
+            cells.append(f'<td>{ref}</td>')
+    return f'<tr>{"".join(cells)}</tr>\n'
+
+
+def synthetic_page(rows, seed=0, quirks=False):
+    """Return a chart page with `rows` films as UTF-8 bytes."""
+    rng = random.Random(seed)
+    parts = [PAGE_HEAD]
+    if quirks:
+        spans = {}
+        parts.extend(quirky_row(rank, rows, rng, spans) for rank in range(1, rows + 1))
+    else:
+        parts.extend(synthetic_row(rank, rows, rng) for rank in range(1, rows + 1))
+    parts.append(PAGE_TAIL)
+    return ''.join(parts).encode()
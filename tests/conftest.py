@@ -0,0 +1,40 @@
+import os
+import shutil
+import pytest
+from db_config import DB_ENV_VAR, clone_database, connect, temp_database_path
+from schema_migrations import migrate
+
+SEED_MOVIES = [
+    ('Avatar', 2923706026, 2009),
+    ('Avengers: Endgame', 2797501328, 2019),
+    ('Avatar: The Way of Water', 2320250281, 2022),
+    ('Titanic', 2257906828, 1997),
+    ('Star Wars: The Force Awakens', 2068223624, 2015),
+    ('Avengers: Infinity War', 2048359754, 2018),
+    ('Spider-Man: No Way Home', 1921847111, 2021),
+    ('Inside Out 2', 1698863816, 2024),
+    ('Jurassic World', 1671537444, 2015),
+    ('The Lion King', 1656943394, 2019),
+    ('The Avengers', 1520538536, 2012),
+    ('Jurassic Park', 1104000000, 1993),
+]
+
+@pytest.fixture(scope='session')
+def template_db():
+    """Seeded template database, built once per test worker"""
+    path = temp_database_path('movies-template')
+    connection = connect(path)
+    migrate(connection)
+    connection.executemany('INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)', SEED_MOVIES)
+    connection.commit()
+    connection.close()
+    yield path
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+@pytest.fixture
+def movies_db(template_db, tmp_path, monkeypatch):
+    """Per-test copy of the seeded template, also exported as MOVIES_DB"""
+    path = str(tmp_path / 'movies.db')
+    clone_database(template_db, path).close()
+    monkeypatch.setenv(DB_ENV_VAR, path)
+    return path
@@ -0,0 +1,69 @@
+import sqlite3
+import pytest
+from backup_snapshots import backup_database, create_backup, list_backups, main, open_snapshot, restore_backup
+from db_config import clone_database
+from reset_database import reset_database
+
+def count_movies(path):
+    connection = sqlite3.connect(path)
+    count = connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+    connection.close()
+    return count
+
+def test_backup_and_restore(movies_db, tmp_path):
+    """Restoring a backup should bring back the rows deleted after it was taken"""
+    backup = backup_database(str(tmp_path / 'backup.db'), movies_db, pages=1)
+    connection = sqlite3.connect(movies_db)
+    connection.execute('DELETE FROM movies')
+    connection.commit()
+    connection.close()
+
+    restore_backup(backup, movies_db)
+    assert count_movies(movies_db) == 12
+
+def test_rotation_keeps_newest(movies_db, tmp_path):
+    """Only the newest `retention` backups should be kept"""
+    backup_dir = str(tmp_path / 'backups')
+    paths = [create_backup(backup_dir, movies_db, retention=2) for _ in range(4)]
+    assert list_backups(backup_dir) == paths[-2:]
+
+def test_list_only_shows_backups_of_the_given_database(movies_db, tmp_path, capsys):
+    """Backups of another database in the same directory should not be listed or rotated"""
+    other_db = str(tmp_path / 'movies-archive.db')
+    clone_database(movies_db, other_db).close()
+    ours = create_backup(source=movies_db, retention=1)
+    theirs = [create_backup(source=other_db, backup_dir=str(tmp_path / 'backups'), retention=1) for _ in range(2)]
+
+    main(['list', '--db', movies_db])
+    assert [line.split()[0] for line in capsys.readouterr().out.splitlines()] == [ours]
+    main(['list', '--db', other_db])
+    assert [line.split()[0] for line in capsys.readouterr().out.splitlines()] == theirs[-1:]
+
+def test_reset_keeps_its_backups_apart(movies_db, tmp_path):
+    """Backups taken by a wipe should neither be pruned nor push out the rotated backups"""
+    rotated = [create_backup(source=movies_db, retention=2) for _ in range(2)]
+    for _ in range(3):
+        reset_database(movies_db)
+    assert list_backups(str(tmp_path / 'backups')) == rotated
+    assert len(list_backups(str(tmp_path / 'backups' / 'pre-reset'))) == 3
+
+def test_snapshot_is_read_only_and_isolated(movies_db):
+    """A snapshot should not see later writes and should refuse writes itself"""
+    with open_snapshot(movies_db) as snapshot:
+        connection = sqlite3.connect(movies_db)
+        connection.execute('DELETE FROM movies')
+        connection.commit()
+        connection.close()
+
+        assert snapshot.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 12
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot.execute('DELETE FROM movies')
+
+def test_retention_below_one_is_rejected(movies_db, tmp_path):
+    """A retention that would delete the new backup too should be refused before anything is written"""
+    backup_dir = str(tmp_path / 'backups')
+    with pytest.raises(ValueError):
+        create_backup(backup_dir, movies_db, retention=0)
+    with pytest.raises(SystemExit):
+        main(['backup', '--db', movies_db, '--backup-dir', backup_dir, '--retention', '-1'])
+    assert list_backups(backup_dir) == []
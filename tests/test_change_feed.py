@@ -0,0 +1,70 @@
+from change_feed import get_cursor, latest_seq, prune_changes, read_changes, record_rank_changes, tail_changes
+from db_config import connect
+from movie_identity import save_identified
+from wikipedia_scraping import save_to_database
+from write_queue import MovieWriter
+
+def keyed(title, gross, year, key):
+    return {'title': title, 'worldwide_gross': gross, 'year': str(year), 'article_key': key}
+
+def test_existing_rows_start_the_log(movies_db):
+    """A consumer starting from zero should see every seeded row as inserted"""
+    connection = connect(movies_db)
+    events = read_changes(connection)
+    assert [event['kind'] for event in events] == ['inserted'] * 12
+    assert [event['seq'] for event in events] == sorted(event['seq'] for event in events)
+    connection.close()
+
+def test_write_paths_log_typed_events(movies_db):
+    """Upserts, rank moves and replaced-away rows should each log their own event kind"""
+    connection = connect(movies_db)
+    record_rank_changes(connection)
+    connection.commit()
+    start = latest_seq(connection)
+
+    frozen = keyed('Frozen', 1290000000, 2013, 'Frozen_(2013_film)')
+    save_to_database([frozen], connection=connection)
+    movie_id = connection.execute('SELECT MAX(id) FROM movies').fetchone()[0]
+    save_to_database([dict(frozen, worldwide_gross=3_000_000_000)], connection=connection)
+
+    events = read_changes(connection, start)
+    own = [event for event in events if event['movie_id'] == movie_id]
+    assert [event['kind'] for event in own] == ['inserted', 'gross_changed', 'rank_changed']
+    assert (own[1]['old_value'], own[1]['new_value']) == (1290000000, 3_000_000_000)
+    ranks = {event['title']: (event['old_value'], event['new_value'])
+             for event in events if event['kind'] == 'rank_changed'}
+    assert ranks['Frozen'] == (12, 1)
+    assert ranks['Avatar'] == (1, 2)
+    assert ranks['Jurassic Park'] == (12, 13)
+
+    start = latest_seq(connection)
+    save_identified(connection, [frozen], replace=True)
+    connection.commit()
+    kinds = [event['kind'] for event in read_changes(connection, start)]
+    assert kinds.count('removed') == 12 and 'gross_changed' in kinds
+    connection.close()
+
+def test_movie_writer_logs_inserts(movies_db):
+    """Rows committed through the single-writer queue should reach the feed too"""
+    with MovieWriter(movies_db) as writer:
+        writer.submit([('Frozen II', 1453683476, 2019)]).result()
+    connection = connect(movies_db)
+    assert read_changes(connection, 12)[0]['title'] == 'Frozen II'
+    connection.close()
+
+def test_tail_resumes_from_stored_cursor(movies_db):
+    """A consumer's cursor should advance per processed batch and survive a restart"""
+    connection = connect(movies_db)
+    tail = tail_changes(connection, 'indexer', batch_size=5)
+    assert [event['seq'] for event in next(tail)] == [1, 2, 3, 4, 5]
+    next(tail)
+    tail.close()
+    # The second batch was handed out but not acknowledged, so it is replayed
+    assert get_cursor(connection, 'indexer') == 5
+    batches = list(tail_changes(connection, 'indexer', batch_size=5))
+    assert [len(batch) for batch in batches] == [5, 2]
+    assert get_cursor(connection, 'indexer') == 12
+
+    assert prune_changes(connection) == 12
+    assert read_changes(connection) == []
+    connection.close()
@@ -0,0 +1,41 @@
+import sqlite3
+from db_config import DB_ENV_VAR, clone_database, connect, get_db_path
+from wikipedia_scraping import save_to_database
+
+def test_explicit_path_beats_environment(monkeypatch):
+    """An explicit path should win over MOVIES_DB, which should win over the default"""
+    monkeypatch.setenv(DB_ENV_VAR, '/tmp/from-env.db')
+    assert get_db_path('/tmp/explicit.db') == '/tmp/explicit.db'
+    assert get_db_path() == '/tmp/from-env.db'
+    monkeypatch.delenv(DB_ENV_VAR)
+    assert get_db_path() == 'movies.db'
+
+def test_temp_target_is_per_worker(monkeypatch):
+    """The 'temp' target should resolve to the same temp file within one worker"""
+    monkeypatch.setenv(DB_ENV_VAR, 'temp')
+    assert get_db_path() == get_db_path()
+    assert get_db_path() != 'movies.db'
+
+def test_named_memory_database_is_shared():
+    """Connections to the same named in-memory database should see each other's data"""
+    first = connect('memory:shared-test')
+    first.execute('CREATE TABLE t (x INTEGER)')
+    first.execute('INSERT INTO t VALUES (1)')
+    first.commit()
+    second = connect('memory:shared-test')
+    assert second.execute('SELECT x FROM t').fetchall() == [(1,)]
+    second.close()
+    first.close()
+
+def test_clone_template_into_memory(template_db):
+    """Cloning the template should copy its data into an in-memory database"""
+    clone = clone_database(template_db)
+    assert clone.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 12
+    clone.close()
+
+def test_production_code_writes_to_configured_database(movies_db):
+    """save_to_database should write to the database named by MOVIES_DB"""
+    save_to_database([{'title': 'Frozen II', 'worldwide_gross': 1453683476, 'year': '2019'}])
+    connection = sqlite3.connect(movies_db)
+    assert connection.execute("SELECT COUNT(*) FROM movies WHERE title = 'Frozen II'").fetchone()[0] == 1
+    connection.close()
@@ -0,0 +1,119 @@
+import csv
+import sqlite3
+import pytest
+from export_movies import export_database, find_export_tables
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide a movies database with a history table"""
+    path = tmp_path / 'movies.db'
+    connection = sqlite3.connect(path)
+    connection.execute('''
+        CREATE TABLE movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            worldwide_gross INTEGER,
+            year INTEGER
+        )
+    ''')
+    connection.execute('CREATE TABLE movie_history (title TEXT, worldwide_gross INTEGER, observed_at TEXT)')
+    connection.executemany(
+        'INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)',
+        [(f'Movie {i}', 1_000_000_000 + i, 2000 + i % 20) for i in range(25)]
+    )
+    connection.commit()
+    connection.close()
+    return str(path)
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+def test_finds_movies_and_history_tables(db_path):
+    """The movies table should come first, followed by history tables"""
+    connection = sqlite3.connect(db_path)
+    assert find_export_tables(connection) == ['movies', 'movie_history']
+    connection.close()
+
+def test_csv_export_in_small_batches(db_path, tmp_path):
+    """All rows should be exported even when the batch size is tiny"""
+    results = export_database(db_path, str(tmp_path / 'out'), 'csv', batch_size=4)
+    movies = dict((table, (path, count)) for table, path, count in results)['movies']
+    rows = read_csv(movies[0])
+    assert movies[1] == 25
+    assert rows[0] == ['id', 'title', 'worldwide_gross', 'year']
+    assert len(rows) == 26
+
+def test_incremental_export_only_new_rows(db_path, tmp_path):
+    """A second incremental export should only contain rows added since the first"""
+    out = str(tmp_path / 'out')
+    export_database(db_path, out, 'csv', incremental=True, tables=['movies'])
+
+    connection = sqlite3.connect(db_path)
+    connection.execute("INSERT INTO movies (title, worldwide_gross, year) VALUES ('New', 1500000000, 2024)")
+    connection.commit()
+    connection.close()
+
+    [(table, path, count)] = export_database(db_path, out, 'csv', incremental=True, tables=['movies'])
+    assert count == 1
+    assert read_csv(path)[1][1] == 'New'
+
+def test_parquet_column_types(db_path, tmp_path):
+    """Parquet exports should use int64 for grosses and int16 for years"""
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    [(table, path, count)] = export_database(db_path, str(tmp_path / 'out'), 'parquet', tables=['movies'])
+    schema = pq.read_schema(path)
+    assert schema.field('worldwide_gross').type == pa.int64()
+    assert schema.field('year').type == pa.int16()
+
+def test_incremental_export_follows_the_change_feed(movies_db, tmp_path):
+    """Rows updated in place should be exported again when the change feed is available"""
+    out = str(tmp_path / 'out')
+    [(_, path, count)] = export_database(movies_db, out, 'csv', incremental=True, tables=['movies'])
+    assert count == 12
+
+    connection = sqlite3.connect(movies_db)
+    connection.execute("UPDATE movies SET worldwide_gross = 3000000000 WHERE title = 'Titanic'")
+    connection.execute("INSERT INTO movies (title, worldwide_gross, year) VALUES ('New', 1500000000, 2024)")
+    connection.commit()
+    connection.close()
+
+    [(_, path, count)] = export_database(movies_db, out, 'csv', incremental=True, tables=['movies'])
+    assert [row[1:3] for row in read_csv(path)[1:]] == [['Titanic', '3000000000'], ['New', '1500000000']]
+    [(_, path, count)] = export_database(movies_db, out, 'csv', incremental=True, tables=['movies'])
+    assert count == 0
+
+def test_pruning_keeps_events_the_exporter_has_not_read(movies_db, tmp_path):
+    """The exporter's cursor should hold back pruning, and pruned events should force a full export"""
+    from change_feed import get_cursor, latest_seq, prune_changes
+    from export_movies import change_feed_bounds
+
+    out = str(tmp_path / 'out')
+    connection = sqlite3.connect(movies_db)
+    prune_changes(connection, before=latest_seq(connection))
+    [(_, path, count)] = export_database(movies_db, out, 'csv', incremental=True, tables=['movies'])
+    assert count == 12
+    assert get_cursor(connection, 'export:csv') == change_feed_bounds(connection)[1]
+
+    connection.execute("UPDATE movies SET worldwide_gross = 3000000000 WHERE title = 'Titanic'")
+    connection.commit()
+    prune_changes(connection, before=latest_seq(connection))
+    [(_, path, count)] = export_database(movies_db, out, 'csv', incremental=True, tables=['movies'])
+    assert [row[1] for row in read_csv(path)[1:]] == ['Titanic']
+    connection.close()
+
+def test_rank_columns_hold_large_tables(tmp_path):
+    """Rank columns should export past 32767 rows"""
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'ranks.db')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE movie_ranks (movie_id INTEGER PRIMARY KEY, rank INTEGER NOT NULL)')
+    connection.executemany('INSERT INTO movie_ranks VALUES (?, ?)', ((i, i) for i in range(1, 40_001)))
+    connection.commit()
+    connection.close()
+
+    [(_, out, count)] = export_database(path, str(tmp_path / 'out'), 'parquet', tables=['movie_ranks'])
+    assert count == 40_000
+    assert pq.read_schema(out).field('rank').type == pa.int32()
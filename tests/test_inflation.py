@@ -0,0 +1,87 @@
+import sqlite3
+import pytest
+from inflation import build_multipliers, update_adjusted_grosses
+
+@pytest.fixture
+def movies_db():
+    """Fixture to provide an in-memory movies database with a few rows"""
+    connection = sqlite3.connect(':memory:')
+    connection.execute('''
+        CREATE TABLE movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            worldwide_gross INTEGER,
+            year INTEGER
+        )
+    ''')
+    connection.executemany(
+        'INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)',
+        [('Avatar', 2923706026, 2009), ('Titanic', 2257906828, 1997), ('Jurassic Park', 1104000000, 1993)]
+    )
+    connection.commit()
+    yield connection
+    connection.close()
+
+def test_multipliers_are_one_at_reference_year():
+    """The reference year's own multiplier should be exactly 1"""
+    first_year, multipliers = build_multipliers(2000)
+    assert multipliers[2000 - first_year] == 1.0
+    assert multipliers[1990 - first_year] > 1.0
+
+def test_reference_year_outside_series_rejected():
+    """A reference year the CPI series does not cover should raise"""
+    with pytest.raises(ValueError):
+        build_multipliers(1800)
+
+def test_adjusted_grosses_and_ranks(movies_db):
+    """Older movies should move up the ranking once adjusted for inflation"""
+    update_adjusted_grosses(movies_db, reference_year=2024)
+    rows = dict(movies_db.execute(
+        'SELECT m.title, a.adjusted_rank FROM movies_adjusted a JOIN movies m ON m.id = a.movie_id'
+    ).fetchall())
+    assert rows == {'Titanic': 1, 'Avatar': 2, 'Jurassic Park': 3}
+
+def test_reference_change_rescales_without_recomputing(movies_db):
+    """Changing the reference year should rescale values in place and keep the order"""
+    update_adjusted_grosses(movies_db, reference_year=2024)
+    summary = update_adjusted_grosses(movies_db, reference_year=2009)
+    assert summary['updated'] == 0
+    assert summary['reranked'] is True
+    assert dict(movies_db.execute(
+        'SELECT m.title, a.adjusted_rank FROM movies_adjusted a JOIN movies m ON m.id = a.movie_id'
+    ).fetchall()) == {'Titanic': 1, 'Avatar': 2, 'Jurassic Park': 3}
+
+    (avatar,) = movies_db.execute(
+        "SELECT adjusted_gross FROM movies_adjusted a JOIN movies m ON m.id = a.movie_id WHERE m.title = 'Avatar'"
+    ).fetchone()
+    assert avatar == 2923706026
+
+def test_only_changed_rows_recomputed(movies_db):
+    """A second run should only touch rows whose nominal gross changed"""
+    update_adjusted_grosses(movies_db, reference_year=2024)
+    movies_db.execute("UPDATE movies SET worldwide_gross = 3000000000 WHERE title = 'Avatar'")
+    movies_db.commit()
+
+    summary = update_adjusted_grosses(movies_db, reference_year=2024)
+    assert summary['updated'] == 1
+
+def test_rescale_rounding_ties_are_reranked(movies_db):
+    """Grosses that only round to the same value in the new reference year should share a rank"""
+    movies_db.execute('DELETE FROM movies')
+    movies_db.executemany('INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)',
+                          [('A', 1, 2024), ('B', 2, 2024)])
+    movies_db.commit()
+    update_adjusted_grosses(movies_db, reference_year=2024)
+    update_adjusted_grosses(movies_db, reference_year=1950)
+    assert movies_db.execute('SELECT adjusted_gross, adjusted_rank FROM movies_adjusted').fetchall() == [(0, 1), (0, 1)]
+
+def test_movies_without_a_year_are_counted(movies_db):
+    """Movies with no year should be reported as skipped and dropped from the adjusted table"""
+    update_adjusted_grosses(movies_db, reference_year=2024)
+    movies_db.execute("UPDATE movies SET year = NULL WHERE title = 'Avatar'")
+    movies_db.execute("INSERT INTO movies (title, worldwide_gross, year) VALUES ('Undated', 1000000000, NULL)")
+    movies_db.commit()
+
+    summary = update_adjusted_grosses(movies_db, reference_year=2024)
+    assert (summary['skipped'], summary['removed']) == (2, 1)
+    assert movies_db.execute('SELECT COUNT(*) FROM movies_adjusted').fetchone() == (2,)
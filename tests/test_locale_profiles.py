@@ -0,0 +1,73 @@
+import pytest
+from db_config import connect
+from locale_profiles import get_profile, map_columns, parse_amount
+from multiwiki_scraping import extract_localized, reconcile, save_editions
+from wikipedia_scraping import article_key
+
+GERMAN_PAGE = '''
+<html><body>
+<table class="wikitable">
+<tr><th>Platz</th><th>Filmtitel</th><th>Jahr</th><th>Einspielergebnis<sup>[1]</sup></th></tr>
+<tr><td>1</td><td><i><a href="/wiki/Avatar_%E2%80%93_Aufbruch_nach_Pandora">Avatar – Aufbruch nach Pandora</a></i></td><td>2009</td><td>2.923.706.026 $</td></tr>
+<tr><td>2</td><td><i><a href="/wiki/Avengers:_Endgame">Avengers: Endgame</a></i><sup>[2]</sup></td><td>2019</td><td>2,80 Mrd. US-$</td></tr>
+<tr><td colspan="4">Stand: 2024</td></tr>
+</table>
+</body></html>
+'''
+
+@pytest.mark.parametrize('lang, text, expected', [
+    ('en', '$2,923,706,026', 2923706026),
+    ('en', '$2.92 billion[a]', 2920000000),
+    ('de', '2.923.706.026 $', 2923706026),
+    ('de', '2,92 Mrd. US-$', 2920000000),
+    ('fr', '2 923 706 026 $', 2923706026),
+    ('it', '2,8 miliardi di dollari', 2800000000),
+])
+def test_parse_amount_formats(lang, text, expected):
+    """Amounts should parse in each edition's number format"""
+    assert parse_amount(text, get_profile(lang)) == expected
+
+def test_map_columns_by_header_text():
+    """Columns should be found by header text, whatever their order"""
+    columns = map_columns(['Rang', 'Titre', 'Année', 'Recettes mondiales[1]'], get_profile('fr'))
+    assert columns == {'title': 1, 'gross': 3, 'year': 2, 'rank': 0}
+
+def test_article_key_normalizes_links():
+    """Article links should reduce to a canonical key, and other links to None"""
+    assert article_key('/wiki/Avatar_(2009_film)#Box_office') == 'Avatar_(2009_film)'
+    assert article_key('/wiki/avengers:_Endgame') == 'Avengers:_Endgame'
+    assert article_key('/wiki/File:Poster.jpg') is None
+    assert article_key('#cite_note-1') is None
+
+def test_extract_localized_german_table():
+    """A German chart should parse with its own columns and number format"""
+    films = extract_localized(GERMAN_PAGE, get_profile('de'), 'de')
+    assert [film['title'] for film in films] == ['Avatar – Aufbruch nach Pandora', 'Avengers: Endgame']
+    assert films[0]['article_key'] == 'Avatar_–_Aufbruch_nach_Pandora'
+    assert films[0]['worldwide_gross'] == 2923706026
+    assert films[1]['worldwide_gross'] == 2800000000
+    assert films[1]['year'] == '2019'
+
+def test_reconcile_merges_editions_by_wikidata_id(tmp_path):
+    """Editions of the same film should share one key in multiwiki_movies"""
+    films = [
+        {'lang': 'en', 'title': 'Avatar', 'article_key': 'Avatar_(2009_film)',
+         'worldwide_gross': 2923706026, 'year': '2009', 'wikidata_id': 'Q24871'},
+        {'lang': 'de', 'title': 'Avatar – Aufbruch nach Pandora', 'article_key': 'Avatar_–_Aufbruch_nach_Pandora',
+         'worldwide_gross': 2923706026, 'year': '2009', 'wikidata_id': 'Q24871'},
+        {'lang': 'fr', 'title': 'Titanic', 'article_key': None, 'worldwide_gross': 2257906828, 'year': '1997'},
+        {'lang': 'de', 'title': 'Titanic ', 'article_key': None, 'worldwide_gross': 2257906828, 'year': '1997'},
+    ]
+    rows = reconcile(films)
+    assert len(rows) == 4
+    assert len({row[0] for row in rows}) == 2
+
+    connection = connect(str(tmp_path / 'multiwiki.db'))
+    save_editions(connection, rows)
+    save_editions(connection, rows)
+    languages = connection.execute(
+        "SELECT COUNT(*) FROM multiwiki_movies WHERE film_key = 'Q24871'"
+    ).fetchone()[0]
+    assert languages == 2
+    assert connection.execute('SELECT COUNT(*) FROM multiwiki_movies').fetchone()[0] == 4
+    connection.close()
@@ -0,0 +1,59 @@
+from db_config import connect
+from movie_identity import backfill_history, identities_for_title, identity_for, save_identified
+from tests.test_page_archive import SAMPLE_PAGE
+from wikipedia_scraping import extract_movies, save_to_database
+
+def avatar(title='Avatar', gross=2923706026):
+    return {'title': title, 'worldwide_gross': gross, 'year': '2009', 'article_key': 'Avatar_(2009_film)'}
+
+def test_extractor_adds_article_keys_only_when_asked():
+    """keys=True should add the normalized title link; the default shape stays three keys"""
+    keyed = extract_movies(SAMPLE_PAGE, keys=True)
+    assert [movie['article_key'] for movie in keyed] == ['Avatar_(2009_film)', 'Avengers:_Endgame']
+    assert all(set(movie) == {'title', 'worldwide_gross', 'year'} for movie in extract_movies(SAMPLE_PAGE))
+
+def test_saving_again_updates_the_same_row(movies_db):
+    """Re-saving a film under a new title should update its row and record the alias"""
+    connection = connect(movies_db)
+    save_to_database([avatar()], connection=connection)
+    identity_id, movie_id = identity_for(connection, 'Avatar_(2009_film)')
+
+    save_to_database([avatar('Avatar[a]', 2923710708)], connection=connection)
+    assert identity_for(connection, 'Avatar_(2009_film)') == (identity_id, movie_id)
+    row = connection.execute('SELECT title, worldwide_gross FROM movies WHERE id = ?', (movie_id,)).fetchone()
+    assert row == ('Avatar[a]', 2923710708)
+    assert identities_for_title(connection, 'Avatar') == [identity_id]
+    assert identities_for_title(connection, 'Avatar[a]') == [identity_id]
+    connection.close()
+
+def test_replace_keeps_ids_and_drops_missing_rows(movies_db):
+    """replace=True should keep ids of films still listed and delete the rest"""
+    connection = connect(movies_db)
+    endgame = {'title': 'Avengers: Endgame', 'worldwide_gross': 2797501328, 'year': '2019',
+               'article_key': 'Avengers:_Endgame'}
+    first_ids = save_identified(connection, [avatar(), endgame], replace=True)
+    second_ids = save_identified(connection, [avatar()], replace=True)
+    connection.commit()
+
+    assert second_ids == first_ids[:1]
+    assert connection.execute('SELECT id FROM movies').fetchall() == [(first_ids[0],)]
+    assert identity_for(connection, 'Avengers:_Endgame')[1] is None
+    connection.close()
+
+def test_backfill_links_history_by_unambiguous_alias(movies_db):
+    """Old history rows should be linked through aliases, skipping titles shared by two films"""
+    connection = connect(movies_db)
+    lion_kings = [
+        {'title': 'The Lion King', 'worldwide_gross': 1_663_250_487, 'year': '2019', 'article_key': 'The_Lion_King_(2019_film)'},
+        {'title': 'The Lion King', 'worldwide_gross': 1_063_611_805, 'year': '1994', 'article_key': 'The_Lion_King'},
+    ]
+    save_identified(connection, [avatar()] + lion_kings)
+    connection.executemany(
+        'INSERT INTO movie_history (observed_at, title, worldwide_gross, year) VALUES (?, ?, ?, ?)',
+        [('2024-01-01', 'Avatar', 2923706026, 2009), ('2024-01-01', 'The Lion King', 1663250487, 2019)])
+    connection.commit()
+
+    assert backfill_history(connection) == 1
+    linked = connection.execute('SELECT title FROM movie_history WHERE identity_id IS NOT NULL').fetchall()
+    assert linked == [('Avatar',)]
+    connection.close()
@@ -0,0 +1,142 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from db_config import connect
+from movies_api import MoviesAPI, make_server
+
+@pytest.fixture
+def api_url(movies_db):
+    """Fixture to serve the seeded test database on a local port"""
+    api = MoviesAPI(movies_db)
+    server = make_server(api, port=0, workers=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+    api.close()
+
+def get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def test_top_movies(api_url):
+    """/movies/top should return the highest grossers in order"""
+    status, _, body = get(f'{api_url}/movies/top?n=3')
+    assert status == 200
+    titles = [movie['title'] for movie in json.loads(body)['movies']]
+    assert titles == ['Avatar', 'Avengers: Endgame', 'Avatar: The Way of Water']
+
+def test_pagination_year_and_search(api_url):
+    """List, year and search endpoints should page through matching rows"""
+    page = json.loads(get(f'{api_url}/movies?page=2&per_page=5')[2])
+    assert page['total'] == 12
+    assert len(page['movies']) == 5
+    assert page['movies'][0]['title'] == 'Avengers: Infinity War'
+
+    by_year = json.loads(get(f'{api_url}/movies/year/2019')[2])
+    assert {movie['title'] for movie in by_year['movies']} == {'Avengers: Endgame', 'The Lion King'}
+
+    search = json.loads(get(f'{api_url}/movies/search?q=jurassic')[2])
+    assert search['total'] == 2
+
+def test_bad_requests(api_url):
+    """Bad parameters and unknown paths should get JSON errors"""
+    assert get(f'{api_url}/movies?per_page=abc')[0] == 400
+    assert get(f'{api_url}/movies/search')[0] == 400
+    assert get(f'{api_url}/nothing')[0] == 404
+
+def test_etag_revalidation(api_url, movies_db):
+    """Unchanged data should give a 304, and a commit elsewhere should change the ETag"""
+    status, headers, _ = get(f'{api_url}/movies/top?n=5')
+    etag = headers['ETag']
+    assert status == 200
+
+    assert get(f'{api_url}/movies/top?n=5', {'If-None-Match': etag})[0] == 304
+    assert get(f'{api_url}/movies/top?n=6', {'If-None-Match': etag})[0] == 200
+
+    connection = connect(movies_db)
+    connection.execute("INSERT INTO movies (title, worldwide_gross, year) VALUES ('Frozen II', 1453683476, 2019)")
+    connection.commit()
+    connection.close()
+
+    status, headers, _ = get(f'{api_url}/movies/top?n=5', {'If-None-Match': etag})
+    assert status == 200
+    assert headers['ETag'] != etag
+
+def test_gzip_responses(api_url):
+    """Clients accepting gzip should get a compressed body with its own ETag"""
+    _, plain_headers, plain = get(f'{api_url}/movies')
+    status, headers, body = get(f'{api_url}/movies', {'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(body) == plain
+    assert headers['ETag'] != plain_headers['ETag']
+    assert get(f'{api_url}/movies', {'Accept-Encoding': 'gzip', 'If-None-Match': headers['ETag']})[0] == 304
+
+def test_history(api_url, movies_db):
+    """/movies/history should list observations of one title in time order"""
+    connection = connect(movies_db)
+    connection.executemany(
+        'INSERT INTO movie_history (observed_at, title, worldwide_gross, year) VALUES (?, ?, ?, ?)',
+        [('2024-01-02', 'Avatar', 2923706026, 2009), ('2024-01-01', 'Avatar', 2900000000, 2009)])
+    connection.commit()
+    connection.close()
+
+    history = json.loads(get(f'{api_url}/movies/history?title=Avatar')[2])['history']
+    assert [entry['observed_at'] for entry in history] == ['2024-01-01', '2024-01-02']
+
+def test_fingerprint_is_cached_and_covers_identities(movies_db, monkeypatch):
+    """A worker should hash once until another connection commits, and an identity change should change the hash"""
+    import movies_api
+
+    calls = []
+    def counting_fingerprint(connection):
+        calls.append(connection)
+        return original(connection)
+    original = movies_api.data_fingerprint
+    monkeypatch.setattr(movies_api, 'data_fingerprint', counting_fingerprint)
+
+    api = MoviesAPI(movies_db)
+    state = api._reader()
+    first = api.fingerprint(state)
+    assert api.fingerprint(state) == first and len(calls) == 1
+
+    connection = connect(movies_db)
+    connection.execute("INSERT INTO movie_identities (article_key, movie_id, first_seen, last_seen) "
+                       "VALUES ('Avatar_(2009_film)', 1, '2024-01-01', '2024-01-01')")
+    connection.commit()
+    connection.close()
+    assert api.fingerprint(state) != first
+    assert len(calls) == 2
+    api.close()
+
+def test_commit_during_a_request_does_not_mislabel_the_body(movies_db, monkeypatch):
+    """A commit between the worker's BEGIN and the hash should not give old data the new data's ETag"""
+    import movies_api
+
+    writer = connect(movies_db)
+    writer.execute('PRAGMA journal_mode = WAL')
+    def commit_then_hash(connection):
+        if writer.total_changes == 0:
+            writer.execute("UPDATE movies SET worldwide_gross = 3000000000 WHERE title = 'Avatar'")
+            writer.commit()
+        return original(connection)
+    original = movies_api.data_fingerprint
+    monkeypatch.setattr(movies_api, 'data_fingerprint', commit_then_hash)
+
+    api = MoviesAPI(movies_db)
+    status, headers, body = api.handle('/movies/top?n=1')
+    assert json.loads(body)['movies'][0]['worldwide_gross'] == 2923706026
+
+    status, headers, body = api.handle('/movies/top?n=1', if_none_match=headers['ETag'])
+    assert status == 200
+    assert json.loads(body)['movies'][0]['worldwide_gross'] == 3000000000
+    api.close()
+    writer.close()
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from movies_cli import main
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide a small movies database"""
+    path = str(tmp_path / 'movies.db')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE movies (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, worldwide_gross INTEGER, year INTEGER)')
+    connection.executemany('INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)',
+                           [('Avatar', 2923706026, 2009), ('Titanic', 2257906828, 1997)])
+    connection.commit()
+    connection.close()
+    return path
+
+def test_query_top(db_path, capsys):
+    """The query subcommand should print the highest-grossing movies first"""
+    assert main(['query', '--db', db_path, '--top', '1']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ['title\tworldwide_gross\tyear', 'Avatar\t2923706026\t2009']
+
+def test_query_does_not_import_http_stack(db_path):
+    """Database-only subcommands should not import requests or bs4"""
+    code = ('import sys, movies_cli; movies_cli.main(["query", "--db", sys.argv[1]]); '
+            'print(sorted(m for m in ("requests", "bs4") if m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', code, db_path], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == '[]'
+
+def test_reset_keeps_data_unless_wiped(db_path, tmp_path, capsys):
+    """reset should migrate the given database in place and only recreate it with --wipe"""
+    main(['reset', '--db', db_path])
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone() == (2,)
+    assert connection.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] > 0
+    connection.close()
+
+    main(['reset', '--db', db_path, '--wipe'])
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone() == (0,)
+    connection.close()
+    assert 'Backed up' in capsys.readouterr().out
+    assert len(os.listdir(tmp_path / 'backups' / 'pre-reset')) == 1
+
+def test_wipe_removes_the_write_ahead_log(db_path):
+    """A wipe should not leave the old WAL behind to be paired with the new file"""
+    writer = sqlite3.connect(db_path)
+    writer.execute('PRAGMA journal_mode = WAL')
+    writer.execute("INSERT INTO movies (title, worldwide_gross, year) VALUES ('Frozen', 1290000000, 2013)")
+    writer.commit()
+    assert os.path.exists(db_path + '-wal')
+
+    main(['reset', '--db', db_path, '--wipe'])
+    assert not os.path.exists(db_path + '-wal') and not os.path.exists(db_path + '-shm')
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone() == (0,)
+    connection.close()
+    writer.close()
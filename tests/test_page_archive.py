@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import requests
+from page_archive import list_blobs, read_body, reparse_archive, store_page
+
+SAMPLE_PAGE = b'''
+<html><body>
+<table class="wikitable">
+<tr><th>Rank</th><th>Peak</th><th>Title</th><th>Worldwide gross</th><th>Year</th></tr>
+<tr><td>1</td><td>1</td><th><a href="/wiki/Avatar_(2009_film)">Avatar</a></th><td>$2,923,706,026</td><td>2009</td></tr>
+<tr><td>2</td><td>1</td><th><a href="/wiki/Avengers:_Endgame">Avengers: Endgame</a></th><td>$2,797,501,328</td><td>2019</td></tr>
+</table>
+</body></html>
+'''
+
+def test_identical_bodies_are_deduplicated(tmp_path):
+    """Storing the same body twice should keep one blob but record both fetches"""
+    archive_dir = str(tmp_path)
+    first = store_page('https://example.org/a', SAMPLE_PAGE, archive_dir=archive_dir)
+    second = store_page('https://example.org/a', SAMPLE_PAGE, archive_dir=archive_dir)
+    assert first == second
+
+    connection = sqlite3.connect(os.path.join(archive_dir, 'index.db'))
+    assert connection.execute('SELECT COUNT(*) FROM blobs').fetchone()[0] == 1
+    assert connection.execute('SELECT COUNT(*) FROM fetches').fetchone()[0] == 2
+    connection.close()
+
+def test_body_round_trip(tmp_path):
+    """An archived body should read back byte for byte"""
+    sha256 = store_page('https://example.org/a', SAMPLE_PAGE, archive_dir=str(tmp_path))
+    assert read_body(sha256, archive_dir=str(tmp_path)) == SAMPLE_PAGE
+
+def test_reparse_runs_extractor_offline(tmp_path):
+    """Re-parsing should run the movie extractor over every distinct archived body"""
+    archive_dir = str(tmp_path)
+    store_page('https://example.org/a', SAMPLE_PAGE, archive_dir=archive_dir)
+    store_page('https://example.org/a', SAMPLE_PAGE.replace(b'2019', b'2018'), archive_dir=archive_dir)
+    assert len(list_blobs(archive_dir)) == 2
+
+    results = list(reparse_archive(archive_dir=archive_dir))
+    years = sorted(movies[1]['year'] for _, _, _, movies in results)
+    assert years == ['2018', '2019']
+
+def test_fetches_are_archived_beside_the_database(movies_db, tmp_path, monkeypatch):
+    """Plain fetches and scrapes should keep the archive and parse cache next to MOVIES_DB"""
+    import parse_cache
+    import wikipedia_scraping
+
+    class Session:
+        def get(self, url, headers=None):
+            response = requests.models.Response()
+            response.status_code, response._content = 200, SAMPLE_PAGE
+            return response
+
+    elsewhere = tmp_path / 'elsewhere'
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    wikipedia_scraping.fetch_page('https://example.org/a', session=Session())
+    assert [url for _, url, _ in list_blobs(str(tmp_path / 'page_archive'))] == ['https://example.org/a']
+    assert parse_cache.default_cache().cache_dir == str(tmp_path / 'parse_cache')
+    assert os.listdir(elsewhere) == []
@@ -0,0 +1,100 @@
+import os
+import wikipedia_scraping
+from parse_cache import ParseCache, pack_movies, unpack_movies
+from tests.test_page_archive import SAMPLE_PAGE
+from wikipedia_scraping import extract_movies, scrape_wikipedia
+
+def test_blob_round_trip():
+    """Packed records should unpack to the same dictionaries, including missing keys"""
+    movies = [
+        {'title': 'Amélie', 'worldwide_gross': 1_174_000_000, 'year': '2023', 'article_key': None},
+        {'title': 'Avatar', 'worldwide_gross': 2_923_706_026, 'year': '2009', 'article_key': 'Avatar_(2009_film)'},
+    ]
+    assert unpack_movies(pack_movies(movies, keys=True)) == movies
+    plain = [{k: v for k, v in movie.items() if k != 'article_key'} for movie in movies]
+    blob = pack_movies(plain)
+    assert unpack_movies(blob) == plain
+    assert len(blob) < 64
+
+def test_second_level_hit_from_disk(tmp_path):
+    """A new cache over the same directory should find entries written by another"""
+    movies = extract_movies(SAMPLE_PAGE, keys=True)
+    ParseCache(str(tmp_path)).put(SAMPLE_PAGE, movies, keys=True)
+
+    cache = ParseCache(str(tmp_path))
+    assert cache.get(SAMPLE_PAGE) is None
+    assert cache.get(SAMPLE_PAGE, keys=True) == movies
+    assert cache.get(SAMPLE_PAGE, keys=True) == movies
+    assert (cache.misses, cache.disk_hits, cache.hits) == (1, 1, 1)
+
+def test_memory_and_disk_are_bounded(tmp_path):
+    """Least recently used entries should be evicted from both levels"""
+    movies = extract_movies(SAMPLE_PAGE)
+    size = len(pack_movies(movies))
+    cache = ParseCache(str(tmp_path), max_memory_bytes=2 * size, max_disk_bytes=2 * size)
+    pages = [SAMPLE_PAGE + bytes([i]) for i in range(3)]
+    for page in pages[:2]:
+        cache.put(page, movies)
+    cache.get(pages[0])
+    os.utime(cache._path(cache.key(pages[1])), (0, 0))
+    cache.put(pages[2], movies)
+
+    assert list(cache.memory) == [cache.key(pages[0]), cache.key(pages[2])]
+    assert cache.stats()['disk_entries'] == 2
+    assert not os.path.exists(cache._path(cache.key(pages[1])))
+
+def test_new_extractor_version_invalidates(tmp_path):
+    """Entries from another extractor version should be ignored and then deleted"""
+    movies = extract_movies(SAMPLE_PAGE)
+    ParseCache(str(tmp_path), version='old').put(SAMPLE_PAGE, movies)
+
+    cache = ParseCache(str(tmp_path), version='new')
+    assert cache.get(SAMPLE_PAGE) is None
+    cache.put(SAMPLE_PAGE, movies)
+    assert os.listdir(tmp_path) == ['new']
+
+def test_scrape_parses_unchanged_page_once(tmp_path, monkeypatch):
+    """Repeated scrapes of the same body should only run the extractor once"""
+    class Response:
+        content = SAMPLE_PAGE
+
+    calls = []
+    def counting_extract(content, profiler=None, keys=False, diagnostics=None):
+        calls.append(content)
+        return extract_movies(content, profiler, keys, diagnostics)
+
+    monkeypatch.setattr(wikipedia_scraping, 'fetch_page', lambda url: Response())
+    monkeypatch.setattr(wikipedia_scraping, 'extract_movies', counting_extract)
+    cache = ParseCache(str(tmp_path))
+    first = scrape_wikipedia(cache=cache)
+    assert scrape_wikipedia(cache=cache) == first
+    assert len(calls) == 1
+    assert scrape_wikipedia(cache=False) == first
+    assert len(calls) == 2
+
+def test_extractor_constants_are_part_of_the_version(monkeypatch):
+    """Changing a module constant the extractor uses should change the extractor version"""
+    import parse_cache
+
+    monkeypatch.setattr(parse_cache, '_version', None)
+    before = parse_cache.extractor_version()
+    assert parse_cache.extractor_version() == before
+
+    monkeypatch.setattr(parse_cache, '_version', None)
+    monkeypatch.setattr(wikipedia_scraping, 'NON_ARTICLE_NAMESPACES',
+                        wikipedia_scraping.NON_ARTICLE_NAMESPACES + ('Draft',))
+    assert parse_cache.extractor_version() != before
+
+def test_helpers_are_part_of_the_version(monkeypatch):
+    """Changing a helper whose output is cached, such as _diagnose, should change the extractor version"""
+    import parse_cache
+
+    monkeypatch.setattr(parse_cache, '_version', None)
+    before = parse_cache.extractor_version()
+
+    def _diagnose(diagnostics, body_sha256, row_number, row, reason, message=None):
+        diagnostics.append({'reason': reason})
+    _diagnose.__module__ = wikipedia_scraping.__name__
+    monkeypatch.setattr(parse_cache, '_version', None)
+    monkeypatch.setattr(wikipedia_scraping, '_diagnose', _diagnose)
+    assert parse_cache.extractor_version() != before
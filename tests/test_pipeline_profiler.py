@@ -0,0 +1,54 @@
+import os
+import tracemalloc
+from pipeline_profiler import NULL_PROFILER, PipelineProfiler, collapsed_stacks, profile_pipeline
+from schema_migrations import migrate_database
+from tests.test_page_archive import SAMPLE_PAGE
+from wikipedia_scraping import extract_movies
+from write_queue import MovieWriter
+
+def test_null_profiler_does_nothing():
+    """With profiling off, phases should share one no-op context and leave tracemalloc alone"""
+    assert NULL_PROFILER.phase('parse') is NULL_PROFILER.phase('store')
+    with NULL_PROFILER.phase('parse'):
+        assert not tracemalloc.is_tracing()
+
+def test_phases_are_recorded_separately():
+    """Parse and extract should each get their own stats, with memory measured"""
+    profiler = PipelineProfiler()
+    movies = extract_movies(SAMPLE_PAGE, profiler=profiler)
+    assert len(movies) == 2
+    assert set(profiler.phases) == {'parse', 'extract'}
+    assert profiler.phases['parse']['runs'] == 1
+    assert profiler.phases['parse']['peak_bytes'] > 0
+    assert not tracemalloc.is_tracing()
+
+def test_collapsed_stacks_format():
+    """Collapsed stacks should be semicolon-joined frames with positive integer weights"""
+    profiler = PipelineProfiler()
+    with profiler.phase('work'):
+        sorted(str(i) for i in range(50_000))
+    stacks = collapsed_stacks(profiler.phases['work']['profile'])
+    assert stacks
+    assert all(isinstance(weight, int) and weight > 0 for _, weight in stacks)
+    assert any('sorted' in stack for stack, _ in stacks)
+
+def test_profile_pipeline_writes_reports(tmp_path):
+    """Profiling a saved page should write collapsed stacks, pstats and a summary"""
+    output_dir = str(tmp_path / 'profiles')
+    profiler = profile_pipeline(output_dir, db_path=str(tmp_path / 'movies.db'), content=SAMPLE_PAGE)
+    assert set(profiler.phases) == {'parse', 'extract', 'store'}
+    for name in ('parse.collapsed', 'store.pstats', 'pipeline.collapsed', 'summary.txt'):
+        assert os.path.exists(os.path.join(output_dir, name))
+    with open(os.path.join(output_dir, 'pipeline.collapsed')) as f:
+        lines = f.read().splitlines()
+    assert {line.split(';')[0] for line in lines} <= {'parse', 'extract', 'store'}
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+def test_writer_profiles_group_commits(tmp_path):
+    """The writer should record a 'write' phase for its group commits"""
+    db_path = str(tmp_path / 'movies.db')
+    migrate_database(db_path)
+    profiler = PipelineProfiler()
+    with MovieWriter(db_path, profiler=profiler) as writer:
+        writer.submit([('Frozen II', 1453683476, 2019)]).result()
+    assert profiler.phases['write']['runs'] >= 1
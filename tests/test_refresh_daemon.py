@@ -0,0 +1,92 @@
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sqlite3
+import pytest
+import refresh_daemon
+from refresh_daemon import RefreshDaemon
+from tests.test_page_archive import SAMPLE_PAGE
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves SAMPLE_PAGE with an ETag and honours If-None-Match"""
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(SAMPLE_PAGE)))
+        self.end_headers()
+        self.wfile.write(SAMPLE_PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def page_url():
+    """Fixture to serve the sample page from a local HTTP server"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/wiki/List'
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def daemon(tmp_path, page_url):
+    """Fixture to provide a daemon writing to a temporary database"""
+    daemon = RefreshDaemon(str(tmp_path / 'movies.db'), page_url, interval=0.01, health_port=0)
+    yield daemon
+    daemon.close()
+
+def test_unchanged_page_is_skipped(daemon):
+    """The second run should be answered with a 304 and leave the table alone"""
+    first = daemon.run_once()
+    second = daemon.run_once()
+    assert first['status'] == 'updated'
+    assert first['rows_scraped'] == 2
+    assert second['status'] == 'not_modified'
+    assert second['rows_in_table'] == 2
+
+def test_failed_store_is_retried(daemon, monkeypatch):
+    """A run whose store fails should not keep the new ETag, so the next run fetches the page again"""
+    store = daemon._store
+    def failing_store(*args):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    monkeypatch.setattr(daemon, '_store', failing_store)
+    first = daemon.run_once()
+    monkeypatch.setattr(daemon, '_store', store)
+    second = daemon.run_once()
+    assert first['status'] == 'error'
+    assert daemon.etag == '"v1"'
+    assert second['status'] == 'updated'
+    assert second['rows_in_table'] == 2
+
+def test_parser_crash_is_recorded_and_retried(daemon, monkeypatch):
+    """An unexpected parser exception should be recorded as a failed run without stopping later runs"""
+    extract = refresh_daemon.extract_movies
+    def broken_extract(*args, **kwargs):
+        raise AttributeError("'NoneType' object has no attribute 'find_all'")
+
+    monkeypatch.setattr(refresh_daemon, 'extract_movies', broken_extract)
+    first = daemon.run_once()
+    monkeypatch.setattr(refresh_daemon, 'extract_movies', extract)
+    second = daemon.run_once()
+    assert first['status'] == 'error'
+    assert first['error'].startswith('AttributeError')
+    assert second['status'] == 'updated'
+    statuses = [row[0] for row in daemon.connection.execute('SELECT status FROM refresh_runs ORDER BY id')]
+    assert statuses == ['error', 'updated']
+
+def test_health_endpoint_reports_last_run(daemon):
+    """The health endpoint should report the last run's duration and row counts"""
+    daemon.run_once()
+    daemon.start_health_server()
+    port = daemon.health_server.server_address[1]
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/health') as response:
+        status = json.load(response)
+    assert status['runs'] == 1
+    assert status['last_run']['rows_in_table'] == 2
+    assert status['last_run']['duration_seconds'] >= 0
@@ -0,0 +1,59 @@
+import pytest
+import requests
+from page_archive import store_page
+from replay_server import CHART_PATH, ReplayServer
+from synthetic_pages import synthetic_page
+from tests.test_page_archive import SAMPLE_PAGE
+from wikipedia_scraping import extract_movies, fetch_page, scrape_wikipedia
+
+def test_synthetic_pages_are_deterministic():
+    """The same size and seed should always give the same page"""
+    assert synthetic_page(50, seed=3) == synthetic_page(50, seed=3)
+    assert synthetic_page(50, seed=3) != synthetic_page(50, seed=4)
+
+def test_quirky_pages_exercise_the_extractor():
+    """Quirky pages should carry rowspans, footnotes and short rows that the extractor copes with"""
+    content = synthetic_page(500, seed=1, quirks=True)
+    assert content == synthetic_page(500, seed=1, quirks=True)
+    assert all(marker in content for marker in (b'rowspan="2"', b'<sup', b'_in_film', b'[nb '))
+
+    diagnostics = []
+    movies = extract_movies(content, diagnostics=diagnostics)
+    short_rows = [d for d in diagnostics if d['reason'] == 'insufficient_columns']
+    assert short_rows and len(movies) + len(short_rows) == 500
+    assert not any('[' in movie['title'] for movie in movies)
+    assert all(movie['worldwide_gross'] > 1_000_000_000 for movie in movies)
+
+def test_scrape_synthetic_chart(movies_db):
+    """scrape_wikipedia should parse every row of a synthetic chart served locally"""
+    with ReplayServer(port=0) as replay:
+        movies = scrape_wikipedia(url=f'{replay.url}/synthetic/120')
+    assert len(movies) == 120
+    grosses = [movie['worldwide_gross'] for movie in movies]
+    assert grosses == sorted(grosses, reverse=True)
+
+def test_recorded_pages_are_replayed(tmp_path):
+    """Pages in the archive should be served at their original path"""
+    archive_dir = str(tmp_path / 'archive')
+    store_page(f'https://en.wikipedia.org{CHART_PATH}', SAMPLE_PAGE, archive_dir=archive_dir)
+    with ReplayServer(archive_dir, port=0) as replay:
+        response = fetch_page(f'{replay.url}{CHART_PATH}', archive=False)
+    assert response.content == SAMPLE_PAGE
+    assert [movie['title'] for movie in extract_movies(response.content)] == ['Avatar', 'Avengers: Endgame']
+
+def test_conditional_requests():
+    """A matching If-None-Match should get a 304"""
+    with ReplayServer(port=0) as replay:
+        url = f'{replay.url}/synthetic/10'
+        etag = fetch_page(url, archive=False).headers['ETag']
+        assert fetch_page(url, archive=False, headers={'If-None-Match': etag}).status_code == 304
+
+@pytest.mark.parametrize('fault, error', [
+    ('rate_429', requests.HTTPError),
+    ('rate_truncate', requests.exceptions.ChunkedEncodingError),
+])
+def test_injected_faults(fault, error):
+    """Injected 429s and truncated bodies should surface as request errors"""
+    with ReplayServer(port=0, **{fault: 1.0}) as replay:
+        with pytest.raises(error):
+            fetch_page(f'{replay.url}/synthetic/200', archive=False)
@@ -0,0 +1,91 @@
+import hashlib
+import wikipedia_scraping
+from db_config import connect
+from row_diagnostics import open_rows, record_diagnostics, reextract
+from wikipedia_scraping import extract_movies, save_to_database
+
+ODD_PAGE = b'''
+<html><body>
+<table class="wikitable">
+<tr><th>Rank</th><th>Peak</th><th>Title</th><th>Worldwide gross</th><th>Year</th></tr>
+<tr><td>1</td><td>1</td><th><a href="/wiki/Avatar_(2009_film)">Avatar</a></th><td>$2,923,706,026</td><td>'09</td></tr>
+<tr><td>2</td><td>2</td><th><a href="/wiki/Minions">Minions</a></th><td>$959,000,000</td><td>2015</td></tr>
+<tr><td colspan="5">Totals</td></tr>
+<tr><td>3</td><td>1</td><th><a href="/wiki/Titanic_(1997_film)">Titanic</a></th><td>$2,257,906,828</td><td>1997</td></tr>
+</table>
+</body></html>
+'''
+
+def test_rejected_and_defaulted_rows_are_collected():
+    """The extractor should report every skipped or defaulted row with its HTML and body hash"""
+    diagnostics = []
+    movies = extract_movies(ODD_PAGE, diagnostics=diagnostics)
+    assert [movie['year'] for movie in movies] == ['2023', '1997']
+    assert [(d['row_number'], d['reason']) for d in diagnostics] == \
+        [(1, 'year_defaulted'), (2, 'gross_too_small'), (3, 'insufficient_columns')]
+    assert diagnostics[1]['row_html'].startswith('<tr><td>2</td>')
+    assert {d['body_sha256'] for d in diagnostics} == {hashlib.sha256(ODD_PAGE).hexdigest()}
+    assert extract_movies(ODD_PAGE) == movies
+
+def test_recording_is_idempotent(movies_db):
+    """Scraping the same body again should not duplicate its diagnostics"""
+    connection = connect(movies_db)
+    diagnostics = []
+    extract_movies(ODD_PAGE, diagnostics=diagnostics)
+    assert record_diagnostics(connection, diagnostics) == 3
+    assert record_diagnostics(connection, diagnostics) == 0
+    connection.commit()
+    assert len(list(open_rows(connection, reason='gross_too_small'))) == 1
+    connection.close()
+
+def test_reextract_merges_rows_fixed_by_new_rules(movies_db, monkeypatch):
+    """Only the stored rows should be re-run, and rows the new rules accept should update movies"""
+    connection = connect(movies_db)
+    diagnostics = []
+    save_to_database(extract_movies(ODD_PAGE, keys=True, diagnostics=diagnostics), connection=connection)
+    record_diagnostics(connection, diagnostics)
+    connection.commit()
+
+    original = wikipedia_scraping.clean_row
+    def new_rules(cells, keys=False, issues=None):
+        issues = issues if issues is not None else []
+        movie = original(cells, keys, issues)
+        year_text = cells[4].get_text(strip=True)
+        if movie and 'year_defaulted' in issues and year_text.startswith("'"):
+            movie['year'] = '20' + year_text[1:]
+            issues.remove('year_defaulted')
+        return movie
+    monkeypatch.setattr(wikipedia_scraping, 'clean_row', new_rules)
+
+    assert reextract(connection, dry_run=True)['fixed'] == 1
+    summary = reextract(connection)
+    assert (summary['checked'], summary['fixed'], summary['still_open']) == (3, 1, 2)
+    assert connection.execute("SELECT year FROM movies WHERE title = 'Avatar' ORDER BY id DESC").fetchone() == (2009,)
+    assert connection.execute("SELECT COUNT(*) FROM movies WHERE title = 'Avatar' AND year = 2023").fetchone() == (0,)
+    assert [reasons for _, _, _, reasons in open_rows(connection)] == [['gross_too_small'], ['insufficient_columns']]
+    connection.close()
+
+def test_main_scrape_of_unchanged_page_parses_once(movies_db, tmp_path, monkeypatch):
+    """Running the scraper twice on the same body should parse it once and still record its diagnostics"""
+    import parse_cache
+
+    class Response:
+        content = ODD_PAGE
+
+    calls = []
+    def counting_extract(content, profiler=None, keys=False, diagnostics=None):
+        calls.append(content)
+        return extract_movies(content, profiler, keys, diagnostics)
+
+    monkeypatch.setattr(wikipedia_scraping, 'fetch_page', lambda url: Response())
+    monkeypatch.setattr(wikipedia_scraping, 'extract_movies', counting_extract)
+    monkeypatch.setattr(parse_cache, '_default_cache', parse_cache.ParseCache(str(tmp_path / 'cache')))
+    wikipedia_scraping.main()
+    connection = connect(movies_db)
+    connection.execute('DELETE FROM parse_diagnostics')
+    connection.commit()
+    wikipedia_scraping.main()
+
+    assert len(calls) == 1
+    assert connection.execute('SELECT COUNT(*) FROM parse_diagnostics').fetchone() == (3,)
+    connection.close()
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import os
+import time
+import tracemalloc
+import pytest
+from db_config import connect
+from schema_migrations import migrate
+from synthetic_pages import synthetic_page
+from wikipedia_scraping import extract_movies, save_to_database
+
+# 1k, 4k and 16k rows always run; MOVIES_SCALING_TESTS=1 adds 100k rows and =full adds 1M
+SCALING_ENV_VAR = 'MOVIES_SCALING_TESTS'
+BASE_SIZES = [1_000, 4_000, 16_000]
+
+# Wall-clock checks are too noisy for shared runners, so they only run with MOVIES_SCALING_TESTS,
+# taking the best of several runs; memory checks always run
+TIMING_REPEATS = 3
+TIME_SLACK = 2.0
+# Per-row peak memory, about twice what was measured: parse ~12KB, extract ~0.6KB, store ~0.4KB
+PEAK_BYTES_PER_ROW = {'parse': 24 * 1024, 'extract': 1024, 'store': 1024}
+
+def scaling_sizes():
+    level = os.environ.get(SCALING_ENV_VAR, '')
+    sizes = list(BASE_SIZES)
+    if level:
+        sizes.append(100_000)
+    if level == 'full':
+        sizes.append(1_000_000)
+    return sizes
+
+class StageProfiler:
+    """Profiler recording the wall time, or traced peak memory, of each pipeline phase"""
+
+    def __init__(self, results, rows, trace_memory):
+        self.results = results
+        self.rows = rows
+        self.trace_memory = trace_memory
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if self.trace_memory:
+                value = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                value = min(elapsed, self.results[name].get(self.rows, elapsed))
+            self.results[name][self.rows] = value
+
+def run_pipeline(tmp_path_factory, rows, profiler):
+    """Extract and store a quirky synthetic chart through the real pipeline"""
+    content = synthetic_page(rows, seed=rows, quirks=True)
+    diagnostics = []
+    connection = connect(str(tmp_path_factory.mktemp('scaling') / 'movies.db'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(connection)
+        movies = extract_movies(content, profiler, keys=True, diagnostics=diagnostics)
+        save_to_database(movies, connection=connection, profiler=profiler)
+
+    short_rows = [d for d in diagnostics if d['reason'] == 'insufficient_columns']
+    assert len(movies) + len(short_rows) == rows
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == len(movies)
+    connection.close()
+
+@pytest.fixture(scope='module')
+def peak_memory(tmp_path_factory):
+    """Traced peak memory of each phase at each size"""
+    results = {'parse': {}, 'extract': {}, 'store': {}}
+    for rows in scaling_sizes():
+        run_pipeline(tmp_path_factory, rows, StageProfiler(results, rows, trace_memory=True))
+    return results
+
+@pytest.fixture(scope='module')
+def timings(tmp_path_factory):
+    """Best wall time of each phase at each size over several untraced runs"""
+    results = {'parse': {}, 'extract': {}, 'store': {}}
+    for rows in scaling_sizes():
+        for _ in range(TIMING_REPEATS):
+            run_pipeline(tmp_path_factory, rows, StageProfiler(results, rows, trace_memory=False))
+    return results
+
+@pytest.mark.skipif(not os.environ.get(SCALING_ENV_VAR), reason=f'set {SCALING_ENV_VAR} to run timing checks')
+@pytest.mark.parametrize('stage', ['parse', 'extract', 'store'])
+def test_time_grows_linearly(timings, stage):
+    """The time per extra row between successive sizes should stay within a constant factor of the first slope"""
+    points = sorted(timings[stage].items())
+    slopes = [(rows, (seconds - prev_seconds) / (rows - prev_rows))
+              for (prev_rows, prev_seconds), (rows, seconds) in zip(points, points[1:])]
+    base_slope = slopes[0][1]
+    for rows, slope in slopes[1:]:
+        assert slope <= base_slope * TIME_SLACK, \
+            f"{stage} up to {rows:,} rows took {slope * 1e6:.0f}us per extra row, {slope / base_slope:.1f}x the first slope"
+
+@pytest.mark.parametrize('stage', ['parse', 'extract', 'store'])
+def test_memory_per_row_is_bounded(peak_memory, stage):
+    """Peak memory should grow no faster than the row count"""
+    for rows, peak in peak_memory[stage].items():
+        assert peak / rows <= PEAK_BYTES_PER_ROW[stage], \
+            f"{stage} at {rows:,} rows peaked at {peak / 2**20:.1f} MiB"
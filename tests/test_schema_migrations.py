@@ -0,0 +1,64 @@
+import sqlite3
+import pytest
+import schema_migrations
+from schema_migrations import MIGRATIONS, column_names, current_version, migrate
+
+@pytest.fixture
+def connection():
+    """Fixture to provide an empty in-memory database"""
+    connection = sqlite3.connect(':memory:')
+    yield connection
+    connection.close()
+
+def test_fresh_database_gets_scraper_schema(connection):
+    """A fresh database should end up with the four-column movies table"""
+    migrate(connection)
+    assert column_names(connection, 'movies') == ['id', 'title', 'worldwide_gross', 'year']
+    assert current_version(connection) == MIGRATIONS[-1][0]
+
+def test_migrate_is_idempotent(connection):
+    """Running migrate twice should apply nothing the second time"""
+    migrate(connection)
+    assert migrate(connection) == []
+
+def test_legacy_schema_upgraded_in_place(connection):
+    """A create_movies_table.py database should keep its rows and ids"""
+    connection.execute('''
+        CREATE TABLE movies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            release_year INTEGER,
+            director TEXT,
+            box_office REAL
+        )
+    ''')
+    connection.execute('CREATE INDEX idx_movies_year ON movies(release_year)')
+    connection.executemany(
+        'INSERT INTO movies (id, title, release_year, director, box_office) VALUES (?, ?, ?, ?, ?)',
+        [(i, f'Movie {i}', 1990 + i % 30, 'Someone', 1_000_000_000.0 + i) for i in range(1, 1001)]
+    )
+    connection.commit()
+
+    migrate(connection)
+
+    assert column_names(connection, 'movies') == ['id', 'title', 'worldwide_gross', 'year']
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 1000
+    assert connection.execute('SELECT title, worldwide_gross, year FROM movies WHERE id = 7').fetchone() == \
+        ('Movie 7', 1_000_000_007, 1997)
+    # The extra columns are kept rather than thrown away
+    assert connection.execute('SELECT director FROM movies_legacy WHERE id = 7').fetchone() == ('Someone',)
+
+def test_failed_migration_rolls_back(connection, monkeypatch):
+    """A failing migration should leave the database at the previous version"""
+    migrate(connection, target=1)
+
+    def broken(conn):
+        conn.execute('CREATE TABLE half_done (id INTEGER)')
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(schema_migrations, 'MIGRATIONS', [MIGRATIONS[0], (2, 'broken', broken)])
+    with pytest.raises(RuntimeError):
+        migrate(connection)
+
+    assert current_version(connection) == 1
+    assert connection.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor
+from sharded_parsing import extract_movies_sharded, parse_shard, plan_shards, scan_rows
+from synthetic_pages import synthetic_page
+from tests.test_page_archive import SAMPLE_PAGE
+from wikipedia_scraping import extract_movies
+
+NESTED_PAGE = b'''
+<html><body>
+<table class="infobox"><tr><td>not the chart</td></tr></table>
+<table class="wikitable">
+<thead><tr><th>Rank</th><th>Peak</th><th>Title</th><th>Worldwide gross</th><th>Year</th></tr></thead>
+<tbody>
+<tr><td>1</td><td>1</td><th><a href="/wiki/Avatar_(2009_film)">Avatar</a></th><td>$2,923,706,026</td><td>2009</td></tr>
+<tr><td>2</td><td>1</td><td><table><tr><td>nested</td></tr></table></td><td>x</td><td>2019</td></tr>
+<tr><td>3</td><td>1</td><th><a href="/wiki/Titanic_(1997_film)">Titanic</a></th><td>$2,257,906,828</td><td>1997</td></tr>
+</tbody>
+</table>
+<table class="wikitable"><tr><td>second table</td></tr></table>
+</body></html>
+'''
+
+def test_scan_finds_only_chart_rows():
+    """The pre-scan should find the wikitable's own rows, skipping nested and later tables"""
+    rows = scan_rows(NESTED_PAGE)
+    assert len(rows) == 4
+    assert all(NESTED_PAGE[start:start + 3] == b'<tr' for start, _ in rows)
+    assert b'second table' not in NESTED_PAGE[rows[-1][0]:rows[-1][1]]
+    assert scan_rows(b'<html><table><tr><td>1</td></tr></table></html>') == []
+
+def test_plan_shards_covers_every_data_row():
+    """Shards should be contiguous, ordered and skip the header row"""
+    rows = [(i * 10, i * 10 + 10) for i in range(11)]
+    shards = plan_shards(rows, 3)
+    assert [first for _, _, first in shards] == [1, 5, 8]
+    assert shards[0][0] == 10 and shards[-1][1] == 110
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+
+def test_sharded_matches_sequential():
+    """Sharded parsing should return exactly what extract_movies returns, in order"""
+    content = synthetic_page(300, seed=7)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        sharded = extract_movies_sharded(content, workers=2, keys=True, executor=executor, min_rows=0)
+    assert sharded == extract_movies(content, keys=True)
+    assert len(sharded) == 300
+
+def test_rows_after_a_tbody_inside_a_shard():
+    """Rows wrapped by a <tbody> that opens mid-shard should still be parsed, nested tables skipped"""
+    rows = scan_rows(NESTED_PAGE)
+    fragment = NESTED_PAGE[rows[1][0]:rows[1][1]] + b'<tbody>' + NESTED_PAGE[rows[2][0]:rows[3][1]]
+    movies, errors, diagnostics = parse_shard(fragment)
+    assert [movie['title'] for movie in movies] == ['Avatar', 'Titanic']
+    assert errors == [] and diagnostics == []
+
+    content = synthetic_page(300, seed=7).replace(b'<tr>', b'</tbody><tbody><tr>', 150)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        sharded = extract_movies_sharded(content, workers=2, executor=executor, min_rows=0)
+    assert sharded == extract_movies(content)
+    assert len(sharded) == 300
+
+def test_sharded_diagnostics_match_sequential():
+    """Large pages should report the same rejected and defaulted rows, in order, as extract_movies"""
+    content = synthetic_page(300, seed=3, quirks=True)
+    expected = []
+    extract_movies(content, keys=True, diagnostics=expected)
+    diagnostics = []
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        extract_movies_sharded(content, workers=2, keys=True, executor=executor, min_rows=0, diagnostics=diagnostics)
+    assert expected and diagnostics == expected
+
+def test_small_tables_fall_back_to_sequential():
+    """Tables under the threshold should not start a process pool"""
+    assert extract_movies_sharded(SAMPLE_PAGE) == extract_movies(SAMPLE_PAGE)
+    assert [movie['title'] for movie in extract_movies_sharded(NESTED_PAGE, workers=1, min_rows=0)] == \
+        ['Avatar', 'Titanic']
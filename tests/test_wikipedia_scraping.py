@@ -1,13 +1,14 @@
 import sqlite3
 import os
 from wikipedia_scraping import *
+from db_config import connect, get_db_path
 import pytest
 
 @pytest.fixture
 def db_connection():
     """Fixture to provide a database connection for tests"""
-    db_path = os.path.join(os.path.dirname(__file__), '..', 'movies.db')
-    connection = sqlite3.connect(db_path)
+    db_path = get_db_path(default=os.path.join(os.path.dirname(__file__), '..', 'movies.db'))
+    connection = connect(db_path)
     yield connection
     connection.close()
 
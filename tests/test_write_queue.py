@@ -0,0 +1,117 @@
+import contextlib
+import sqlite3
+import threading
+import pytest
+import write_queue
+from schema_migrations import migrate_database
+from write_queue import MovieWriter, connect_reader
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture to provide an empty movies database"""
+    path = str(tmp_path / 'movies.db')
+    migrate_database(path)
+    return path
+
+def make_movies(producer, count):
+    return [{'title': f'Movie {producer}-{i}', 'worldwide_gross': 1_000_000_000 + i, 'year': '2019'}
+            for i in range(count)]
+
+def test_concurrent_producers_all_rows_written(db_path):
+    """Rows from many producers should all be committed, in fewer commits than batches"""
+    with MovieWriter(db_path, batch_size=200, max_latency=0.05) as writer:
+        def produce(producer):
+            futures = [writer.submit(make_movies(producer, 10)) for _ in range(20)]
+            assert sum(f.result() for f in futures) == 200
+
+        threads = [threading.Thread(target=produce, args=(p,)) for p in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 1600
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    connection.close()
+    assert writer.commits < 160
+
+def test_reader_not_blocked_while_writing(db_path):
+    """A reader should be able to query while the writer is committing"""
+    reader = connect_reader(db_path)
+    with MovieWriter(db_path) as writer:
+        future = writer.submit(make_movies(0, 100))
+        count = reader.execute('SELECT COUNT(*) FROM movies').fetchone()[0]
+        assert count in (0, 100)
+        future.result()
+    assert reader.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 100
+    reader.close()
+
+def test_failed_batch_reports_error(db_path):
+    """A batch that violates a constraint should fail its future and write nothing"""
+    with MovieWriter(db_path) as writer:
+        future = writer.submit([(None, 1, 2000)])
+        with pytest.raises(sqlite3.IntegrityError):
+            future.result()
+
+def test_bad_batch_fails_alone(db_path):
+    """A failing batch should not take down the other batches committed in the same group"""
+    with MovieWriter(db_path, batch_size=1000, max_latency=0.5) as writer:
+        good = writer.submit(make_movies(0, 5))
+        bad = writer.submit([(None, 1, 2000)])
+        later = writer.submit(make_movies(1, 5))
+        assert good.result() == 5 and later.result() == 5
+        with pytest.raises(sqlite3.IntegrityError):
+            bad.result()
+    assert writer.commits == 1
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM movies').fetchone()[0] == 10
+    connection.close()
+
+def test_unexpected_error_keeps_writer_running(db_path):
+    """An error that isn't from SQLite should fail its group without stopping the writer thread"""
+    class FlakyProfiler:
+        calls = 0
+        def phase(self, name):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError('profiler broke')
+            return contextlib.nullcontext()
+
+    with MovieWriter(db_path, profiler=FlakyProfiler()) as writer:
+        with pytest.raises(RuntimeError):
+            writer.submit(make_movies(0, 5)).result(timeout=5)
+        assert writer.submit(make_movies(1, 5)).result(timeout=5) == 5
+
+def test_submit_racing_close_is_not_lost(db_path, monkeypatch):
+    """A submit that overlaps close() should either be written or be refused, never left unresolved"""
+    converting, resume = threading.Event(), threading.Event()
+    params = write_queue.movie_params
+    def slow_params(row):
+        converting.set()
+        resume.wait(5)
+        return params(row)
+
+    writer = MovieWriter(db_path).start()
+    monkeypatch.setattr(write_queue, 'movie_params', slow_params)
+    outcome = {}
+    def producer():
+        try:
+            outcome['future'] = writer.submit(make_movies(0, 1))
+        except RuntimeError as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    converting.wait(5)
+    closer = threading.Thread(target=writer.close)
+    closer.start()
+    closer.join(0.5)
+    resume.set()
+    thread.join(5)
+    closer.join(5)
+    if 'future' in outcome:
+        assert outcome['future'].result(timeout=2) == 1
+    else:
+        assert 'not running' in str(outcome['error'])
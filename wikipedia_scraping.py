@@ -1,53 +1,188 @@
 import sqlite3
-import requests
-from bs4 import BeautifulSoup
 import re
+from db_config import connect
+from pipeline_profiler import NULL_PROFILER
 
-def create_movies_table():
-    """Create the movies table in the database."""
-    connection = sqlite3.connect('movies.db')
-    cursor = connection.cursor()
+# requests and bs4 are imported inside the functions that use them so that
+# database-only callers don't pay for the HTTP and HTML stack at startup
+
+def create_movies_table(connection=None):
+    """
+    Create the movies table in the database.
+    
+    Existing databases are upgraded in place by the schema migrations, so
+    older movies schemas are reconciled without deleting any data.
+    """
+    from schema_migrations import migrate
+    
+    own_connection = connection is None
+    if own_connection:
+        connection = connect()
     
     # Create table to match test expectations
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS movies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            worldwide_gross INTEGER,
-            year INTEGER
-        )
-    ''')
-    
-    connection.commit()
-    connection.close()
+    migrate(connection)
+    
+    if own_connection:
+        connection.close()
     print("Movies table created successfully!")
 
-def scrape_wikipedia():
+WIKIPEDIA_URL = 'https://en.wikipedia.org/wiki/List_of_highest-grossing_films'
+
+# Add headers to avoid 403 Forbidden error
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def fetch_page(url=WIKIPEDIA_URL, archive=True, session=None, headers=None):
     """
-    Scrape Wikipedia for highest-grossing movies data.
+    Fetch a page and return the response.
     
-    Uses requests and BeautifulSoup to:
-    1. Visit the Highest Grossing Films page
-    2. Grab the table element with class 'wikitable'
-    3. Find all tr elements from the table
-    4. Iterate through rows and extract data from td/th elements
-    5. Clean worldwide gross values (remove $, commas, T, F, F8)
-    6. Return list of dictionaries with movie data
+    Pass a `requests.Session` to reuse pooled connections, and extra
+    `headers` (e.g. If-None-Match) for conditional requests. When `archive`
+    is true a 200 response body is also stored in the local page archive
+    (beside the configured database, or in the directory `archive` names)
+    so the extractor can be re-run later without the network.
     """
-    try:
-        # Use requests to visit the Highest Grossing Films page
-        url = 'https://en.wikipedia.org/wiki/List_of_highest-grossing_films'
-        
-        # Add headers to avoid 403 Forbidden error
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
+    import requests
+    
+    request_headers = dict(HEADERS, **(headers or {}))
+    get = session.get if session is not None else requests.get
+    response = get(url, headers=request_headers)
+    response.raise_for_status()
+    
+    if archive and response.status_code == 200:
+        try:
+            from page_archive import store_page
+            store_page(url, response.content, archive_dir=archive if isinstance(archive, str) else None)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Could not archive {url}: {e}")
+    
+    return response
+
+# Link prefixes that point at files, help pages and the like rather than films
+NON_ARTICLE_NAMESPACES = ('File', 'Image', 'Help', 'Special', 'Template', 'Wikipedia', 'Category', 'Portal',
+                          'Datei', 'Fichier', 'Archivo', 'Hilfe', 'Aide', 'Ayuda', 'Aiuto', 'Vorlage', 'Modèle')
+
+def article_key(href):
+    """
+    Normalize a Wikipedia link to a canonical article key.
+    
+    '/wiki/Avatar_(2009_film)#Box_office' and
+    'https://en.wikipedia.org/wiki/Avatar%20(2009%20film)' both become
+    'Avatar_(2009_film)'. Returns None for links that aren't articles.
+    """
+    from urllib.parse import unquote, urlsplit
+    
+    if not href:
+        return None
+    path = urlsplit(href).path
+    if '/wiki/' not in path:
+        return None
+    title = unquote(path.split('/wiki/', 1)[1]).replace(' ', '_').strip('_')
+    namespace = title.split(':', 1)[0] if ':' in title else ''
+    if not title or namespace in NON_ARTICLE_NAMESPACES:
+        return None
+    # MediaWiki titles are case-sensitive except for the first letter
+    return title[0].upper() + title[1:]
+
+def clean_row(cells, keys=False, issues=None):
+    """
+    Clean the td/th cells of one table row into a movie dictionary.
+    
+    Expected format: Rank, Peak, Title, Worldwide gross, Year, Ref, so at
+    least 5 cells are needed. Returns None for rows whose gross is missing
+    or under a billion. Shared by `extract_movies` and the sharded parser
+    so both clean rows identically.
+    
+    Pass a list as `issues` to collect reason codes for rejected or
+    defaulted rows: 'gross_missing', 'gross_too_small', 'missing_title'
+    and 'year_defaulted'.
+    """
+    issues = issues if issues is not None else []
+    
+    # Title (3rd column - index 2)
+    title_cell = cells[2]
+    # Get text from link if available, otherwise get cell text
+    title_link = title_cell.find('a')
+    if title_link:
+        title = title_link.get_text(strip=True)
+    else:
+        title = title_cell.get_text(strip=True)
+    
+    # Remove footnote markers like [1], [2], etc.
+    title = re.sub(r'\[[^\]]*\]', '', title).strip()
+    
+    # Worldwide gross (4th column - index 3)
+    gross_text = cells[3].get_text(strip=True)
+    
+    # Clean worldwide gross: remove "$", ",", "T", "F", "F8", and other characters
+    # Keep only digits
+    gross_cleaned = re.sub(r'[^\d]', '', gross_text)
+    
+    # Convert to integer if we have valid digits
+    if gross_cleaned and len(gross_cleaned) >= 9:  # At least 9 digits for billion+
+        worldwide_gross = int(gross_cleaned)
+    else:
+        issues.append('gross_too_small' if gross_cleaned else 'gross_missing')
+        return None  # Skip if gross is too small or invalid
+    
+    # Year (5th column - index 4)
+    year_text = cells[4].get_text(strip=True)
+    # Extract 4-digit year
+    year_match = re.search(r'\b(19|20)\d{2}\b', year_text)
+    year = year_match.group() if year_match else "2023"
+    if not year_match:
+        issues.append('year_defaulted')
+    
+    # Only include movies with significant box office (1 billion+)
+    if not title or worldwide_gross <= 1_000_000_000:
+        issues.append('missing_title' if not title else 'gross_too_small')
+        return None
+    
+    # Create dictionary in the required format
+    movie_dict = {
+        'title': title,
+        'worldwide_gross': worldwide_gross,
+        'year': year
+    }
+    if keys:
+        movie_dict['article_key'] = article_key(title_link.get('href')) if title_link else None
+    return movie_dict
+
+def _diagnose(diagnostics, body_sha256, row_number, row, reason, message=None):
+    """Append one rejected or defaulted row to a diagnostics list."""
+    diagnostics.append({
+        'body_sha256': body_sha256,
+        'row_number': row_number,
+        'reason': reason,
+        'row_html': str(row),
+        'message': message,
+    })
+
+def extract_movies(content, profiler=None, keys=False, diagnostics=None):
+    """
+    Extract the cleaned movie dictionaries from the page HTML.
+    
+    Grabs the table with class 'wikitable', iterates through its tr
+    elements and cleans the title, worldwide gross and year of each row.
+    Pass a `pipeline_profiler.PipelineProfiler` to profile the 'parse'
+    and 'extract' phases separately. With `keys=True` each movie also
+    gets an 'article_key' from its title link (see `article_key`).
+    
+    Pass a list as `diagnostics` to collect every rejected or defaulted
+    row with its raw HTML, reason code and the body's SHA-256 (see
+    row_diagnostics.py).
+    """
+    from bs4 import BeautifulSoup
+    
+    profiler = profiler or NULL_PROFILER
+    if diagnostics is not None:
+        import hashlib
+        body_sha256 = hashlib.sha256(content if isinstance(content, bytes) else content.encode('utf-8')).hexdigest()
+    
+    with profiler.phase('parse'):
         # Use BeautifulSoup to parse the HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(content, 'html.parser')
         
         # Grab the table element that has a class of 'wikitable'
         table = soup.find('table', {'class': 'wikitable'})
@@ -58,81 +193,76 @@ def scrape_wikipedia():
         
         # From the table element find all instances of the tr element
         tr_elements = table.find_all('tr')
-        print(f"Found {len(tr_elements)} tr elements in the table")
-        
-        movies = []
-        
+    print(f"Found {len(tr_elements)} tr elements in the table")
+    
+    movies = []
+    
+    with profiler.phase('extract'):
         # From the elements that were returned, iterate through the list
         for i, row in enumerate(tr_elements[1:], 1):  # Skip header row
             # Get the data for each row - find td and th elements
             cells = row.find_all(['td', 'th'])
             
             if len(cells) >= 5:  # Ensure we have enough columns
+                issues = []
                 try:
-                    # Extract data from each cell
-                    # Expected format: Rank, Peak, Title, Worldwide gross, Year, Ref
-                    
-                    # Rank (1st column - index 0)
-                    rank_cell = cells[0]
-                    rank = rank_cell.get_text(strip=True)
-                    
-                    # Peak (2nd column - index 1) 
-                    peak_cell = cells[1]
-                    peak = peak_cell.get_text(strip=True)
-                    
-                    # Title (3rd column - index 2)
-                    title_cell = cells[2]
-                    # Get text from link if available, otherwise get cell text
-                    title_link = title_cell.find('a')
-                    if title_link:
-                        title = title_link.get_text(strip=True)
-                    else:
-                        title = title_cell.get_text(strip=True)
-                    
-                    # Remove footnote markers like [1], [2], etc.
-                    title = re.sub(r'\[[^\]]*\]', '', title).strip()
-                    
-                    # Worldwide gross (4th column - index 3)
-                    gross_cell = cells[3]
-                    gross_text = gross_cell.get_text(strip=True)
-                    
-                    # Clean worldwide gross: remove "$", ",", "T", "F", "F8", and other characters
-                    # Keep only digits
-                    gross_cleaned = re.sub(r'[^\d]', '', gross_text)
-                    
-                    # Convert to integer if we have valid digits
-                    if gross_cleaned and len(gross_cleaned) >= 9:  # At least 9 digits for billion+
-                        worldwide_gross = int(gross_cleaned)
-                    else:
-                        continue  # Skip if gross is too small or invalid
-                    
-                    # Year (5th column - index 4)
-                    year_cell = cells[4]
-                    year_text = year_cell.get_text(strip=True)
-                    # Extract 4-digit year
-                    year_match = re.search(r'\b(19|20)\d{2}\b', year_text)
-                    year = year_match.group() if year_match else "2023"
-                    
-                    # Only include movies with significant box office (1 billion+)
-                    if title and worldwide_gross > 1_000_000_000:
-                        # Create dictionary in the required format
-                        movie_dict = {
-                            'title': title,
-                            'worldwide_gross': worldwide_gross,
-                            'year': year
-                        }
-                        
+                    movie_dict = clean_row(cells, keys, issues)
+                    if movie_dict:
                         movies.append(movie_dict)
-                        print(f"Row {i}: Added {title} ({year}) - ${worldwide_gross:,}")
-                        
+                        print(f"Row {i}: Added {movie_dict['title']} ({movie_dict['year']}) - "
+                              f"${movie_dict['worldwide_gross']:,}")
+                    
                 except (ValueError, AttributeError, IndexError) as e:
                     print(f"Error processing row {i}: {e}")
+                    if diagnostics is not None:
+                        _diagnose(diagnostics, body_sha256, i, row, 'row_error', str(e))
                     continue
+                if diagnostics is not None:
+                    for reason in issues:
+                        _diagnose(diagnostics, body_sha256, i, row, reason)
             else:
                 print(f"Row {i}: Insufficient columns ({len(cells)} found, need at least 5)")
+                if diagnostics is not None:
+                    _diagnose(diagnostics, body_sha256, i, row, 'insufficient_columns',
+                              f"{len(cells)} cells found, need at least 5")
+    
+    print(f"Successfully scraped {len(movies)} movies")
+    return movies
+
+def scrape_wikipedia(profiler=None, url=WIKIPEDIA_URL, keys=False, cache=None, diagnostics=None):
+    """
+    Scrape Wikipedia for highest-grossing movies data.
+    
+    Uses requests and BeautifulSoup to:
+    1. Visit the Highest Grossing Films page
+    2. Grab the table element with class 'wikitable'
+    3. Find all tr elements from the table
+    4. Iterate through rows and extract data from td/th elements
+    5. Clean worldwide gross values (remove $, commas, T, F, F8)
+    6. Return list of dictionaries with movie data
+    
+    Pass a `pipeline_profiler.PipelineProfiler` to profile each phase,
+    and a different `url` to scrape a mirror such as the replay server.
+    With `keys=True` each movie also carries its 'article_key'.
+    
+    Cleaned results are cached by body hash (see parse_cache.py), so an
+    unchanged page is only parsed once. Pass a `ParseCache` as `cache`,
+    or `cache=False` to always parse. Profiled runs always parse. Rejected
+    rows collected in a `diagnostics` list are cached with the movies.
+    """
+    import requests
+    
+    profiler = profiler or NULL_PROFILER
+    
+    try:
+        # Use requests to visit the Highest Grossing Films page
+        with profiler.phase('fetch'):
+            response = fetch_page(url)
+        if cache is False or profiler is not NULL_PROFILER:
+            return extract_movies(response.content, profiler, keys, diagnostics)
         
-        print(f"Successfully scraped {len(movies)} movies")
-        return movies
+        from parse_cache import cached_extract
+        return cached_extract(response.content, keys, cache, diagnostics)
         
     except requests.RequestException as e:
         print(f"Error fetching data from Wikipedia: {e}")
@@ -141,40 +271,95 @@ def scrape_wikipedia():
         print(f"Error parsing Wikipedia data: {e}")
         return []
 
-def save_to_database(movies):
-    """Save movies data to the database."""
-    connection = sqlite3.connect('movies.db')
-    cursor = connection.cursor()
+def save_to_database(movies, connection=None, replace=False, profiler=None):
+    """
+    Save movies data to the database.
     
-    for movie in movies:
-        cursor.execute('''
-            INSERT OR REPLACE INTO movies (title, worldwide_gross, year)
-            VALUES (?, ?, ?)
-        ''', (movie['title'], movie['worldwide_gross'], int(movie['year'])))
+    An open `connection` can be passed in to reuse it; it is left open.
+    With `replace=True` the existing rows are swapped for the new ones in
+    the same transaction. The inserts run in the profiler's 'store' phase.
     
-    connection.commit()
-    connection.close()
+    Movies that carry an 'article_key' are upserted by that key (see
+    movie_identity.py), so saving a film again updates its row and keeps its id.
+    Every change lands in the change feed (see change_feed.py).
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = connect()
+    cursor = connection.cursor()
+    
+    with (profiler or NULL_PROFILER).phase('store'):
+        if any(movie.get('article_key') for movie in movies):
+            from movie_identity import save_identified
+            save_identified(connection, movies, replace=replace)
+        else:
+            if replace:
+                cursor.execute('DELETE FROM movies')
+            
+            for movie in movies:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO movies (title, worldwide_gross, year)
+                    VALUES (?, ?, ?)
+                ''', (movie['title'], movie['worldwide_gross'], int(movie['year'])))
+        
+        from change_feed import record_rank_changes
+        record_rank_changes(connection)
+        connection.commit()
+    if own_connection:
+        connection.close()
     print(f"Saved {len(movies)} movies to database")
 
-def main():
-    """Main function to run the scraping and database operations."""
+def main(profile_dir=None, url=WIKIPEDIA_URL):
+    """
+    Main function to run the scraping and database operations.
+    
+    With `profile_dir` every phase is profiled and the reports are
+    written to that directory.
+    """
     print("Starting Wikipedia movie scraping...")
     
+    profiler = None
+    if profile_dir:
+        from pipeline_profiler import PipelineProfiler
+        profiler = PipelineProfiler()
+    
     # Create table
     create_movies_table()
     
-    # Scrape data
-    movies = scrape_wikipedia()
+    # Scrape data, keeping each film's article key so re-runs update rows instead of duplicating them
+    diagnostics = []
+    movies = scrape_wikipedia(profiler, url, keys=True, diagnostics=diagnostics)
     print(f"Scraped {len(movies)} movies")
     
     # Save to database
     if movies:
-        save_to_database(movies)
+        save_to_database(movies, profiler=profiler)
     else:
         print("No movies data to save")
+    
+    # Keep rejected and defaulted rows so they can be re-extracted when the rules change
+    if diagnostics:
+        from row_diagnostics import record_diagnostics
+        connection = connect()
+        with connection:
+            recorded = record_diagnostics(connection, diagnostics)
+        connection.close()
+        print(f"Recorded {recorded} new row diagnostics")
+    
+    if profiler:
+        profiler.write_reports(profile_dir)
+        print(profiler.summary())
+        print(f"Profile reports written to {profile_dir}")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Scrape Wikipedia and save the movies to the database')
+    parser.add_argument('--profile', metavar='DIR', default=None,
+                        help='Profile each phase and write the reports to DIR')
+    parser.add_argument('--url', default=WIKIPEDIA_URL, help='Page to scrape (e.g. a replay server)')
+    args = parser.parse_args()
+    main(args.profile, args.url)
 
 
 
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Single-writer queue for movies.db.
+
+Several scrapers writing the database at once used to fail with
+`database is locked`, because each opened its own default-journal
+connection. With `MovieWriter`, producers only put row batches on a queue
+and one dedicated writer thread commits them. Batches that arrive close
+together are group-committed in a single WAL transaction, bounded by
+`batch_size` rows and `max_latency` seconds. Readers opened with
+`connect_reader()` keep reading while the writer commits.
+
+    with MovieWriter('movies.db') as writer:
+        writer.submit(movies).result()
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from change_feed import record_rank_changes
+from db_config import connect, connect_read_only
+from pipeline_profiler import NULL_PROFILER
+
+MOVIES_INSERT = 'INSERT INTO movies (title, worldwide_gross, year) VALUES (?, ?, ?)'
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_LATENCY = 0.05
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+_STOP = object()
+
+
+def configure_connection(connection, busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS):
+    """Switch a connection to WAL mode with a busy timeout."""
+    connection.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    return connection
+
+
+def connect_reader(db_path=None, busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS):
+    """Open a read-only connection that doesn't block (or get blocked by) the writer."""
+    connection = connect_read_only(db_path, check_same_thread=False)
+    connection.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+    return connection
+
+
+def movie_params(row):
+    """Turn a scraped movie dictionary (or a ready tuple) into insert parameters."""
+    if isinstance(row, dict):
+        return (row['title'], row['worldwide_gross'], int(row['year']))
+    return tuple(row)
+
+
+class MovieWriter:
+    """Owns the only write connection and group-commits queued row batches."""
+
+    def __init__(self, db_path=None, sql=MOVIES_INSERT, batch_size=DEFAULT_BATCH_SIZE,
+                 max_latency=DEFAULT_MAX_LATENCY, max_queued=10_000,
+                 busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS, profiler=None, rank_changes=False):
+        self.db_path = db_path
+        self.sql = sql
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.busy_timeout_ms = busy_timeout_ms
+        # Each group commit runs in the profiler's 'write' phase, on the writer thread
+        self.profiler = profiler or NULL_PROFILER
+        # Re-ranking re-reads the whole table on every group commit, so it is opt-in here
+        self.rank_changes = rank_changes
+
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.thread = None
+        # Held while a batch is put on the queue, so close() cannot slip its stop
+        # marker in between a submit's running check and its put
+        self.submit_lock = threading.Lock()
+        self.closed = False
+        self.commits = 0
+        self.rows_written = 0
+        self.ready = threading.Event()
+        self.startup_error = None
+
+    def start(self):
+        """Start the writer thread and wait until its connection is ready."""
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='movie-writer', daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.startup_error is not None:
+            raise self.startup_error
+        return self
+
+    def submit(self, rows):
+        """
+        Queue a batch of rows for writing.
+
+        Returns a Future that resolves to the number of rows written once
+        the batch has been committed. Blocks if the queue is full, which
+        gives producers back-pressure.
+        """
+        params = [movie_params(row) for row in rows]
+        future = Future()
+        with self.submit_lock:
+            if self.closed or self.thread is None or not self.thread.is_alive():
+                raise RuntimeError('MovieWriter is not running')
+            self.queue.put((params, future))
+        return future
+
+    def close(self):
+        """Commit everything still queued and stop the writer thread."""
+        if self.thread is not None:
+            with self.submit_lock:
+                self.closed = True
+                self.queue.put(_STOP)
+            self.thread.join()
+            self.thread = None
+            # Normally empty already; covers a writer thread that died on its own
+            self._fail_pending(RuntimeError('MovieWriter stopped before this batch was written'))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        try:
+            connection = connect(self.db_path, isolation_level=None)
+            configure_connection(connection, self.busy_timeout_ms)
+        except sqlite3.Error as e:
+            self.startup_error = e
+            self.ready.set()
+            return
+        self.ready.set()
+
+        try:
+            stopping = False
+            while not stopping:
+                item = self.queue.get()
+                if item is _STOP:
+                    break
+
+                # Gather more batches until the group is full or the latency bound is hit
+                group = [item]
+                row_count = len(item[0])
+                deadline = time.monotonic() + self.max_latency
+                while row_count < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    group.append(item)
+                    row_count += len(item[0])
+
+                try:
+                    with self.profiler.phase('write'):
+                        self._commit_group(connection, group)
+                except Exception as e:
+                    # Keep the writer alive; whatever was in flight fails with the error
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+        finally:
+            connection.close()
+            self._fail_pending(RuntimeError('MovieWriter stopped before this batch was written'))
+
+    def _fail_pending(self, error):
+        """Fail the futures of batches still queued when the writer thread exits."""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and not item[1].done():
+                item[1].set_exception(error)
+
+    def _commit_group(self, connection, group):
+        """
+        Write a group of batches in one transaction and resolve their futures.
+
+        Each batch runs in its own savepoint, so a batch that fails (e.g. a
+        constraint error) is rolled back alone and only its future gets the
+        exception; the other producers' batches are still committed.
+        """
+        written = []
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            for rows, future in group:
+                connection.execute('SAVEPOINT batch')
+                try:
+                    connection.executemany(self.sql, rows)
+                except Exception as e:
+                    connection.execute('ROLLBACK TO batch')
+                    future.set_exception(e)
+                else:
+                    written.append((rows, future))
+                finally:
+                    connection.execute('RELEASE batch')
+            if self.rank_changes and written:
+                record_rank_changes(connection)
+            connection.execute('COMMIT')
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            for _, future in written:
+                future.set_exception(e)
+            return
+
+        self.commits += 1
+        for rows, future in written:
+            self.rows_written += len(rows)
+            future.set_result(len(rows))